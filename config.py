@@ -1,7 +1,7 @@
-from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
 import re
+from utils.mongo import MongoConnection
 
 # Load environment variables from .env file
 load_dotenv()
@@ -10,6 +10,9 @@ load_dotenv()
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 8766
+# Compact tokens carry only user_id, role, exp and the profile version (pv);
+# profile fields come from the server-side profile cache
+JWT_COMPACT_CLAIMS = os.getenv("JWT_COMPACT_CLAIMS", "true").lower() == "true"
 
 # Admin Configuration
 ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
@@ -19,16 +22,125 @@ ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME", "userdb")
 
-# Initialize MongoDB client
-try:
-    client = MongoClient(MONGO_URI)
-    db = client[DB_NAME]
-    # Test the connection
-    client.server_info()
-    print(f"Connected to MongoDB successfully!")
-except Exception as e:
-    print(f"Failed to connect to MongoDB: {e}")
-    db = None
+# Leaderboard snapshot cache (seconds)
+LEADERBOARD_CACHE_TTL_SECONDS = float(os.getenv("LEADERBOARD_CACHE_TTL_SECONDS", "5"))
+LEADERBOARD_STALE_SECONDS = float(os.getenv("LEADERBOARD_STALE_SECONDS", "60"))
+
+# Longest ?window=custom span (days) for time-windowed leaderboards
+LEADERBOARD_MAX_WINDOW_DAYS = int(os.getenv("LEADERBOARD_MAX_WINDOW_DAYS", "366"))
+
+# Live leaderboard (SSE): at most one update per interval (plus an idle refresh
+# for other workers' submits), heartbeat comments
+# keep idle connections open, subscribers capped per process
+LEADERBOARD_STREAM_INTERVAL_SECONDS = float(os.getenv("LEADERBOARD_STREAM_INTERVAL_SECONDS", "2"))
+LEADERBOARD_STREAM_IDLE_REFRESH_SECONDS = float(os.getenv("LEADERBOARD_STREAM_IDLE_REFRESH_SECONDS", "30"))
+LEADERBOARD_STREAM_HEARTBEAT_SECONDS = float(os.getenv("LEADERBOARD_STREAM_HEARTBEAT_SECONDS", "15"))
+LEADERBOARD_STREAM_MAX_SUBSCRIBERS = int(os.getenv("LEADERBOARD_STREAM_MAX_SUBSCRIBERS", "1000"))
+# Lifetime of the stream-scoped tokens EventSource clients pass as ?access_token=
+# (POST /leaderboard/stream/token); checked when the stream is opened
+STREAM_TOKEN_TTL_SECONDS = int(os.getenv("STREAM_TOKEN_TTL_SECONDS", "60"))
+
+# Quizzes with more questions than this are stored in the paged quiz_questions
+# collection (0 = only when requested with "storage": "paged")
+PAGED_QUESTIONS_THRESHOLD = int(os.getenv("PAGED_QUESTIONS_THRESHOLD", "0"))
+
+# Store quiz_results in the compact encoding (option indices + correctness bitmap)
+COMPACT_QUIZ_RESULTS = os.getenv("COMPACT_QUIZ_RESULTS", "true").lower() == "true"
+
+# Admission control: concurrent requests per process, bounded wait queue
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "32"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "128"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+
+# Per-request deadline (ms) propagated to MongoDB as maxTimeMS
+REQUEST_DEADLINE_MS = int(os.getenv("REQUEST_DEADLINE_MS", "10000"))
+REQUEST_DEADLINE_MAX_MS = int(os.getenv("REQUEST_DEADLINE_MAX_MS", "300000"))
+
+# MongoDB connection pool and timeouts (milliseconds)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "5"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0"))  # 0 = no socket timeout
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+
+# In-progress answer autosave: buffered in memory, flushed in bulk every
+# interval; beyond the attempt cap autosaves are written straight through.
+# The buffer is per process, so it is only on by default for a single worker
+# (WEB_CONCURRENCY unset or 1); with several workers every autosave is written
+# through unless PROGRESS_WRITE_BEHIND=true (sticky sessions required).
+# Abandoned progress documents expire after PROGRESS_TTL_DAYS.
+PROGRESS_WRITE_BEHIND = os.getenv(
+    "PROGRESS_WRITE_BEHIND", "true" if os.getenv("WEB_CONCURRENCY", "1") == "1" else "false"
+).lower() == "true"
+PROGRESS_FLUSH_INTERVAL_SECONDS = float(os.getenv("PROGRESS_FLUSH_INTERVAL_SECONDS", "3"))
+PROGRESS_MAX_BUFFERED_ATTEMPTS = int(os.getenv("PROGRESS_MAX_BUFFERED_ATTEMPTS", "50000"))
+PROGRESS_TTL_DAYS = int(os.getenv("PROGRESS_TTL_DAYS", "7"))
+
+# Background scheduler (utils/scheduler.py): intervals in seconds, 0 disables a job.
+# Snapshot jobs refresh the leaderboard/dashboard read models: in one worker
+# that publishes them when CACHE_BACKEND is shared, otherwise in every worker.
+# A run that finds nothing changed (utils.standings.snapshot_version) keeps the
+# last value, for at most LEADERBOARD_STALE_SECONDS.
+# Maintenance jobs run in one worker at a time (leader lease in MongoDB)
+SCHEDULER_MAX_WORKERS = int(os.getenv("SCHEDULER_MAX_WORKERS", "2"))
+SCHEDULE_SNAPSHOTS_SECONDS = float(os.getenv("SCHEDULE_SNAPSHOTS_SECONDS", "5"))
+SCHEDULE_RECONCILE_COUNTERS_SECONDS = float(os.getenv("SCHEDULE_RECONCILE_COUNTERS_SECONDS", "3600"))
+SCHEDULE_COMPACT_RESULTS_SECONDS = float(os.getenv("SCHEDULE_COMPACT_RESULTS_SECONDS", "0"))
+
+# Cache backend for quizzes and the leaderboard snapshot: "local" (in-process
+# LRU, per worker) or "sqlite" (one WAL-mode file shared by all workers on the
+# host). Bump CACHE_KEY_VERSION when cached document shapes change.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "local").lower()
+# The SQLite file's directory must be private to the service user (created 0700)
+CACHE_SQLITE_PATH = os.getenv(
+    "CACHE_SQLITE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "quiz_api", "cache.sqlite3")
+)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_KEY_VERSION = os.getenv("CACHE_KEY_VERSION", "1")
+QUIZ_CACHE_TTL_SECONDS = float(os.getenv("QUIZ_CACHE_TTL_SECONDS", "60"))
+
+# Per-quiz score/time distributions (GET /quiz/<quiz_id>/distribution); keys
+# change with every new attempt or quiz edit, the TTL only bounds memory
+DISTRIBUTION_CACHE_TTL_SECONDS = float(os.getenv("DISTRIBUTION_CACHE_TTL_SECONDS", "600"))
+
+# How long a submit's response is kept for replaying retries with the same
+# Idempotency-Key (older retries are answered from quiz_results)
+IDEMPOTENCY_CACHE_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_CACHE_TTL_SECONDS", "600"))
+
+# Largest quiz bank accepted by POST /quizzes/import (bytes, NDJSON or zip)
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(100 * 1024 * 1024)))
+
+# In-process user profile cache (entries, seconds)
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+PROFILE_CACHE_TTL_SECONDS = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "300"))
+
+# Background MongoDB ping used by /health/ready (seconds); readiness fails when
+# the last successful ping is older than the max age
+HEALTH_PING_INTERVAL_SECONDS = float(os.getenv("HEALTH_PING_INTERVAL_SECONDS", "5"))
+HEALTH_PING_MAX_AGE_SECONDS = float(os.getenv("HEALTH_PING_MAX_AGE_SECONDS", "15"))
+
+# Read preference for analytic routes (leaderboards, dashboard, users, exports);
+# max staleness must be >= 90 seconds, 0 = unbounded
+ANALYTICS_READ_PREFERENCE = os.getenv("ANALYTICS_READ_PREFERENCE", "secondaryPreferred")
+ANALYTICS_MAX_STALENESS_SECONDS = int(os.getenv("ANALYTICS_MAX_STALENESS_SECONDS", "90"))
+
+# MongoDB client is created lazily on first use; `db` resolves through it
+mongo = MongoConnection(
+    MONGO_URI,
+    DB_NAME,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+    socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS or None,
+    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS
+)
+db = mongo.db
 
 # Validation regex patterns
 EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
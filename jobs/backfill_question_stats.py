@@ -0,0 +1,27 @@
+"""
+Rebuild per-question analytics counters (question_stats) from stored quiz_results.
+Safe to re-run: each quiz's counters are replaced, not incremented.
+Run it while submissions are paused, otherwise concurrent submits may be counted twice.
+
+Usage: python -m jobs.backfill_question_stats [quiz_id ...]
+"""
+import sys
+from bson import ObjectId
+from config import db, mongo
+from utils.question_stats import rebuild_question_stats
+
+
+if __name__ == '__main__':
+    if not mongo.ping():
+        raise SystemExit("[Backfill Question Stats] ERROR: Database connection failed")
+
+    query = {}
+    if len(sys.argv) > 1:
+        query['_id'] = {'$in': [ObjectId(quiz_id) for quiz_id in sys.argv[1:]]}
+
+    total = 0
+    for quiz in db.quizzes.find(query, {'questions.question_id': 1, 'questions.options': 1, 'question_storage': 1}):
+        count = rebuild_question_stats(quiz)
+        total += count
+        print(f"[Backfill Question Stats] quiz {quiz['_id']}: {count} questions")
+    print(f"[Backfill Question Stats] Done: {total} question counters rebuilt")
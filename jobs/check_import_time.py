@@ -0,0 +1,112 @@
+"""
+Measure worker startup imports with `python -X importtime`.
+
+Checks that importing run_services does not pull in any service module, that
+building the app (create_app) stays within an import-time budget, and that the
+built app registers every blueprint and answers requests (routes that need no
+database, so the check runs without MongoDB). Exits non-zero when any check
+fails, so it can run in CI.
+
+Usage: python -m jobs.check_import_time [--budget-ms 1500] [--top 15]
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_ONLY = (
+    "import sys, run_services; "
+    "print(','.join(m for m in sys.modules if m.startswith('services.')))"
+)
+CREATE_APP = "from run_services import create_app; create_app({'TESTING': True})"
+# Every blueprint of BLUEPRINTS registered, then a public route, a protected
+# route without a token and an unknown path through the test client
+SMOKE = (
+    "import json; from run_services import BLUEPRINTS, create_app; "
+    "app = create_app({'TESTING': True}); client = app.test_client(); "
+    "print(json.dumps({"
+    "'missing': [a for _, a in BLUEPRINTS if a[:-3] not in app.blueprints], "
+    "'/health/live': client.get('/health/live').status_code, "
+    "'/quiz/<id> without token': client.get('/quiz/' + '0' * 24).status_code, "
+    "'/unknown': client.get('/unknown').status_code}))"
+)
+SMOKE_EXPECTED = {'/health/live': 200, '/quiz/<id> without token': 401, '/unknown': 404}
+
+
+def _run(code, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', code]
+    # Never let the check talk to a real database
+    env = dict(os.environ, MONGO_URI='mongodb://127.0.0.1:1', JWT_SECRET_KEY=os.getenv('JWT_SECRET_KEY') or 'import-time-check')
+    return subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def run_checks(budget_ms=1500, top=15):
+    """Run every check, printing a line per check; True when all of them pass"""
+    failed = False
+
+    result = _run(IMPORT_ONLY)
+    if result.returncode != 0:
+        raise SystemExit(f"[Import Time] ERROR: import run_services failed\n{result.stderr}")
+    eager = [name for name in result.stdout.strip().split(',') if name]
+    if eager:
+        print(f"[Import Time] FAIL: importing run_services loaded {', '.join(eager)}")
+        failed = True
+    else:
+        print("[Import Time] OK: importing run_services loads no service modules")
+
+    result = _run(CREATE_APP, importtime=True)
+    if result.returncode != 0:
+        raise SystemExit(f"[Import Time] ERROR: create_app failed\n{result.stderr}")
+    rows = parse_importtime(result.stderr)
+    total_ms = sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000.0
+    print(f"[Import Time] create_app imports: {total_ms:.1f} ms (budget {budget_ms} ms)")
+    print("[Import Time] Slowest top-level imports:")
+    top_level = sorted((row for row in rows if row[3] == 0), key=lambda row: row[2], reverse=True)
+    for name, _, cumulative, _ in top_level[:top]:
+        print(f"    {cumulative / 1000.0:8.1f} ms  {name}")
+    if total_ms > budget_ms:
+        print(f"[Import Time] FAIL: over budget by {total_ms - budget_ms:.1f} ms")
+        failed = True
+
+    result = _run(SMOKE)
+    if result.returncode != 0:
+        raise SystemExit(f"[Import Time] ERROR: app smoke check failed\n{result.stderr}")
+    smoke = json.loads(result.stdout.strip().splitlines()[-1])
+    missing = smoke.pop('missing')
+    wrong = {path: status for path, status in smoke.items() if status != SMOKE_EXPECTED[path]}
+    if missing or wrong:
+        print(f"[Import Time] FAIL: unregistered blueprints {missing}, unexpected statuses {wrong}")
+        failed = True
+    else:
+        print(f"[Import Time] OK: create_app registers every blueprint and serves requests {smoke}")
+
+    return not failed
+
+
+if __name__ == '__main__':
+    budget_ms = 1500
+    top = 15
+    if '--budget-ms' in sys.argv:
+        budget_ms = int(sys.argv[sys.argv.index('--budget-ms') + 1])
+    if '--top' in sys.argv:
+        top = int(sys.argv[sys.argv.index('--top') + 1])
+
+    if not run_checks(budget_ms, top):
+        raise SystemExit(1)
@@ -0,0 +1,23 @@
+"""
+Convert legacy quiz_results documents (full per-question copies) to the compact
+encoding: option indices + correctness bitmap against an archived answer key.
+
+A result whose stored questions match the quiz's current questions references the
+current revision; otherwise its own answer key is archived under a legacy revision.
+Safe to re-run: already compacted documents are skipped.
+
+Usage: python -m jobs.compact_results [--batch-size N]
+"""
+import sys
+from config import mongo
+from utils.results import compact_results
+
+
+if __name__ == '__main__':
+    if not mongo.ping():
+        raise SystemExit("[Compact Results] ERROR: Database connection failed")
+    batch_size = 500
+    if '--batch-size' in sys.argv:
+        batch_size = int(sys.argv[sys.argv.index('--batch-size') + 1])
+    converted, skipped = compact_results(batch_size)
+    print(f"[Compact Results] Done: {converted} converted, {skipped} skipped")
@@ -0,0 +1,102 @@
+"""
+Remove historical duplicate quiz_results left by client retries (before submits
+carried an Idempotency-Key).
+
+Two results are duplicates when the same user submitted the same quiz with the
+same answers, score and time within --window-seconds of the earlier one; the
+earliest is kept. Results with different idempotency keys are never merged.
+Afterwards the per-question counters and best results of affected quizzes and
+the standings are rebuilt from what is left. Use --dry-run to only report what would be removed.
+
+Usage: python -m jobs.dedupe_results [--window-seconds N] [--batch-size N] [--dry-run]
+"""
+import sys
+from datetime import datetime
+from bson import ObjectId
+from config import db, mongo
+from utils.question_stats import rebuild_question_stats
+from utils.results import RESULT_ANSWER_FIELDS
+from utils.standings import rebuild_standings, rebuild_daily_standings, seed_quiz_best
+
+
+def _submitted_at(result):
+    value = result.get('submitted_at')
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value
+
+
+def _signature(result):
+    """What a retry repeats verbatim: quiz, score, time and the answers given"""
+    if 'answers' in result:
+        answers = (bytes(result['answers']), tuple(sorted((result.get('other_answers') or {}).items())))
+    else:
+        answers = tuple((q.get('question_id'), q.get('user_answer')) for q in result.get('questions', []))
+    return (
+        result.get('quiz_id'), result.get('correct_answers'), result.get('total_questions'),
+        result.get('time_taken'), answers
+    )
+
+
+def find_duplicates(window_seconds, batch_size=1000):
+    """(_ids of duplicate results, quiz_ids they belong to)"""
+    fields = dict(RESULT_ANSWER_FIELDS, user_id=1, correct_answers=1, total_questions=1,
+                  time_taken=1, submitted_at=1, idempotency_key=1)
+    cursor = db.quiz_results.find({}, fields).sort([('user_id', 1), ('submitted_at', 1)]).batch_size(batch_size)
+
+    duplicates = []
+    quiz_ids = set()
+    current_user = None
+    kept = {}  # signature -> (submitted_at, idempotency_key) of the last kept result
+    for result in cursor:
+        if result.get('user_id') != current_user:
+            current_user = result.get('user_id')
+            kept = {}
+        submitted_at = _submitted_at(result)
+        signature = _signature(result)
+        previous = kept.get(signature)
+        if previous is not None and submitted_at is not None and previous[0] is not None:
+            previous_at, previous_key = previous
+            distinct_attempts = previous_key and result.get('idempotency_key') and previous_key != result['idempotency_key']
+            if not distinct_attempts and (submitted_at - previous_at).total_seconds() <= window_seconds:
+                duplicates.append(result['_id'])
+                quiz_ids.add(result.get('quiz_id'))
+                continue
+        kept[signature] = (submitted_at, result.get('idempotency_key'))
+    return duplicates, quiz_ids
+
+
+def delete_results(result_ids, batch_size=1000):
+    for start in range(0, len(result_ids), batch_size):
+        db.quiz_results.delete_many({'_id': {'$in': result_ids[start:start + batch_size]}})
+
+
+if __name__ == '__main__':
+    if not mongo.ping():
+        raise SystemExit("[Dedupe Results] ERROR: Database connection failed")
+    window_seconds = 60
+    if '--window-seconds' in sys.argv:
+        window_seconds = float(sys.argv[sys.argv.index('--window-seconds') + 1])
+    batch_size = 1000
+    if '--batch-size' in sys.argv:
+        batch_size = int(sys.argv[sys.argv.index('--batch-size') + 1])
+
+    duplicates, quiz_ids = find_duplicates(window_seconds, batch_size)
+    print(f"[Dedupe Results] Found {len(duplicates)} duplicate results in {len(quiz_ids)} quizzes")
+    if '--dry-run' in sys.argv or not duplicates:
+        raise SystemExit(0)
+
+    delete_results(duplicates, batch_size)
+    valid_ids = [ObjectId(quiz_id) for quiz_id in quiz_ids if quiz_id and ObjectId.is_valid(quiz_id)]
+    for quiz in db.quizzes.find({'_id': {'$in': valid_ids}}, {'questions.question_id': 1, 'questions.options': 1, 'question_storage': 1}):
+        rebuild_question_stats(quiz)
+    for quiz_id in quiz_ids:
+        if quiz_id:
+            seed_quiz_best(quiz_id, reset=True)
+    standings = rebuild_standings()
+    buckets = rebuild_daily_standings(batch_size)
+    print(f"[Dedupe Results] Done: {len(duplicates)} removed; rebuilt question stats, best results, "
+          f"{standings} standings and {buckets} daily buckets")
@@ -0,0 +1,54 @@
+"""
+Convert quiz_results.submitted_at from ISO strings to native dates, then rebuild
+the standings and daily leaderboard buckets (daily_standings) from the converted
+results.
+Safe to re-run: documents already holding a date are skipped.
+
+Usage: python -m jobs.migrate_submitted_at [--batch-size N]
+"""
+import sys
+from datetime import datetime
+from pymongo import UpdateOne
+from config import db, mongo
+from utils.standings import rebuild_all_standings
+
+
+def migrate_submitted_at(batch_size=1000):
+    ops = []
+    converted = skipped = 0
+
+    cursor = db.quiz_results.find(
+        {'submitted_at': {'$type': 'string'}},
+        {'submitted_at': 1}
+    ).batch_size(batch_size)
+
+    for result in cursor:
+        try:
+            submitted_at = datetime.fromisoformat(result['submitted_at'])
+        except ValueError:
+            print(f"[Migrate submitted_at] Skipping {result['_id']}: unparseable {result['submitted_at']!r}")
+            skipped += 1
+            continue
+        ops.append(UpdateOne({'_id': result['_id']}, {'$set': {'submitted_at': submitted_at}}))
+        converted += 1
+
+        if len(ops) >= batch_size:
+            db.quiz_results.bulk_write(ops, ordered=False)
+            ops = []
+            print(f"[Migrate submitted_at] converted {converted} documents...")
+
+    if ops:
+        db.quiz_results.bulk_write(ops, ordered=False)
+    return converted, skipped
+
+
+if __name__ == '__main__':
+    if not mongo.ping():
+        raise SystemExit("[Migrate submitted_at] ERROR: Database connection failed")
+    batch_size = 1000
+    if '--batch-size' in sys.argv:
+        batch_size = int(sys.argv[sys.argv.index('--batch-size') + 1])
+    converted, skipped = migrate_submitted_at(batch_size)
+    print(f"[Migrate submitted_at] Done: {converted} converted, {skipped} skipped")
+    _, buckets, _ = rebuild_all_standings(batch_size)
+    print(f"[Migrate submitted_at] Rebuilt {buckets} daily leaderboard buckets")
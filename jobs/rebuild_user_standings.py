@@ -0,0 +1,31 @@
+"""
+Rebuild the per-user pre-aggregated standings (user_standings) and the daily
+buckets behind time-windowed leaderboards (daily_standings) from quiz_results.
+Safe to re-run: both collections are rebuilt aside and swapped in, and submits
+made meanwhile are replayed afterwards (utils.standings.rebuild_all_standings),
+so it can run while the app serves traffic.
+It also seeds quiz_best_results for quizzes that predate it (seed_quiz_bests).
+The scheduler seeds all of them once per database (seed_standings,
+seed_quiz_bests); this job is for repairs and for deployments that run
+without the scheduler.
+
+Usage: python -m jobs.rebuild_user_standings
+"""
+from config import mongo
+from utils.standings import mark_standings_seeded, rebuild_all_standings, seed_quiz_bests
+
+
+if __name__ == '__main__':
+    if not mongo.ping():
+        raise SystemExit("[Rebuild User Standings] ERROR: Database connection failed")
+
+    total, buckets, replayed = rebuild_all_standings()
+    mark_standings_seeded()
+    quizzes = 0
+    while True:
+        seeded = seed_quiz_bests()
+        if not seeded:
+            break
+        quizzes += seeded
+    print(f"[Rebuild User Standings] Done: {total} standings, {buckets} daily buckets rebuilt, "
+          f"{replayed} results submitted meanwhile replayed, best results of {quizzes} quizzes seeded")
@@ -0,0 +1,14 @@
+"""
+Recompute the global quiz/question counters from the quizzes collection.
+
+Usage: python -m jobs.reconcile_counters
+"""
+from config import mongo
+from utils.counters import reconcile_quiz_counters
+
+
+if __name__ == '__main__':
+    if not mongo.ping():
+        raise SystemExit("[Reconcile Counters] ERROR: Database connection failed")
+    counters = reconcile_quiz_counters()
+    print(f"[Reconcile Counters] total_quizzes={counters['total_quizzes']}, total_questions={counters['total_questions']}")
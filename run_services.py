@@ -1,110 +1,150 @@
+import importlib
 from flask import Flask
 from flask_cors import CORS
-import threading
-from config import db
-
-# Import all service blueprints
-from services.login import login_bp
-from services.register import register_bp
-from services.get_quiz import get_quiz_bp
-from services.submit_quiz import submit_quiz_bp
-from services.get_quizzes import get_quizzes_bp
-from services.create_quiz import create_quiz_bp
-from services.get_users import get_users_bp
-from services.get_user import get_user_bp
-from services.verify_token import verify_token_bp
-from services.decode_token import decode_token_bp
-from services.dashboard import dashboard_bp
-from services.quiz_info import quiz_info_bp
-from services.update_quiz import update_quiz_bp
-from services.delete_quiz import delete_quiz_bp
-from services.delete_question import delete_question_bp
-from services.get_all_quizzes_detailed import get_all_quizzes_detailed_bp
-from services.leaderboard import leaderboard_bp
-
-# Create Flask app
-app = Flask(__name__)
-
-# Configure CORS to support all localhost origins and domain
-# Using regex pattern to match localhost and 127.0.0.1 with http/https
-CORS(app, 
-     origins=[
-         r"https?://(localhost|127\.0\.0\.1)(:\d+)?",
-         r"https://steamkarivalclient-d73s\.vercel\.app"
-     ],
-     supports_credentials=True)
-
-# Register all blueprints
-app.register_blueprint(login_bp)
-app.register_blueprint(register_bp)
-app.register_blueprint(get_quiz_bp)
-app.register_blueprint(submit_quiz_bp)
-app.register_blueprint(get_quizzes_bp)
-app.register_blueprint(create_quiz_bp)
-app.register_blueprint(get_users_bp)
-app.register_blueprint(get_user_bp)
-app.register_blueprint(verify_token_bp)
-app.register_blueprint(decode_token_bp)
-app.register_blueprint(dashboard_bp)
-app.register_blueprint(quiz_info_bp)
-app.register_blueprint(update_quiz_bp)
-app.register_blueprint(delete_quiz_bp)
-app.register_blueprint(delete_question_bp)
-app.register_blueprint(get_all_quizzes_detailed_bp)
-app.register_blueprint(leaderboard_bp)
-
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Health check endpoint to verify all services are running"""
-    return {
-        'status': 'healthy',
-        'services': [
-            'login',
-            'register',
-            'get_quiz',
-            'submit_quiz',
-            'get_quizzes',
-            'create_quiz',
-            'get_users',
-            'get_user',
-            'verify_token',
-            'decode_token',
-        'dashboard',
-        'quiz_info',
-        'update_quiz',
-        'delete_quiz',
-        'delete_question',
-        'get_all_quizzes_detailed'
-        , 'leaderboard'
-    ],
-        'database': 'connected' if db is not None else 'disconnected'
-    }, 200
+
+# Every service blueprint as (module, attribute). Modules are imported only
+# when an app is created, so importing this file stays cheap.
+BLUEPRINTS = [
+    ('services.login', 'login_bp'),
+    ('services.register', 'register_bp'),
+    ('services.get_quiz', 'get_quiz_bp'),
+    ('services.submit_quiz', 'submit_quiz_bp'),
+    ('services.get_quizzes', 'get_quizzes_bp'),
+    ('services.create_quiz', 'create_quiz_bp'),
+    ('services.get_users', 'get_users_bp'),
+    ('services.get_user', 'get_user_bp'),
+    ('services.verify_token', 'verify_token_bp'),
+    ('services.decode_token', 'decode_token_bp'),
+    ('services.dashboard', 'dashboard_bp'),
+    ('services.quiz_info', 'quiz_info_bp'),
+    ('services.update_quiz', 'update_quiz_bp'),
+    ('services.delete_quiz', 'delete_quiz_bp'),
+    ('services.delete_question', 'delete_question_bp'),
+    ('services.get_all_quizzes_detailed', 'get_all_quizzes_detailed_bp'),
+    ('services.leaderboard', 'leaderboard_bp'),
+    ('services.quiz_leaderboard', 'quiz_leaderboard_bp'),
+    ('services.quiz_analytics', 'quiz_analytics_bp'),
+    ('services.patch_questions', 'patch_questions_bp'),
+    ('services.get_quiz_questions', 'get_quiz_questions_bp'),
+    ('services.export', 'export_bp'),
+    ('services.import_quizzes', 'import_quizzes_bp'),
+    ('services.quiz_progress', 'quiz_progress_bp'),
+]
+
+
+def create_app(config=None):
+    """
+    Build the Flask app.
+
+    config: optional mapping merged into app.config. Recognised keys:
+    - SERVICES: blueprint module names to register (default: all of BLUEPRINTS)
+    - WARM_UP: connect to MongoDB and create indexes in the background
+      (default: True unless TESTING)
+    - SCHEDULER: run the background jobs that precompute leaderboard and
+      dashboard snapshots and do maintenance (default: same as WARM_UP)
+    """
+    from config import mongo, HEALTH_PING_INTERVAL_SECONDS
+    from utils.indexes import ensure_indexes
+    from utils.admission import init_admission
+    from utils.deadline import init_deadlines
+    from utils.errors import init_error_handlers
+    from utils.read_preference import init_read_preferences
+    from utils.auth import admin_required
+    from utils.health import health_stats, readiness
+    from utils.scheduler import init_scheduler
+
+    app = Flask(__name__)
+    app.config.update(config or {})
+
+    # Configure CORS to support all localhost origins and domain
+    # Using regex pattern to match localhost and 127.0.0.1 with http/https
+    CORS(app,
+         origins=[
+             r"https?://(localhost|127\.0\.0\.1)(:\d+)?",
+             r"https://steamkarivalclient-d73s\.vercel\.app"
+         ],
+         supports_credentials=True)
+
+    # Request deadlines first so time spent queued counts against them
+    init_deadlines(app)
+
+    # Analytic blueprints read from secondaries (bounded staleness)
+    init_read_preferences(app)
+
+    # Per-process admission control and load shedding (503 + Retry-After)
+    init_admission(app)
+
+    # JSON error envelopes for every route: 504 past the deadline, 503 when
+    # MongoDB is unreachable, 500 otherwise
+    init_error_handlers(app)
+
+    services = app.config.get('SERVICES')
+    for module_name, attribute in BLUEPRINTS:
+        if services is not None and module_name.rsplit('.', 1)[-1] not in services:
+            continue
+        module = importlib.import_module(module_name)
+        app.register_blueprint(getattr(module, attribute))
+
+    @app.route('/health/live', methods=['GET'])
+    def health_live():
+        """Liveness: the process is up and serving requests"""
+        return {'status': 'alive'}, 200
+
+    @app.route('/health/ready', methods=['GET'])
+    def health_ready():
+        """Readiness: MongoDB answered the background ping recently"""
+        ready, payload = readiness()
+        return payload, 200 if ready else 503
+
+    @app.route('/health/stats', methods=['GET'])
+    @admin_required
+    def health_stats_endpoint():
+        """Pool, admission, cache, stream and scheduler counters (admin only)"""
+        return health_stats(), 200
+
+    @app.route('/health', methods=['GET'])
+    def health_check():
+        """Kept for existing monitors; same as /health/ready"""
+        return health_ready()
+
+    # Connect and fill the pool in the background, then create the indexes the
+    # services rely on (no-op when they already exist) and keep pinging for
+    # /health/ready; startup never blocks on Mongo
+    warm_up = app.config.get('WARM_UP', not app.testing)
+    if warm_up:
+        mongo.start_monitor(HEALTH_PING_INTERVAL_SECONDS, on_connect=ensure_indexes)
+
+    # Heavy aggregates are precomputed off the request path
+    if app.config.get('SCHEDULER', warm_up):
+        init_scheduler()
+
+    return app
+
+
+_app = None
+
+
+def __getattr__(name):
+    # `run_services:app` (e.g. for gunicorn) builds the default app on first access
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == '__main__':
+    app = create_app()
     print("=" * 60)
     print("Starting Quiz Application with Microservices Architecture")
     print("=" * 60)
     print("\nAll services registered:")
-    print("- Login Service")
-    print("- Register Service")
-    print("- Get Quiz Service")
-    print("- Submit Quiz Service")
-    print("- Get Quizzes Service")
-    print("- Create Quiz Service")
-    print("- Get Users Service")
-    print("- Get User Service")
-    print("- Verify Token Service")
-    print("- Decode Token Service")
-    print("- Dashboard Service")
-    print("- Quiz Info Service")
-    print("- Update Quiz Service")
-    print("- Delete Quiz Service")
-    print("- Delete Question Service")
-    print("- Get All Quizzes Detailed Service")
-    print("\nHealth endpoint available at: /health")
+    for name in app.blueprints:
+        print(f"- {name.replace('_', ' ').title()} Service")
+    print("\nHealth endpoints available at: /health/live, /health/ready")
     print(f"All services running on single port: 5000")
     print("=" * 60)
-    
 
-    app.run(host="0.0.0.0", port=5000)
 
+    app.run(host="0.0.0.0", port=5000)
@@ -0,0 +1,275 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from datetime import datetime, timedelta
+from bson import ObjectId
+import csv
+import io
+import json
+from config import db, ADMIN_USERNAME
+from utils.auth import admin_required
+from utils.deadline import ExecutionTimeout, aggregate, find
+from utils.questions import STORAGE_EMBEDDED, iter_quiz_questions
+from utils.results import format_timestamp
+from utils.standings import RESULT_SCORE
+from utils.mongo import ConnectionFailure
+
+export_bp = Blueprint('export', __name__)
+
+# Rows fetched per server-side cursor round trip
+EXPORT_BATCH_SIZE = 1000
+
+RESULT_COLUMNS = [
+    'result_id', 'quiz_id', 'user_id', 'username', 'correct_answers',
+    'total_questions', 'score_percentage', 'time_taken', 'submitted_at'
+]
+LEADERBOARD_COLUMNS = [
+    'rank', 'user_id', 'name', 'email', 'phone', 'school', 'total_quizzes_attempted',
+    'total_correct', 'total_questions', 'average_score', 'time_taken'
+]
+QUIZ_QUESTION_COLUMNS = ['question_id', 'question', 'options', 'correct_answer']
+
+
+def _parse_date(value, end=False):
+    """ISO date/datetime -> datetime; a bare date used as an upper bound covers the whole day"""
+    parsed = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def _build_match(args):
+    """quiz_results filter from ?quiz_id=&school=&from=&to= (raises ValueError on bad input)"""
+    match = {}
+    quiz_id = args.get('quiz_id')
+    if quiz_id:
+        if not ObjectId.is_valid(quiz_id):
+            raise ValueError('Invalid quiz ID')
+        match['quiz_id'] = quiz_id
+
+    date_from = args.get('from')
+    date_to = args.get('to')
+    if date_from or date_to:
+        submitted_at = {}
+        try:
+            if date_from:
+                submitted_at['$gte'] = _parse_date(date_from)
+            if date_to:
+                submitted_at['$lt'] = _parse_date(date_to, end=True)
+        except ValueError:
+            raise ValueError('from/to must be ISO dates (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)')
+        match['submitted_at'] = submitted_at
+
+    school = args.get('school')
+    if school:
+        user_ids = [str(user['_id']) for user in find(db.users, {'school': school}, {'_id': 1})]
+        match['user_id'] = {'$in': user_ids}
+    return match
+
+
+def _export_format(args):
+    export_format = args.get('format', 'csv').lower()
+    if export_format not in ('csv', 'ndjson'):
+        raise ValueError('format must be csv or ndjson')
+    return export_format
+
+
+def _stream_error(e):
+    """Error message of the handler chain, for a failure after the response started"""
+    if isinstance(e, ExecutionTimeout):
+        return 'Request timed out'
+    if isinstance(e, ConnectionFailure):
+        return 'Database connection failed'
+    return str(e)
+
+
+def _stream(rows, columns, export_format):
+    """
+    Encode rows lazily as CSV (with header) or NDJSON. Headers are already
+    sent when the cursor fails mid-stream, so the body then ends with an
+    explicit error record ({"status": false, ...} line, or a "# ERROR" line
+    in CSV) instead of looking like a complete export.
+    """
+    written = 0
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns or [], extrasaction='ignore')
+    try:
+        if export_format == 'ndjson':
+            for row in rows:
+                yield json.dumps(row, default=str) + '\n'
+                written += 1
+            return
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+            # Flush roughly every 64 KB to keep chunks reasonably sized
+            if buffer.tell() > 65536:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    except Exception as e:
+        error = _stream_error(e)
+        print(f"[Export] ERROR: stream stopped after {written} rows: {e}")
+        if export_format == 'ndjson':
+            yield json.dumps({'status': False, 'error': error, 'rows_written': written}) + '\n'
+        else:
+            yield buffer.getvalue() + f'# ERROR: export incomplete after {written} rows: {error}\r\n'
+
+
+def _response(rows, columns, export_format, name):
+    mimetype = 'application/x-ndjson' if export_format == 'ndjson' else 'text/csv'
+    extension = 'ndjson' if export_format == 'ndjson' else 'csv'
+    filename = f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}"
+    return Response(
+        stream_with_context(_stream(rows, columns, export_format)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+@export_bp.route('/export/results', methods=['GET'])
+@admin_required
+def export_results():
+    """Stream every matching quiz attempt in one pass over a server-side cursor"""
+    try:
+        export_format = _export_format(request.args)
+        match = _build_match(request.args)
+    except ValueError as e:
+        return jsonify({'status': False, 'error': str(e)}), 400
+
+    cursor = find(db.quiz_results, 
+        match,
+        {'quiz_id': 1, 'user_id': 1, 'username': 1, 'correct_answers': 1,
+         'total_questions': 1, 'time_taken': 1, 'submitted_at': 1}
+    ).sort('_id', 1).batch_size(EXPORT_BATCH_SIZE)
+
+    def rows():
+        for result in cursor:
+            total_questions = result.get('total_questions', 0)
+            correct_answers = result.get('correct_answers', 0)
+            yield {
+                'result_id': str(result['_id']),
+                'quiz_id': result.get('quiz_id', ''),
+                'user_id': result.get('user_id', ''),
+                'username': result.get('username', ''),
+                'correct_answers': correct_answers,
+                'total_questions': total_questions,
+                'score_percentage': round(correct_answers / total_questions * 100, 2) if total_questions > 0 else 0,
+                'time_taken': result.get('time_taken', 0),
+                'submitted_at': format_timestamp(result.get('submitted_at'))
+            }
+
+    return _response(rows(), RESULT_COLUMNS, export_format, 'results')
+
+
+@export_bp.route('/export/leaderboard', methods=['GET'])
+@admin_required
+def export_leaderboard():
+    """
+    Stream the full ranked leaderboard (optionally filtered) from one aggregation.
+    User details are joined per cursor batch, so memory stays bounded.
+    """
+    try:
+        export_format = _export_format(request.args)
+        match = _build_match(request.args)
+    except ValueError as e:
+        return jsonify({'status': False, 'error': str(e)}), 400
+
+    pipeline = [
+        {'$match': match},
+        {
+            '$group': {
+                '_id': '$user_id',
+                'total_quizzes_attempted': {'$sum': 1},
+                'total_correct': {'$sum': '$correct_answers'},
+                'total_questions': {'$sum': '$total_questions'},
+                'total_time_taken': {'$sum': '$time_taken'},
+                'average_score': {'$avg': RESULT_SCORE}
+            }
+        },
+        # Same ordering as /leaderboard: higher average score first, then
+        # lower time, both rounded to 2 decimals as displayed, then user id
+        {'$addFields': {
+            'average_score': {'$round': [{'$multiply': ['$average_score', 100]}, 2]},
+            'total_time_taken': {'$round': ['$total_time_taken', 2]}
+        }},
+        {'$sort': {'average_score': -1, 'total_time_taken': 1, '_id': 1}}
+    ]
+    cursor = aggregate(db.quiz_results, pipeline, allowDiskUse=True, batchSize=EXPORT_BATCH_SIZE)
+
+    def rows():
+        rank = 0
+        batch = []
+        for entry in cursor:
+            batch.append(entry)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                for row in _leaderboard_rows(batch, rank):
+                    rank = row['rank']
+                    yield row
+                batch = []
+        for row in _leaderboard_rows(batch, rank):
+            yield row
+
+    return _response(rows(), LEADERBOARD_COLUMNS, export_format, 'leaderboard')
+
+
+@export_bp.route('/export/quizzes', methods=['GET'])
+@admin_required
+def export_quizzes():
+    """
+    Stream the quiz bank as NDJSON, one quiz per line with its questions and
+    answers in order (either storage mode). POST /quizzes/import reads it back.
+    """
+    query = {}
+    quiz_ids = [quiz_id for quiz_id in request.args.get('quiz_ids', '').split(',') if quiz_id]
+    if quiz_ids:
+        if not all(ObjectId.is_valid(quiz_id) for quiz_id in quiz_ids):
+            return jsonify({'status': False, 'error': 'Invalid quiz ID'}), 400
+        query['_id'] = {'$in': [ObjectId(quiz_id) for quiz_id in quiz_ids]}
+
+    cursor = find(db.quizzes, query, {
+        'title': 1, 'questions': 1, 'question_storage': 1, 'created_by': 1, 'created_at': 1
+    }).sort('_id', 1).batch_size(EXPORT_BATCH_SIZE)
+
+    def rows():
+        for quiz in cursor:
+            yield {
+                'quiz_id': str(quiz['_id']),
+                'title': quiz.get('title', ''),
+                'storage': quiz.get('question_storage', STORAGE_EMBEDDED),
+                'created_by': quiz.get('created_by', ''),
+                'created_at': quiz.get('created_at', ''),
+                'questions': [
+                    {field: question.get(field) for field in QUIZ_QUESTION_COLUMNS}
+                    for question in iter_quiz_questions(quiz, QUIZ_QUESTION_COLUMNS)
+                ]
+            }
+
+    return _response(rows(), None, 'ndjson', 'quizzes')
+
+
+def _leaderboard_rows(batch, last_rank):
+    """Join one batch of aggregated entries with user details"""
+    object_ids = [ObjectId(entry['_id']) for entry in batch if ObjectId.is_valid(str(entry['_id']))]
+    users = {}
+    if object_ids:
+        for user in find(db.users, {'_id': {'$in': object_ids}}, {'name': 1, 'email': 1, 'phone': 1, 'school': 1}):
+            users[str(user['_id'])] = user
+
+    for rank, entry in enumerate(batch, start=last_rank + 1):
+        uid = str(entry['_id'])
+        user = users.get(uid)
+        is_admin = uid.lower() == 'admin'
+        yield {
+            'rank': rank,
+            'user_id': uid,
+            'name': user.get('name', 'Unknown') if user else ('Admin' if is_admin else 'Unknown User'),
+            'email': user.get('email', '') if user else (ADMIN_USERNAME if is_admin else ''),
+            'phone': user.get('phone', '') if user else '',
+            'school': user.get('school', '') if user else '',
+            'total_quizzes_attempted': entry.get('total_quizzes_attempted', 0),
+            'total_correct': entry.get('total_correct', 0),
+            'total_questions': entry.get('total_questions', 0),
+            'average_score': entry.get('average_score') or 0,
+            'time_taken': entry.get('total_time_taken', 0)
+        }
@@ -1,35 +1,37 @@
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
-from config import db
 from utils.auth import token_required
+from utils.questions import is_paged, get_paged_questions
+from utils.quiz_cache import get_current_quiz
 
 get_quiz_bp = Blueprint('get_quiz', __name__)
 
 @get_quiz_bp.route('/quiz/<quiz_id>', methods=['GET'])
 @token_required
 def get_quiz(quiz_id):
-    try:
-        # Check if database is connected
-        if db is None:
-            return jsonify({'status': False, 'error': 'Database connection failed'}), 500
-        
-        # Validate ObjectId
-        if not ObjectId.is_valid(quiz_id):
-            return jsonify({'status': False, 'error': 'Invalid quiz ID'}), 400
-        
-        quiz = db.quizzes.find_one({'_id': ObjectId(quiz_id)})
-        
-        if not quiz:
-            return jsonify({'status': False, 'error': 'Quiz not found'}), 404
-        
-        quiz['_id'] = str(quiz['_id'])
-        # Don't send correct answers to prevent cheating, but keep question_id
-        for question in quiz['questions']:
-            # Ensure question_id is included, remove only correct_answer
-            if 'correct_answer' in question:
-                question.pop('correct_answer', None)
-        
-        return jsonify({'status': True, 'quiz': quiz}), 200
-    except Exception as e:
-        return jsonify({'status': False, 'error': str(e)}), 500
+    # Validate ObjectId
+    if not ObjectId.is_valid(quiz_id):
+        return jsonify({'status': False, 'error': 'Invalid quiz ID'}), 400
+    
+    # Revision-checked like submit, so users answer the questions submit grades
+    quiz = get_current_quiz(quiz_id)
+    
+    if not quiz:
+        return jsonify({'status': False, 'error': 'Quiz not found'}), 404
+    
+    quiz['_id'] = str(quiz['_id'])
+    
+    # Paged storage: send the first page; clients load the rest from /quiz/<quiz_id>/questions
+    if is_paged(quiz):
+        quiz['questions'], quiz['next_cursor'] = get_paged_questions(quiz)
+        for field in ('next_position', 'questions_key', 'retired_questions_key'):
+            quiz.pop(field, None)
+    
+    # Don't send correct answers to prevent cheating, but keep question_id
+    for question in quiz['questions']:
+        # Ensure question_id is included, remove only correct_answer
+        if 'correct_answer' in question:
+            question.pop('correct_answer', None)
+    
+    return jsonify({'status': True, 'quiz': quiz}), 200
 
@@ -0,0 +1,40 @@
+from flask import Blueprint, request, jsonify
+from bson import ObjectId
+from utils.auth import token_required
+from utils.questions import get_questions_page
+
+get_quiz_questions_bp = Blueprint('get_quiz_questions', __name__)
+
+@get_quiz_questions_bp.route('/quiz/<quiz_id>/questions', methods=['GET'])
+@token_required
+def get_quiz_questions(quiz_id):
+    """
+    Lazy-load a quiz's questions one page at a time (without correct answers).
+    Pass the returned next_cursor as ?cursor= to get the following page.
+    """
+    if not ObjectId.is_valid(quiz_id):
+        return jsonify({'status': False, 'error': 'Invalid quiz ID'}), 400
+    
+    cursor = request.args.get('cursor', default=None, type=int)
+    limit = request.args.get('limit', default=50, type=int)
+    if cursor is not None and cursor < 0:
+        return jsonify({'status': False, 'error': 'Invalid cursor'}), 400
+    if limit < 1:
+        limit = 50
+    if limit > 200:
+        limit = 200
+    
+    page = get_questions_page(quiz_id, cursor, limit)
+    if page is None:
+        return jsonify({'status': False, 'error': 'Quiz not found'}), 404
+    quiz, questions, next_cursor = page
+    
+    return jsonify({
+        'status': True,
+        'quiz_id': quiz_id,
+        'title': quiz.get('title', ''),
+        'total_questions': quiz.get('total_questions', 0),
+        'questions': questions,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }), 200
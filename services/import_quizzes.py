@@ -0,0 +1,96 @@
+from flask import Blueprint, request, jsonify
+from pymongo.errors import BulkWriteError
+from werkzeug.exceptions import RequestEntityTooLarge
+import io
+import shutil
+import tempfile
+import zipfile
+from config import IMPORT_MAX_BYTES
+from utils.auth import admin_required
+from utils.profiles import current_profile
+from utils.quiz_import import ImportTooLarge, QuizImport, bounded, iter_ndjson, iter_zip
+
+import_quizzes_bp = Blueprint('import_quizzes', __name__)
+
+ZIP_MAGIC = b'PK\x03\x04'
+
+# Zip uploads are spooled to disk past this size (zipfile needs a seekable file)
+ZIP_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+def _upload():
+    """
+    (binary stream, is_zip) from a multipart 'file' field or the raw request body.
+    Zips are recognised by name, content type or magic bytes. Bodies without a
+    Content-Length (chunked) are cut off at IMPORT_MAX_BYTES as they are read.
+    """
+    # Bounds multipart parsing too (Flask >= 3.1 allows a per-request limit)
+    request.max_content_length = IMPORT_MAX_BYTES
+    upload = request.files.get('file')
+    if upload is not None:
+        stream, name, mimetype = upload.stream, upload.filename or '', upload.mimetype or ''
+        if isinstance(stream, io.RawIOBase):
+            stream = io.BufferedReader(stream)
+    else:
+        stream, name, mimetype = bounded(request.stream, IMPORT_MAX_BYTES), '', request.mimetype or ''
+
+    is_zip = name.endswith('.zip') or mimetype in ('application/zip', 'application/x-zip-compressed')
+    if not is_zip and hasattr(stream, 'peek'):
+        is_zip = stream.peek(len(ZIP_MAGIC))[:len(ZIP_MAGIC)] == ZIP_MAGIC
+    elif not is_zip and stream.seekable():
+        is_zip = stream.read(len(ZIP_MAGIC)) == ZIP_MAGIC
+        stream.seek(0)
+    if is_zip and not stream.seekable():
+        spooled = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_BYTES)
+        shutil.copyfileobj(stream, spooled)
+        spooled.seek(0)
+        stream = spooled
+    return stream, is_zip
+
+
+@import_quizzes_bp.route('/quizzes/import', methods=['POST'])
+@admin_required
+def import_quizzes():
+    """
+    Bulk-create quizzes from NDJSON (one quiz per line) or a zip of .json/.ndjson
+    files, in the format written by GET /export/quizzes. Every row is validated
+    as it is streamed in and all of its errors are reported; valid quizzes are
+    written in insert_many batches. ?dry_run=true only validates.
+    """
+    if request.content_length is not None and request.content_length > IMPORT_MAX_BYTES:
+        return jsonify({'status': False, 'error': f'Import exceeds {IMPORT_MAX_BYTES} bytes'}), 413
+
+    created_by = current_profile(request.current_user).get('name') or 'Administrator'
+    dry_run = request.args.get('dry_run', 'false').lower() == 'true'
+    bulk = QuizImport(created_by, dry_run=dry_run)
+
+    too_large = f'Import exceeds {IMPORT_MAX_BYTES} bytes'
+    try:
+        stream, is_zip = _upload()
+    except (ImportTooLarge, RequestEntityTooLarge):
+        return jsonify({'status': False, 'error': too_large}), 413
+
+    # Batches already written stay when the import stops early; their ids are reported
+    try:
+        try:
+            rows = iter_zip(stream, IMPORT_MAX_BYTES) if is_zip else iter_ndjson(stream)
+            for label, row in rows:
+                bulk.add(label, row)
+        except ImportTooLarge as e:
+            bulk.flush()
+            return jsonify(dict(bulk.summary(), status=False, error=str(e))), 413
+        except (zipfile.BadZipFile, UnicodeDecodeError) as e:
+            bulk.flush()
+            return jsonify(dict(bulk.summary(), status=False, error=f'Could not read import: {e}')), 400
+        bulk.flush()
+    except BulkWriteError as e:
+        print(f"[Import] insert_many failed: {e.details.get('writeErrors', [])[:1]}")
+        return jsonify(dict(bulk.summary(), status=False, error='Some quizzes could not be written')), 500
+
+    summary = bulk.summary()
+    if summary['rows'] == 0:
+        return jsonify({'status': False, 'error': 'No quizzes found in import'}), 400
+    if summary['valid'] == 0:
+        return jsonify(dict(summary, status=False, error='No valid quizzes in import')), 400
+    message = 'Import validated' if dry_run else f"Imported {summary['imported']} quizzes"
+    return jsonify(dict(summary, status=True, message=message)), 200 if dry_run else 201
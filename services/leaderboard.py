@@ -1,6 +1,11 @@
-from flask import Blueprint, jsonify, request
-from config import db, ADMIN_USERNAME
-from utils.auth import admin_required
+import queue
+from datetime import datetime, timedelta
+from flask import Blueprint, jsonify, request, Response, stream_with_context
+from config import LEADERBOARD_STREAM_HEARTBEAT_SECONDS, STREAM_TOKEN_TTL_SECONDS
+from utils.auth import admin_required, generate_stream_token, stream_admin_required
+from utils.leaderboard import leaderboard_snapshot, window_snapshots, window_range, compute_window_leaderboard
+from utils.standings import normalize_school, school_leaderboard
+from utils.leaderboard_stream import leaderboard_broadcaster, diff_top, sse_event
 import math
 
 leaderboard_bp = Blueprint('leaderboard', __name__)
@@ -9,132 +14,136 @@ leaderboard_bp = Blueprint('leaderboard', __name__)
 @leaderboard_bp.route('/leaderboard', methods=['GET'])
 @admin_required
 def get_leaderboard():
-    try:
-        if db is None:
-            return jsonify({'status': False, 'error': 'Database connection failed'}), 500
-
-        # Pagination: support named (page, limit) and positional (/leaderboard?2&10)
-        page = request.args.get('page', default=None, type=int)
-        per_page = request.args.get('limit', default=None, type=int)
-
-        if page is None or per_page is None:
-            if ('page' not in request.args) and ('limit' not in request.args) and len(request.args) > 0:
-                numeric_keys = []
-                for k in request.args.keys():
-                    if isinstance(k, str) and k.isdigit():
-                        numeric_keys.append(int(k))
-                if len(numeric_keys) >= 1 and page is None:
-                    page = numeric_keys[0]
-                if len(numeric_keys) >= 2 and per_page is None:
-                    per_page = numeric_keys[1]
-
-        if page is None:
-            page = 1
-        if per_page is None:
-            per_page = 10
-        if page < 1:
-            page = 1
-        if per_page < 1:
-            per_page = 10
-        if per_page > 100:
-            per_page = 100
-
-        # Aggregate quiz results per user
-        pipeline = [
-            {
-                '$group': {
-                    '_id': '$user_id',
-                    'total_quizzes_attempted': {'$sum': 1},
-                    'total_correct': {'$sum': '$correct_answers'},
-                    'total_questions': {'$sum': '$total_questions'},
-                    'total_time_taken': {'$sum': '$time_taken'},
-                    'average_score': {'$avg': {'$divide': ['$correct_answers', '$total_questions']}}
-                }
-            },
-            {
-                '$project': {
-                    'user_id': '$_id',
-                    'total_quizzes_attempted': 1,
-                    'total_correct': 1,
-                    'total_questions': 1,
-                    'total_time_taken': 1,
-                    'average_score': {'$multiply': ['$average_score', 100]}
-                }
-            }
-        ]
-
-        aggregated_results = list(db.quiz_results.aggregate(pipeline))
-
-        # Load all users
-        all_users_dict = {}
-        for user in db.users.find():
-            all_users_dict[str(user['_id'])] = user
-
-        # Build leaderboard entries (only users who have attempted quizzes)
-        leaderboard_entries = []
-        processed_user_ids = set()
-
-        for result in aggregated_results:
-            uid = str(result['user_id'])
-            processed_user_ids.add(uid)
-            if uid in all_users_dict:
-                user = all_users_dict[uid]
-                leaderboard_entries.append({
-                    'user_id': uid,
-                    'name': user.get('name', 'Unknown'),
-                    'attempted_questions': result.get('total_questions', 0),
-                    'time_taken': round(result.get('total_time_taken', 0), 2),
-                    'email': user.get('email', ''),
-                    'phone': user.get('phone', ''),
-                    'total_correct': result.get('total_correct', 0),
-                    'total_questions': result.get('total_questions', 0),
-                    'average_score': round(result.get('average_score', 0.0), 2)
-                })
-            else:
-                is_admin = uid.lower() == 'admin'
-                leaderboard_entries.append({
-                    'user_id': uid,
-                    'name': 'Admin' if is_admin else 'Unknown User',
-                    'attempted_questions': result.get('total_questions', 0),
-                    'time_taken': round(result.get('total_time_taken', 0), 2),
-                    'email': ADMIN_USERNAME if is_admin else '',
-                    'phone': '',
-                    'total_correct': result.get('total_correct', 0),
-                    'total_questions': result.get('total_questions', 0),
-                    'average_score': round(result.get('average_score', 0.0), 2)
-                })
-
-        # Only include users who have attempted quizzes (already in processed_user_ids)
-        # Users without quiz attempts are excluded from leaderboard
-
-        # Sort: higher average score first, then lower time_taken
-        leaderboard_entries.sort(key=lambda x: (-x['average_score'], x['time_taken']))
-
-        # Assign rank and drop average_score from response
-        for index, entry in enumerate(leaderboard_entries, start=1):
-            entry['rank'] = index
-            entry.pop('average_score', None)
-
-        # Pagination over full list
+    # Pagination: support named (page, limit) and positional (/leaderboard?2&10)
+    page = request.args.get('page', default=None, type=int)
+    per_page = request.args.get('limit', default=None, type=int)
+
+    if page is None or per_page is None:
+        if ('page' not in request.args) and ('limit' not in request.args) and len(request.args) > 0:
+            numeric_keys = []
+            for k in request.args.keys():
+                if isinstance(k, str) and k.isdigit():
+                    numeric_keys.append(int(k))
+            if len(numeric_keys) >= 1 and page is None:
+                page = numeric_keys[0]
+            if len(numeric_keys) >= 2 and per_page is None:
+                per_page = numeric_keys[1]
+
+    if page is None:
+        page = 1
+    if per_page is None:
+        per_page = 10
+    if page < 1:
+        page = 1
+    if per_page < 1:
+        per_page = 10
+    if per_page > 100:
+        per_page = 100
+
+    school = normalize_school(request.args.get('school'))
+    window = request.args.get('window')
+    start = (page - 1) * per_page
+    if window:
+        # Time window: merge the daily per-user buckets it covers
+        try:
+            window_start, window_end = window_range(window, request.args.get('from'), request.args.get('to'))
+        except ValueError as e:
+            return jsonify({'status': False, 'error': str(e)}), 400
+        if window in window_snapshots and not school:
+            leaderboard_entries, generated_at = window_snapshots[window].get()
+        else:
+            leaderboard_entries = compute_window_leaderboard(window_start, window_end, school)
+            generated_at = datetime.now().isoformat()
         total_items = len(leaderboard_entries)
-        total_pages = math.ceil(total_items / per_page) if total_items > 0 else 1
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated = leaderboard_entries[start:end]
-
-        return jsonify({
-            'status': True,
-            'leaderboard_preview': paginated,
-            'pagination': {
-                'total_items': total_items,
-                'total_pages': total_pages,
-                'current_page': page,
-                'per_page': per_page,
-                'has_next_page': page < total_pages,
-                'has_prev_page': page > 1
-            }
-        }), 200
-    except Exception as e:
-        return jsonify({'status': False, 'error': str(e)}), 500
-
+        paginated = leaderboard_entries[start:start + per_page]
+    elif school:
+        # One page straight from the school's pre-aggregated standings
+        paginated, total_items = school_leaderboard(school, skip=start, limit=per_page)
+        generated_at = datetime.now().isoformat()
+    else:
+        # Ranked entries come from the shared snapshot (short TTL, single-flight refresh)
+        leaderboard_entries, generated_at = leaderboard_snapshot.get()
+        total_items = len(leaderboard_entries)
+        paginated = leaderboard_entries[start:start + per_page]
+
+    total_pages = math.ceil(total_items / per_page) if total_items > 0 else 1
+
+    response = {
+        'status': True,
+        'leaderboard_preview': paginated,
+        'pagination': {
+            'total_items': total_items,
+            'total_pages': total_pages,
+            'current_page': page,
+            'per_page': per_page,
+            'has_next_page': page < total_pages,
+            'has_prev_page': page > 1
+        },
+        'generated_at': generated_at
+    }
+    if school:
+        response['school'] = school
+    if window:
+        response['window'] = {
+            'name': window,
+            'from': window_start.date().isoformat(),
+            'to': (window_end - timedelta(days=1)).date().isoformat()
+        }
+    return jsonify(response), 200
+
+
+@leaderboard_bp.route('/leaderboard/stream/token', methods=['POST'])
+@admin_required
+def leaderboard_stream_token():
+    """Short-lived token for opening /leaderboard/stream from EventSource (?access_token=)"""
+    return jsonify({
+        'status': True,
+        'token': generate_stream_token(request.current_user),
+        'expires_in': STREAM_TOKEN_TTL_SECONDS
+    }), 200
+
+
+@leaderboard_bp.route('/leaderboard/stream', methods=['GET'])
+@stream_admin_required
+def leaderboard_stream():
+    """
+    Server-Sent Events: a `snapshot` of the top N, then `rank_change` diffs
+    after submissions (at most one per interval), with heartbeat comments.
+    """
+    top = request.args.get('top', default=10, type=int)
+    top = max(1, min(top, 100))
+
+    subscriber = leaderboard_broadcaster.subscribe()
+    if subscriber is None:
+        return jsonify({'status': False, 'error': 'Too many live leaderboard viewers, please retry shortly'}), 503
 
+    try:
+        entries, generated_at = leaderboard_snapshot.get()
+    except Exception:
+        leaderboard_broadcaster.unsubscribe(subscriber)
+        raise
+
+    def events(view, generated_at):
+        try:
+            yield sse_event('snapshot', {'generated_at': generated_at, 'entries': view})
+            while True:
+                try:
+                    entries, generated_at = subscriber.get(timeout=LEADERBOARD_STREAM_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ': heartbeat\n\n'
+                    continue
+                changed, removed = diff_top(view, entries[:top])
+                view = entries[:top]
+                if changed or removed:
+                    yield sse_event('rank_change', {
+                        'generated_at': generated_at,
+                        'changed': changed,
+                        'removed': removed
+                    })
+        finally:
+            leaderboard_broadcaster.unsubscribe(subscriber)
+
+    response = Response(stream_with_context(events(entries[:top], generated_at)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
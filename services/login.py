@@ -2,98 +2,93 @@ from flask import Blueprint, request, jsonify
 from werkzeug.security import check_password_hash
 from config import db, ADMIN_USERNAME, ADMIN_PASSWORD
 from utils.auth import generate_token
+from utils.deadline import find_one
 
 login_bp = Blueprint('login', __name__)
 
 @login_bp.route('/login', methods=['POST'])
 def login():
-    try:
       
-        if db is None:
-            return jsonify({'status': False, 'error': 'Database connection failed'}), 500
+    data = request.get_json()
+    
+    # Validate required fields
+    if 'email' not in data or 'password' not in data:
+        return jsonify({'status': False, 'error': 'Email and password are required'}), 400
+    
+    email = data['email'].lower()
+    password = data['password']
+    
+    # Check for admin login first (allows username instead of email)
+    if email == ADMIN_USERNAME.lower():
+        # Verify admin password
+        if password != ADMIN_PASSWORD:
+            return jsonify({'status': False, 'error': 'Invalid username or password'}), 401
         
-        data = request.get_json()
-        
-        # Validate required fields
-        if 'email' not in data or 'password' not in data:
-            return jsonify({'status': False, 'error': 'Email and password are required'}), 400
-        
-        email = data['email'].lower()
-        password = data['password']
-        
-        # Check for admin login first (allows username instead of email)
-        if email == ADMIN_USERNAME.lower():
-            # Verify admin password
-            if password != ADMIN_PASSWORD:
-                return jsonify({'status': False, 'error': 'Invalid username or password'}), 401
-            
-            # Generate admin token
-            user_id = 'admin'
-            user_role = 'admin'
-            token = generate_token(
-                user_id, 
-                user_role,
-                name='Administrator',
-                email=ADMIN_USERNAME,
-                # phone='',
-                # school=''
-            )
-
-            return jsonify({
-                'status': True,
-                'message': 'Login successful',
-                'token': token,
-                'user': {
-                    'user_id': user_id,
-                    'name': 'Administrator',
-                    'username': ADMIN_USERNAME,
-                    'phone': '',
-                    'school': '',
-                    'role': 'admin'
-                }
-            }), 200
-        
-        # Basic email validation for regular users
-        if '@' not in email:
-            return jsonify({'status': False, 'error': 'Invalid email format'}), 400
-        
-        # Find user by email only (case-insensitive)
-        user = db.users.find_one({'email': email})
-        
-        if not user:
-            return jsonify({'status': False, 'error': 'Invalid email or password'}), 401
-        
-        # Verify password
-        if not check_password_hash(user['password'], password):
-            return jsonify({'status': False, 'error': 'Invalid email or password'}), 401
-        
-        # Generate JWT token with all user details
-        user_id = str(user['_id'])
-        user_role = user.get('role', 'user')  # Default to 'user' for regular users
+        # Generate admin token
+        user_id = 'admin'
+        user_role = 'admin'
         token = generate_token(
             user_id, 
             user_role,
-            name=user.get('name', ''),
-            email=user.get('email', ''),
-            phone=user.get('phone', ''),
-            school=user.get('school', '')
+            name='Administrator',
+            email=ADMIN_USERNAME,
+            # phone='',
+            # school=''
         )
-        
-        # Login successful
+
         return jsonify({
             'status': True,
             'message': 'Login successful',
             'token': token,
             'user': {
                 'user_id': user_id,
-                'name': user['name'],
-                'username': user['email'],  
-                'phone': user['phone'],
-                'school': user.get('school', ''),
-                'role': user_role
+                'name': 'Administrator',
+                'username': ADMIN_USERNAME,
+                'phone': '',
+                'school': '',
+                'role': 'admin'
             }
         }), 200
-        
-    except Exception as e:
-        return jsonify({'status': False, 'error': str(e)}), 500
+    
+    # Basic email validation for regular users
+    if '@' not in email:
+        return jsonify({'status': False, 'error': 'Invalid email format'}), 400
+    
+    # Find user by email only (case-insensitive)
+    user = find_one(db.users, {'email': email})
+    
+    if not user:
+        return jsonify({'status': False, 'error': 'Invalid email or password'}), 401
+    
+    # Verify password
+    if not check_password_hash(user['password'], password):
+        return jsonify({'status': False, 'error': 'Invalid email or password'}), 401
+    
+    # Generate JWT token (compact claims or all user details, see JWT_COMPACT_CLAIMS)
+    user_id = str(user['_id'])
+    user_role = user.get('role', 'user')  # Default to 'user' for regular users
+    token = generate_token(
+        user_id, 
+        user_role,
+        name=user.get('name', ''),
+        email=user.get('email', ''),
+        phone=user.get('phone', ''),
+        school=user.get('school', ''),
+        profile_version=user.get('profile_version', 1)
+    )
+    
+    # Login successful
+    return jsonify({
+        'status': True,
+        'message': 'Login successful',
+        'token': token,
+        'user': {
+            'user_id': user_id,
+            'name': user['name'],
+            'username': user['email'],  
+            'phone': user['phone'],
+            'school': user.get('school', ''),
+            'role': user_role
+        }
+    }), 200
 
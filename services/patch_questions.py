@@ -0,0 +1,71 @@
+from flask import Blueprint, request, jsonify
+from datetime import datetime
+from bson import ObjectId
+from utils.auth import admin_required
+from utils.counters import increment_quiz_counters
+from utils.quiz_cache import invalidate_quiz
+from utils.profiles import current_profile
+from utils.questions import QuestionPatchError, apply_question_patch, build_question, public_question
+from utils.validation import json_body, question_patch_errors, validation_error_response
+
+patch_questions_bp = Blueprint('patch_questions', __name__)
+
+
+@patch_questions_bp.route('/quiz/<quiz_id>/questions', methods=['PATCH'])
+@admin_required
+def patch_questions(quiz_id):
+    """
+    Delta edits of a quiz's questions without shipping the questions array:
+    - remove: [question_id, ...]
+    - update: [{question_id, question?, options?, correct_answer?}]
+    - add: [{question, options, correct_answer, question_id?}]
+    The whole patch is validated first, then written as one targeted update
+    guarded by its preconditions: it applies completely or not at all.
+    """
+    if not ObjectId.is_valid(quiz_id):
+        return jsonify({'status': False, 'error': 'Invalid quiz ID'}), 400
+
+    # Whole body checked before touching the database; every error is reported
+    data, errors = json_body(request)
+    if not errors:
+        errors = question_patch_errors(data)
+    if errors:
+        return validation_error_response(errors)
+
+    remove_ids = data.get('remove', [])
+    updates = data.get('update', [])
+    update_ids = [u['question_id'] for u in updates]
+    new_questions = [build_question(question_data) for question_data in data.get('add', [])]
+
+    admin_user = current_profile(request.current_user)
+    update_fields = {
+        'updated_at': datetime.now().isoformat(),
+        'updated_by': admin_user.get('name') or 'Administrator'
+    }
+    try:
+        quiz = apply_question_patch(
+            quiz_id, remove_ids, updates, new_questions,
+            set_fields=update_fields, projection={'title': 1, 'total_questions': 1}
+        )
+    except QuestionPatchError as e:
+        return jsonify({'status': False, 'error': str(e)}), e.status_code
+
+    invalidate_quiz(quiz_id)
+    question_delta = len(new_questions) - len(remove_ids)
+    if question_delta:
+        increment_quiz_counters(questions=question_delta)
+
+    return jsonify({
+        'status': True,
+        'message': 'Quiz questions updated successfully',
+        'data': {
+            'quiz_id': quiz_id,
+            'title': quiz.get('title'),
+            'total_questions': quiz.get('total_questions'),
+            'updated_by': update_fields['updated_by'],
+            'updated_at': update_fields['updated_at'],
+            'removed': remove_ids,
+            'updated': update_ids,
+            'added': [public_question(question) for question in new_questions]
+        }
+    }), 200
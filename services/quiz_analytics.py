@@ -0,0 +1,100 @@
+from flask import Blueprint, request, jsonify
+from bson import ObjectId
+from config import db
+from utils.auth import admin_required
+from utils.distribution import DEFAULT_BINS, MAX_BINS, get_distribution
+from utils.questions import iter_quiz_questions
+from utils.quiz_cache import get_cached_quiz
+from utils.deadline import find, find_one
+
+quiz_analytics_bp = Blueprint('quiz_analytics', __name__)
+
+
+@quiz_analytics_bp.route('/quiz/<quiz_id>/analytics', methods=['GET'])
+@admin_required
+def get_quiz_analytics(quiz_id):
+    """
+    Item difficulty per question: percent correct and distribution of chosen options.
+    Reads the pre-aggregated question_stats counters (one document per question).
+    """
+    if not ObjectId.is_valid(quiz_id):
+        return jsonify({'status': False, 'error': 'Invalid quiz ID'}), 400
+
+    quiz = find_one(db.quizzes, {'_id': ObjectId(quiz_id)}, {'title': 1, 'questions': 1, 'question_storage': 1})
+    if not quiz:
+        return jsonify({'status': False, 'error': 'Quiz not found'}), 404
+
+    stats_by_question = {}
+    for stats in find(db.question_stats, {'quiz_id': quiz_id}):
+        stats_by_question[stats['question_id']] = stats
+
+    questions = []
+    for question in iter_quiz_questions(quiz):
+        question_id = question.get('question_id')
+        stats = stats_by_question.get(question_id, {})
+        attempts = stats.get('attempts', 0)
+        answered = stats.get('answered', 0)
+        correct = stats.get('correct', 0)
+        option_counts = stats.get('option_counts', {})
+
+        options = []
+        for idx, option in enumerate(question.get('options', [])):
+            picks = option_counts.get(str(idx), 0)
+            options.append({
+                'option': option,
+                'picks': picks,
+                'pick_percentage': round(picks / answered * 100, 2) if answered > 0 else 0,
+                'is_correct': option == question.get('correct_answer')
+            })
+
+        questions.append({
+            'question_id': question_id,
+            'question': question.get('question', ''),
+            'attempts': attempts,
+            'answered': answered,
+            'unanswered': attempts - answered,
+            'correct': correct,
+            'percent_correct': round(correct / attempts * 100, 2) if attempts > 0 else 0,
+            'other_answers': stats.get('other_answers', 0),
+            'options': options
+        })
+
+    return jsonify({
+        'status': True,
+        'quiz_id': quiz_id,
+        'quiz_title': quiz.get('title', 'Unknown Quiz'),
+        'questions': questions
+    }), 200
+
+
+@quiz_analytics_bp.route('/quiz/<quiz_id>/distribution', methods=['GET'])
+@admin_required
+def get_quiz_distribution(quiz_id):
+    """
+    Score and time distribution over every attempt of the quiz: mean, stddev,
+    percentiles and equal-width histograms (?bins=, default 10).
+    Cached per quiz revision and result count.
+    """
+    if not ObjectId.is_valid(quiz_id):
+        return jsonify({'status': False, 'error': 'Invalid quiz ID'}), 400
+
+    try:
+        bins = int(request.args.get('bins', DEFAULT_BINS))
+    except ValueError:
+        bins = 0
+    if not 1 <= bins <= MAX_BINS:
+        return jsonify({'status': False, 'error': f'bins must be an integer between 1 and {MAX_BINS}'}), 400
+
+    quiz = get_cached_quiz(quiz_id)
+    if not quiz:
+        return jsonify({'status': False, 'error': 'Quiz not found'}), 404
+
+    distribution = get_distribution(quiz, bins)
+
+    return jsonify(dict(
+        distribution,
+        status=True,
+        quiz_id=quiz_id,
+        quiz_title=quiz.get('title', 'Unknown Quiz'),
+        revision=quiz.get('revision', 0)
+    )), 200
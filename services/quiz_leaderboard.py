@@ -0,0 +1,80 @@
+from flask import Blueprint, request, jsonify
+from bson import ObjectId
+from config import db
+from utils.auth import token_required
+from utils.results import format_timestamp
+import math
+from utils.standings import quiz_leaderboard, quiz_rank
+from utils.deadline import find_one
+
+quiz_leaderboard_bp = Blueprint('quiz_leaderboard', __name__)
+
+
+@quiz_leaderboard_bp.route('/quiz/<quiz_id>/leaderboard', methods=['GET'])
+@token_required
+def get_quiz_leaderboard(quiz_id):
+    """
+    Per-quiz standings using each user's best attempt.
+    A page is one indexed read of quiz_best_results (quiz_rank index); ties
+    are broken by user id, in the list and in my_rank alike.
+    """
+    if not ObjectId.is_valid(quiz_id):
+        return jsonify({'status': False, 'error': 'Invalid quiz ID'}), 400
+
+    quiz = find_one(db.quizzes, {'_id': ObjectId(quiz_id)}, {'title': 1})
+    if not quiz:
+        return jsonify({'status': False, 'error': 'Quiz not found'}), 404
+
+    page = request.args.get('page', default=1, type=int)
+    per_page = request.args.get('limit', default=10, type=int)
+    if page < 1:
+        page = 1
+    if per_page < 1:
+        per_page = 10
+    if per_page > 100:
+        per_page = 100
+    skip = (page - 1) * per_page
+
+    bests, total_items = quiz_leaderboard(quiz_id, skip, per_page)
+
+    entries = []
+    for index, best in enumerate(bests, start=skip + 1):
+        entries.append({
+            'rank': index,
+            'user_id': best['user_id'],
+            'name': best.get('username') or 'Unknown User',
+            'correct_answers': best.get('correct_answers', 0),
+            'total_questions': best.get('total_questions', 0),
+            'time_taken': round(best.get('time_taken', 0), 2),
+            'attempts': best.get('attempts', 0),
+            'submitted_at': format_timestamp(best.get('submitted_at'))
+        })
+
+    # Caller's rank: users whose best attempt is ahead of the caller's, plus one
+    my_rank = None
+    mine = quiz_rank(quiz_id, request.current_user.get('user_id'))
+    if mine:
+        rank, my_best = mine
+        my_rank = {
+            'rank': rank,
+            'correct_answers': my_best.get('correct_answers', 0),
+            'time_taken': round(my_best.get('time_taken', 0), 2)
+        }
+
+    total_pages = math.ceil(total_items / per_page) if total_items > 0 else 1
+
+    return jsonify({
+        'status': True,
+        'quiz_id': quiz_id,
+        'quiz_title': quiz.get('title', 'Unknown Quiz'),
+        'leaderboard': entries,
+        'my_rank': my_rank,
+        'pagination': {
+            'total_items': total_items,
+            'total_pages': total_pages,
+            'current_page': page,
+            'per_page': per_page,
+            'has_next_page': page < total_pages,
+            'has_prev_page': page > 1
+        }
+    }), 200
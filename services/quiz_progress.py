@@ -0,0 +1,59 @@
+from flask import Blueprint, request, jsonify
+from bson import ObjectId
+from utils.auth import token_required
+from utils.progress import progress_buffer
+from utils.quiz_cache import get_current_quiz
+from utils.validation import json_body, answer_errors, validation_error_response
+
+quiz_progress_bp = Blueprint('quiz_progress', __name__)
+
+MAX_PROGRESS_ITEMS = 1000
+
+
+@quiz_progress_bp.route('/quiz/<quiz_id>/progress', methods=['PUT'])
+@token_required
+def save_progress(quiz_id):
+    """Autosave partial answers; buffered in memory and flushed to MongoDB in bulk"""
+    if not ObjectId.is_valid(quiz_id):
+        return jsonify({'status': False, 'error': 'Invalid quiz ID'}), 400
+
+    data, errors = json_body(request)
+    if not errors:
+        errors = answer_errors(data, max_items=MAX_PROGRESS_ITEMS)
+    if errors:
+        return validation_error_response(errors)
+
+    if get_current_quiz(quiz_id) is None:
+        return jsonify({'status': False, 'error': 'Quiz not found'}), 404
+
+    answers = {}
+    for question_item in data['questions']:
+        answer = question_item.get('answer')
+        answers[question_item['question_id']] = {
+            'answer': '' if answer is None else str(answer),
+            'answered': question_item.get('answered', True),
+            'time_taken': question_item.get('time_taken', 0)
+        }
+
+    user_id = request.current_user.get('user_id')
+    progress_buffer.record(quiz_id, user_id, answers)
+
+    return jsonify({'status': True, 'message': 'Progress saved', 'saved_questions': len(answers)}), 200
+
+
+@quiz_progress_bp.route('/quiz/<quiz_id>/progress', methods=['GET'])
+@token_required
+def get_progress(quiz_id):
+    """Saved answers of the caller's current attempt (e.g. to resume after a crash)"""
+    if not ObjectId.is_valid(quiz_id):
+        return jsonify({'status': False, 'error': 'Invalid quiz ID'}), 400
+
+    user_id = request.current_user.get('user_id')
+    answers, updated_at = progress_buffer.load(quiz_id, user_id)
+
+    return jsonify({
+        'status': True,
+        'quiz_id': quiz_id,
+        'questions': [dict(saved, question_id=question_id) for question_id, saved in answers.items()],
+        'updated_at': updated_at.isoformat() if updated_at else None
+    }), 200
@@ -1,119 +1,183 @@
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
 from datetime import datetime
-from config import db
+from pymongo.errors import DuplicateKeyError
+from config import db, COMPACT_QUIZ_RESULTS
 from utils.auth import token_required
+from utils.idempotency import idempotency_key, replay_response, remember_response, submit_response, key_conflict
+from utils.leaderboard_stream import leaderboard_broadcaster
+from utils.question_stats import record_question_stats
+from utils.profiles import current_profile
+from utils.progress import progress_buffer
+from utils.questions import iter_quiz_questions
+from utils.quiz_cache import get_current_quiz
+from utils.results import can_compact, compact_result_fields
+from utils.standings import record_quiz_best, record_standing
+from utils.validation import json_body, answer_errors, validation_error_response
 
 submit_quiz_bp = Blueprint('submit_quiz', __name__)
 
 @submit_quiz_bp.route('/quiz/<quiz_id>/submit', methods=['POST'])
 @token_required
 def submit_quiz(quiz_id):
+    # Validate ObjectId
+    if not ObjectId.is_valid(quiz_id):
+        return jsonify({'status': False, 'error': 'Invalid quiz ID'}), 400
+    
+    # Malformed bodies are rejected before any cache or database access.
+    # questions may be omitted when autosaved progress supplies the answers.
+    data, errors = json_body(request, required=False)
+    if not errors:
+        errors = answer_errors(data, required=False)
     try:
-        # Check if database is connected
-        if db is None:
-            return jsonify({'status': False, 'error': 'Database connection failed'}), 500
-        
-        # Validate ObjectId
-        if not ObjectId.is_valid(quiz_id):
-            return jsonify({'status': False, 'error': 'Invalid quiz ID'}), 400
-        
-        # Get quiz from database
-        quiz = db.quizzes.find_one({'_id': ObjectId(quiz_id)})
-        
-        if not quiz:
-            return jsonify({'status': False, 'error': 'Quiz not found'}), 404
-        
-        data = request.get_json()
-        
-        # Validate questions format with question_id
-        if 'questions' not in data or not isinstance(data['questions'], list):
-            return jsonify({'status': False, 'error': 'Questions must be provided as an array'}), 400
-        
-        questions_data = data['questions']
-        user_id = request.current_user.get('user_id')  # Get from token
-        
-        # Get username from database
-        user = db.users.find_one({'_id': ObjectId(user_id)})
-        username = user.get('name', '') if user else ''
-        
-        # Create a dictionary to map question_id to user answers and calculate total time
-        user_answers_dict = {}
-        time_taken = 0
-        total_answered_questions = 0
-        
-        for question_item in questions_data:
-            if 'question_id' in question_item:
-                question_id = question_item['question_id']
-                answer = question_item.get('answer', '')
-                answered = question_item.get('answered', True)  # Default to True if not provided
-                question_time = question_item.get('time_taken', 0)
-                
-                # Add up individual question times
-                if isinstance(question_time, (int, float)) and question_time > 0:
-                    time_taken += question_time
-                
-                # Count answered questions and store answers
-                if answered:
-                    total_answered_questions += 1
-                    if answer:
-                        user_answers_dict[question_id] = answer
-        
-        # Score the quiz
-        correct_count = 0
-        total_questions = len(quiz['questions'])
-        questions_with_answers = []
-        
-        # Process each question from the quiz
-        for question in quiz['questions']:
-            question_id = question.get('question_id')
-            user_answer = user_answers_dict.get(question_id) if question_id else None
-            
-            # Compare answers case-insensitively
-            is_correct = False
-            if user_answer is not None:
-                is_correct = str(user_answer).strip().lower() == str(question['correct_answer']).strip().lower()
+        attempt_key = idempotency_key(request, data)
+    except ValueError as e:
+        errors.append(str(e))
+    if errors:
+        return validation_error_response(errors)
+    
+    user_id = request.current_user.get('user_id')  # Get from token
+    
+    # Retries of an attempt that is already stored replay its response
+    # (no grading, no writes)
+    if attempt_key:
+        replay = replay_response(user_id, attempt_key)
+        if replay is not None:
+            return _replayed(quiz_id, *replay)
+    
+    # Cached quiz, checked against the stored revision so an edit made on
+    # another worker never grades with a stale answer key
+    quiz = get_current_quiz(quiz_id)
+    
+    if not quiz:
+        return jsonify({'status': False, 'error': 'Quiz not found'}), 404
+    
+    # Answers autosaved with PUT /quiz/<quiz_id>/progress; answers in the body win
+    saved_answers, _ = progress_buffer.load(quiz_id, user_id)
+    
+    # Answers are required unless autosaved progress supplies them
+    questions_data = (data or {}).get('questions', [] if saved_answers else None)
+    if questions_data is None:
+        return jsonify({'status': False, 'error': 'Questions must be provided as an array'}), 400
+    
+    if saved_answers:
+        submitted_ids = {item['question_id'] for item in questions_data}
+        questions_data = [
+            dict(saved, question_id=question_id)
+            for question_id, saved in saved_answers.items() if question_id not in submitted_ids
+        ] + questions_data
+    
+    # Username and school from the token or the profile cache (no per-submit user lookup)
+    profile = current_profile(request.current_user)
+    username = profile.get('name', '')
+    
+    # Create a dictionary to map question_id to user answers and calculate total time
+    user_answers_dict = {}
+    time_taken = 0
+    total_answered_questions = 0
+    
+    for question_item in questions_data:
+        if 'question_id' in question_item:
+            question_id = question_item['question_id']
+            answer = question_item.get('answer', '')
+            answered = question_item.get('answered', True)  # Default to True if not provided
+            question_time = question_item.get('time_taken', 0)
             
-            if is_correct:
-                correct_count += 1
+            # Add up individual question times
+            if isinstance(question_time, (int, float)) and question_time > 0:
+                time_taken += question_time
             
-            # Prepare question with user's answer and correctness
-            question_response = {
-                'question_id': question_id,
-                'options': question['options'],
-                'correct_answer': question['correct_answer'],
-                'user_answer': user_answer if user_answer is not None else '',
-                'is_correct': is_correct
-            }
-            questions_with_answers.append(question_response)
+            # Count answered questions and store answers
+            if answered:
+                total_answered_questions += 1
+                if answer:
+                    user_answers_dict[question_id] = answer
+    
+    # Score the quiz
+    correct_count = 0
+    questions_with_answers = []
+    
+    # Process each question from the quiz (paged quizzes stream the answer key)
+    answer_key = iter_quiz_questions(quiz, ['question_id', 'options', 'correct_answer'])
+    for question in answer_key:
+        question_id = question.get('question_id')
+        user_answer = user_answers_dict.get(question_id) if question_id else None
         
-        # Store result
-        result_doc = {
-            'quiz_id': quiz_id,
-            'user_id': user_id,
-            'username': username,
-            'correct_answers': correct_count,
-            'total_questions': total_questions,
-            'time_taken': time_taken,
-            'questions': questions_with_answers,
-            'submitted_at': datetime.now().isoformat()
-        }
-        
-        db.quiz_results.insert_one(result_doc)
+        # Compare answers case-insensitively
+        is_correct = False
+        if user_answer is not None:
+            is_correct = str(user_answer).strip().lower() == str(question['correct_answer']).strip().lower()
         
-        return jsonify({
-            'status': True,
-            'message': 'Quiz submitted successfully',
-            'result': {
-                'correct_answers': correct_count,
-                'total_questions': total_questions,
-                'total_answered_questions': total_answered_questions,
-                'time_taken': time_taken
-            },
-            'total_time_taken': time_taken,
-            'questions': questions_with_answers
-        }), 200
+        if is_correct:
+            correct_count += 1
         
-    except Exception as e:
-        return jsonify({'status': False, 'error': str(e)}), 500
+        # Prepare question with user's answer and correctness
+        question_response = {
+            'question_id': question_id,
+            'options': question['options'],
+            'correct_answer': question['correct_answer'],
+            'user_answer': user_answer if user_answer is not None else '',
+            'is_correct': is_correct
+        }
+        questions_with_answers.append(question_response)
+    total_questions = len(questions_with_answers)
+    
+    # Store result (submitted_at as a native date: indexed, range-filterable)
+    submitted_at = datetime.now()
+    result_doc = {
+        'quiz_id': quiz_id,
+        'user_id': user_id,
+        'username': username,
+        'correct_answers': correct_count,
+        'total_questions': total_questions,
+        'time_taken': time_taken,
+        'total_answered_questions': total_answered_questions,
+        'submitted_at': submitted_at
+    }
+    if attempt_key:
+        # Unique per user (index user_idempotency_key)
+        result_doc['idempotency_key'] = attempt_key
+    if COMPACT_QUIZ_RESULTS and can_compact(questions_with_answers):
+        # Option indices + correctness bitmap against the archived answer key of this revision
+        result_doc.update(compact_result_fields(quiz_id, quiz.get('revision', 0), questions_with_answers))
+    else:
+        result_doc['questions'] = questions_with_answers
+    
+    try:
+        db.quiz_results.insert_one(result_doc)
+    except DuplicateKeyError:
+        # A concurrent retry of this attempt was stored first
+        replay = replay_response(user_id, attempt_key) if attempt_key else None
+        if replay is None:
+            raise
+        return _replayed(quiz_id, *replay)
+    
+    # The attempt is stored; its autosaved progress is no longer needed
+    progress_buffer.discard(quiz_id, user_id, submitted_at)
+    
+    # Per-question analytics counters (attempts, correct, option picks)
+    record_question_stats(quiz_id, questions_with_answers)
+    
+    # Pre-aggregated per-user standing and daily bucket (school and time-window leaderboards)
+    record_standing(user_id, profile.get('school'), correct_count, total_questions, time_taken, submitted_at,
+                    result_id=result_doc['_id'])
+    
+    # The user's best attempt on this quiz (per-quiz leaderboard)
+    record_quiz_best(quiz_id, user_id, username, correct_count, total_questions, time_taken, submitted_at)
+    
+    # Live leaderboard viewers get the new ranking on the next tick
+    leaderboard_broadcaster.notify()
+    
+    payload = submit_response(result_doc, questions_with_answers)
+    if attempt_key:
+        remember_response(user_id, attempt_key, quiz_id, payload)
+    return jsonify(payload), 200
+
 
+def _replayed(quiz_id, stored_quiz_id, payload):
+    """Response for a retried attempt (422 if its key belongs to another quiz)"""
+    if key_conflict(quiz_id, stored_quiz_id):
+        return jsonify({'status': False, 'error': 'Idempotency-Key was already used for a different quiz'}), 422
+    response = jsonify(payload)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response, 200
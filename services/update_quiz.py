@@ -1,127 +1,89 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 from config import db
 from utils.auth import admin_required
+from utils.counters import increment_quiz_counters
+from utils.profiles import current_profile
+from utils.quiz_cache import invalidate_quiz
+from utils.questions import build_question, public_question, push_questions, find_missing_question_ids, is_paged
+from utils.validation import json_body, quiz_update_errors, validation_error_response
 
 update_quiz_bp = Blueprint('update_quiz', __name__)
 
 @update_quiz_bp.route('/quiz/<quiz_id>', methods=['PUT'])
 @admin_required
 def update_quiz(quiz_id):
-    try:
 
-        if db is None:
-            return jsonify({'status': False, 'error': 'Database connection failed'}), 500
-        
-        # Validate ObjectId
-        if not ObjectId.is_valid(quiz_id):
-            return jsonify({'status': False, 'error': 'Invalid quiz ID'}), 400
-        
-        # Check if quiz exists
-        existing_quiz = db.quizzes.find_one({'_id': ObjectId(quiz_id)})
-        if not existing_quiz:
-            return jsonify({'status': False, 'error': 'Quiz not found'}), 404
-        
-        data = request.get_json()
-        
-        # Get admin user info from token
-        admin_user = request.current_user
-        
-        # Build update document - only update fields that are provided
-        update_fields = {}
-        
-        if 'title' in data:
-            if not data['title']:
-                return jsonify({'status': False, 'error': 'title cannot be empty'}), 400
-            update_fields['title'] = data['title']
-        
-        if 'questions' in data:
-            new_questions = data['questions']
-            
-            # Validate questions if provided
-            if not isinstance(new_questions, list) or len(new_questions) == 0:
-                return jsonify({'status': False, 'error': 'Questions must be a non-empty array'}), 400
-            
-            # Get existing questions from the quiz
-            existing_questions = existing_quiz.get('questions', [])
-            
-            # Validate and add new questions
-            for idx, question_data in enumerate(new_questions):
-                # Validate required fields
-                if 'question' not in question_data or not question_data['question']:
-                    return jsonify({'status': False, 'error': f'Question {idx + 1} must have question field'}), 400
-                
-                if 'options' not in question_data or not isinstance(question_data['options'], list) or len(question_data['options']) < 2:
-                    return jsonify({'status': False, 'error': f'Question {idx + 1} must have at least 2 options'}), 400
-                
-                if 'correct_answer' not in question_data or question_data['correct_answer'] not in question_data['options']:
-                    return jsonify({'status': False, 'error': f'Question {idx + 1} must have a correct_answer that matches one of the options'}), 400
-                
-                # Add question_id - use provided one or auto-generate
-                question_id = question_data.get('question_id')
-                if not question_id:
-                    question_id = str(ObjectId())
-                
-                # Create new question object
-                new_question = {
-                    'question_id': question_id,
-                    'question': question_data['question'],
-                    'options': question_data['options'],
-                    'correct_answer': question_data['correct_answer']
-                }
-                
-                # Append to existing questions
-                existing_questions.append(new_question)
-            
-            update_fields['questions'] = existing_questions
-            update_fields['total_questions'] = len(existing_questions)
-        
-        # If no fields to update, return error
-        if not update_fields:
-            return jsonify({'status': False, 'error': 'No fields provided for update'}), 400
-        
-        # Add updated timestamp
-        update_fields['updated_at'] = datetime.now().isoformat()
-        update_fields['updated_by'] = admin_user.get('name', 'Administrator')
-        
-        # Update the quiz
-        result = db.quizzes.update_one(
+    # Validate ObjectId
+    if not ObjectId.is_valid(quiz_id):
+        return jsonify({'status': False, 'error': 'Invalid quiz ID'}), 400
+    
+    data, errors = json_body(request)
+    if not errors:
+        errors = quiz_update_errors(data)
+    if errors:
+        return validation_error_response(errors)
+    
+    # Get admin user info from token
+    admin_user = current_profile(request.current_user)
+    
+    # Build update document - only update fields that are provided
+    update_fields = {}
+    if 'title' in data:
+        update_fields['title'] = data['title']
+    
+    # New questions (question_id provided or auto-generated)
+    new_questions = [build_question(question_data) for question_data in data.get('questions', [])]
+    
+    # Add updated timestamp
+    update_fields['updated_at'] = datetime.now().isoformat()
+    update_fields['updated_by'] = admin_user.get('name') or 'Administrator'
+    
+    # One atomic round trip: $set metadata, $push new questions, and get
+    # the updated quiz back without correct answers
+    projection = {'questions.correct_answer': 0}
+    if new_questions:
+        updated_quiz = push_questions(quiz_id, new_questions, set_fields=update_fields, projection=projection)
+    else:
+        updated_quiz = db.quizzes.find_one_and_update(
             {'_id': ObjectId(quiz_id)},
-            {'$set': update_fields}
+            {'$set': update_fields},
+            projection=projection,
+            return_document=ReturnDocument.AFTER
         )
-        
-        if result.modified_count == 0:
-            return jsonify({'status': False, 'error': 'No changes were made to the quiz'}), 400
-        
-        # Fetch the updated quiz
-        updated_quiz = db.quizzes.find_one({'_id': ObjectId(quiz_id)})
-        
-        # Prepare questions response (without correct_answer for security)
-        questions_response = []
-        for question in updated_quiz['questions']:
-            question_item = {
-                'question_id': question['question_id'],
-                'question': question['question'],
-                'options': question['options']
-            }
-            questions_response.append(question_item)
-        
-        return jsonify({
-            'status': True,
-            'message': 'Quiz updated successfully',
-            'data': {
-                'quiz_id': str(updated_quiz['_id']),
-                'title': updated_quiz['title'],
-                'total_questions': updated_quiz.get('total_questions', len(updated_quiz['questions'])),
-                'created_by': updated_quiz.get('created_by', 'Administrator'),
-                'created_at': updated_quiz.get('created_at'),
-                'updated_by': update_fields.get('updated_by'),
-                'updated_at': update_fields.get('updated_at'),
-                'questions': questions_response
-            }
-        }), 200
-        
-    except Exception as e:
-        return jsonify({'status': False, 'error': str(e)}), 500
+    
+    if updated_quiz is None:
+        diagnosis = find_missing_question_ids(quiz_id, [])
+        if diagnosis is None:
+            return jsonify({'status': False, 'error': 'Quiz not found'}), 404
+        return jsonify({'status': False, 'error': 'A question with the provided question_id already exists in the quiz'}), 409
+    
+    invalidate_quiz(quiz_id)
+    
+    if new_questions:
+        increment_quiz_counters(questions=len(new_questions))
+    
+    # Prepare questions response (without correct_answer for security).
+    # Paged quizzes only echo the appended questions; use GET /quiz/<quiz_id>/questions for the rest.
+    if is_paged(updated_quiz):
+        questions_response = [public_question(question) for question in new_questions]
+    else:
+        questions_response = [public_question(question) for question in updated_quiz.get('questions', [])]
+    
+    return jsonify({
+        'status': True,
+        'message': 'Quiz updated successfully',
+        'data': {
+            'quiz_id': str(updated_quiz['_id']),
+            'title': updated_quiz['title'],
+            'total_questions': updated_quiz.get('total_questions', len(questions_response)),
+            'created_by': updated_quiz.get('created_by', 'Administrator'),
+            'created_at': updated_quiz.get('created_at'),
+            'updated_by': update_fields.get('updated_by'),
+            'updated_at': update_fields.get('updated_at'),
+            'questions': questions_response
+        }
+    }), 200
 
@@ -0,0 +1,20 @@
+"""Startup smoke tests: the app builds without MongoDB and stays within the import-time budget."""
+import os
+
+# config reads these at import time; never let the tests reach a real database
+os.environ.setdefault('MONGO_URI', 'mongodb://127.0.0.1:1')
+os.environ.setdefault('JWT_SECRET_KEY', 'startup-test')
+
+from run_services import create_app  # noqa: E402
+from jobs.check_import_time import run_checks  # noqa: E402
+
+
+def test_health_live():
+    app = create_app({'TESTING': True, 'WARM_UP': False, 'SCHEDULER': False})
+    response = app.test_client().get('/health/live')
+    assert response.status_code == 200
+    assert response.get_json() == {'status': 'alive'}
+
+
+def test_import_time_check():
+    assert run_checks()
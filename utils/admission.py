@@ -0,0 +1,186 @@
+import heapq
+import itertools
+import threading
+import time
+from flask import request, g, jsonify
+from config import (
+    ADMISSION_ENABLED, ADMISSION_MAX_CONCURRENT, ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT_SECONDS, ADMISSION_RETRY_AFTER_SECONDS
+)
+from utils.deadline import get_deadline
+
+# Lower value = served first and shed last
+PRIORITY_CRITICAL = 0   # taking and submitting quizzes
+PRIORITY_NORMAL = 1     # quiz CRUD, auth and everything not listed
+PRIORITY_ANALYTICS = 2  # dashboards and rankings
+PRIORITY_EXPORT = 3     # bulk exports and imports
+
+PRIORITY_NAMES = {
+    PRIORITY_CRITICAL: 'critical',
+    PRIORITY_NORMAL: 'normal',
+    PRIORITY_ANALYTICS: 'analytics',
+    PRIORITY_EXPORT: 'export'
+}
+
+# Priority per blueprint name
+ROUTE_PRIORITIES = {
+    'submit_quiz': PRIORITY_CRITICAL,
+    'quiz_progress': PRIORITY_CRITICAL,
+    'get_quiz': PRIORITY_CRITICAL,
+    'get_quiz_questions': PRIORITY_CRITICAL,
+    'login': PRIORITY_CRITICAL,
+    'dashboard': PRIORITY_ANALYTICS,
+    'leaderboard': PRIORITY_ANALYTICS,
+    'quiz_leaderboard': PRIORITY_ANALYTICS,
+    'quiz_analytics': PRIORITY_ANALYTICS,
+    'quiz_info': PRIORITY_ANALYTICS,
+    'get_users': PRIORITY_ANALYTICS,
+    'export': PRIORITY_EXPORT,
+    'import_quizzes': PRIORITY_EXPORT,
+}
+
+# Endpoints that never wait for a slot (probes and long-lived streams)
+EXEMPT_ENDPOINTS = {'health_check', 'health_live', 'health_ready', 'health_stats_endpoint', 'static', 'leaderboard.leaderboard_stream'}
+
+
+class _Ticket:
+    __slots__ = ('priority', 'deadline', 'state')
+
+    def __init__(self, priority, deadline):
+        self.priority = priority
+        self.deadline = deadline
+        self.state = 'waiting'  # waiting -> admitted | shed
+
+
+class AdmissionController:
+    """
+    Per-process concurrency limiter with a bounded priority wait queue.
+    - At most max_concurrent requests run at once.
+    - Others wait in priority order (then arrival) for up to queue_timeout seconds.
+    - When the queue is full, a newcomer evicts the lowest-priority waiter if it
+      outranks it; otherwise the newcomer is shed.
+    """
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queue = []  # heap of (priority, seq, ticket)
+        self._seq = itertools.count()
+        self.stats = {
+            'admitted': 0,
+            'queued': 0,
+            'shed_queue_full': 0,
+            'shed_timeout': 0,
+            'shed_evicted': 0,
+            'max_queue_depth': 0,
+            'shed_by_priority': {name: 0 for name in PRIORITY_NAMES.values()}
+        }
+
+    def acquire(self, priority, deadline=None):
+        """Block until admitted (True) or shed (False); never wait past deadline"""
+        with self._cond:
+            if self._active < self.max_concurrent and not self._queue:
+                self._active += 1
+                self.stats['admitted'] += 1
+                return True
+
+            if len(self._queue) >= self.max_queue and not self._evict_for(priority):
+                self._shed(priority, 'shed_queue_full')
+                return False
+
+            wait_until = time.monotonic() + self.queue_timeout
+            if deadline is not None:
+                wait_until = min(wait_until, deadline)
+            ticket = _Ticket(priority, wait_until)
+            heapq.heappush(self._queue, (priority, next(self._seq), ticket))
+            self.stats['queued'] += 1
+            self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], len(self._queue))
+
+            while True:
+                if ticket.state == 'shed':
+                    return False
+                if self._active < self.max_concurrent and self._queue[0][2] is ticket:
+                    heapq.heappop(self._queue)
+                    ticket.state = 'admitted'
+                    self._active += 1
+                    self.stats['admitted'] += 1
+                    # The next waiter may also fit
+                    self._cond.notify_all()
+                    return True
+                remaining = ticket.deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remove(ticket)
+                    self._shed(priority, 'shed_timeout')
+                    return False
+                self._cond.wait(remaining)
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def snapshot(self):
+        """Current queue depth, in-flight count and shed counters"""
+        with self._cond:
+            data = dict(self.stats)
+            data['shed_by_priority'] = dict(self.stats['shed_by_priority'])
+            data['active'] = self._active
+            data['queue_depth'] = len(self._queue)
+            data['max_concurrent'] = self.max_concurrent
+            data['max_queue'] = self.max_queue
+            return data
+
+    def _evict_for(self, priority):
+        """Drop the lowest-priority (latest) waiter if the newcomer outranks it"""
+        worst = max(self._queue, key=lambda item: (item[0], item[1]))
+        if worst[0] <= priority:
+            return False
+        self._remove(worst[2])
+        worst[2].state = 'shed'
+        self._shed(worst[0], 'shed_evicted')
+        self._cond.notify_all()
+        return True
+
+    def _remove(self, ticket):
+        self._queue = [item for item in self._queue if item[2] is not ticket]
+        heapq.heapify(self._queue)
+
+    def _shed(self, priority, reason):
+        self.stats[reason] += 1
+        self.stats['shed_by_priority'][PRIORITY_NAMES.get(priority, str(priority))] += 1
+
+
+admission = AdmissionController(
+    ADMISSION_MAX_CONCURRENT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT_SECONDS
+)
+
+
+def _admit():
+    if request.method == 'OPTIONS' or request.endpoint in EXEMPT_ENDPOINTS:
+        return None
+    priority = ROUTE_PRIORITIES.get(request.blueprint, PRIORITY_NORMAL)
+    if not admission.acquire(priority, get_deadline()):
+        response = jsonify({'status': False, 'error': 'Server is overloaded, please retry shortly'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(ADMISSION_RETRY_AFTER_SECONDS)
+        return response
+    g.admission_slot = True
+    return None
+
+
+def _release(exc=None):
+    if g.pop('admission_slot', False):
+        admission.release()
+
+
+def init_admission(app):
+    """Install admission control on every request of the app"""
+    if not ADMISSION_ENABLED:
+        return
+    app.before_request(_admit)
+    app.teardown_request(_release)
@@ -2,20 +2,53 @@ import jwt
 from datetime import datetime, timedelta
 from flask import request, jsonify
 from functools import wraps
-from config import JWT_SECRET_KEY, JWT_ALGORITHM, JWT_EXPIRATION_HOURS
-
-def generate_token(user_id, role, name="", email="", phone="", school=""):
-    """Generate JWT token for user with all details"""
-    payload = {
-        'user_id': user_id,
-        'role': role,
-        'name': name,
-        'email': email,
-        'phone': phone,
-        'school': school,
-        'exp': datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS),
-        'iat': datetime.utcnow()
-    }
+from config import JWT_SECRET_KEY, JWT_ALGORITHM, JWT_EXPIRATION_HOURS, JWT_COMPACT_CLAIMS, STREAM_TOKEN_TTL_SECONDS
+
+# 'scope' claim of tokens that only open the live leaderboard stream
+STREAM_SCOPE = 'leaderboard_stream'
+
+def generate_token(user_id, role, name="", email="", phone="", school="", profile_version=1):
+    """
+    Generate JWT token for user.
+    Compact mode (JWT_COMPACT_CLAIMS) keeps only user_id, role, exp and the
+    profile version; otherwise all profile details are embedded as before.
+    """
+    if JWT_COMPACT_CLAIMS:
+        payload = {
+            'user_id': user_id,
+            'role': role,
+            'pv': profile_version,
+            'exp': datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS)
+        }
+    else:
+        payload = {
+            'user_id': user_id,
+            'role': role,
+            'name': name,
+            'email': email,
+            'phone': phone,
+            'school': school,
+            'exp': datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS),
+            'iat': datetime.utcnow()
+        }
+    return _encode(payload)
+
+
+def generate_stream_token(user):
+    """
+    Short-lived token (STREAM_TOKEN_TTL_SECONDS) for ?access_token= on
+    /leaderboard/stream. It is scoped, so no other route accepts it, and it
+    expires long before a leaked URL in a log matters.
+    """
+    return _encode({
+        'user_id': user.get('user_id'),
+        'role': user.get('role'),
+        'scope': STREAM_SCOPE,
+        'exp': datetime.utcnow() + timedelta(seconds=STREAM_TOKEN_TTL_SECONDS)
+    })
+
+
+def _encode(payload):
     try:
         token = jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
         # PyJWT 2.x returns string, 1.x returns bytes
@@ -27,15 +60,17 @@ def generate_token(user_id, role, name="", email="", phone="", school=""):
         raise
 
 
-def verify_token(token):
-    """Verify JWT token"""
+def verify_token(token, scope=None):
+    """Verify JWT token; scoped tokens are only valid where their scope is asked for"""
     try:
         payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    if payload.get('scope') != scope:
+        return None
+    return payload
 
 
 def get_token_from_header():
@@ -90,3 +125,32 @@ def admin_required(f):
     
     return decorated
 
+
+def stream_admin_required(f):
+    """
+    Like admin_required, but also accepts ?access_token= because browser
+    EventSource cannot send an Authorization header. Query tokens must be
+    stream tokens (generate_stream_token): URLs end up in access logs and
+    browser history, so the long-lived bearer token is never taken there.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = get_token_from_header()
+        scope = None
+        if not token:
+            token = request.args.get('access_token')
+            scope = STREAM_SCOPE
+        if not token:
+            return jsonify({'status': False, 'error': 'Token is missing'}), 401
+        
+        payload = verify_token(token, scope)
+        if not payload:
+            return jsonify({'status': False, 'error': 'Token is invalid or expired'}), 401
+        
+        if payload.get('role') != 'admin':
+            return jsonify({'status': False, 'error': 'Admin access required'}), 403
+        
+        request.current_user = payload
+        return f(*args, **kwargs)
+    
+    return decorated
@@ -0,0 +1,247 @@
+import os
+import threading
+import time
+from datetime import datetime
+from config import CACHE_KEY_VERSION
+
+# Every cache created in this process, for health/metrics reporting
+CACHES = []
+
+
+class SnapshotCache:
+    """
+    Caches one computed value with a short TTL.
+    - Fresh values are served directly.
+    - Stale values (within stale_ttl after expiry) are served while a single
+      background refresh runs.
+    - Concurrent misses share one computation (single-flight).
+    - With a shared backend (e.g. SQLite across workers) a value computed by
+      any worker is adopted by the others while fresh, and only the worker
+      holding the refresh lease recomputes in the background.
+    - Once a scheduler job refreshes it (schedule()), requests only read the
+      last value, falling back to the rules above if the job stops running.
+      With a shared backend the job runs in one worker (leader lease) and the
+      others pick its published value up with adopt().
+    - With a version callable (a cheap change token), refresh() keeps the
+      value while the token is unchanged instead of recomputing it, at most
+      for stale_ttl seconds so changes the token misses still show up.
+    """
+
+    def __init__(self, name, compute, ttl=5, stale_ttl=60, shared=None, version=None):
+        self.name = name
+        self.compute = compute
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.shared = shared
+        self.version = version
+        self._version = None
+        self._recomputed_at = 0.0
+        self._shared_key = f"v{CACHE_KEY_VERSION}:snapshot:{name}"
+        self._value = None
+        self._generated_at = None
+        self._computed_at = 0.0
+        self._scheduled_max_age = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.stats = {
+            'hits': 0, 'stale_hits': 0, 'shared_hits': 0, 'misses': 0, 'refreshes': 0, 'unchanged': 0, 'errors': 0
+        }
+        CACHES.append(self)
+
+    def get(self):
+        """Return (value, generated_at ISO string)"""
+        age = time.monotonic() - self._computed_at
+        fresh_for = self.ttl if self._scheduled_max_age is None else self._scheduled_max_age
+        if self._generated_at is not None and age < fresh_for:
+            self.stats['hits'] += 1
+            return self._value, self._generated_at
+
+        if self._adopt_shared():
+            self.stats['shared_hits'] += 1
+            return self._value, self._generated_at
+
+        if self._generated_at is not None and age < self.ttl + self.stale_ttl:
+            # Serve stale and let exactly one thread refresh in the background
+            self.stats['stale_hits'] += 1
+            if self._refresh_lock.acquire(blocking=False):
+                threading.Thread(target=self._background_refresh, daemon=True).start()
+            return self._value, self._generated_at
+
+        # Missing or too old: the first caller computes, the rest wait for it
+        self.stats['misses'] += 1
+        with self._lock:
+            if self._generated_at is not None and time.monotonic() - self._computed_at < self.ttl:
+                return self._value, self._generated_at
+            self._refresh()
+            return self._value, self._generated_at
+
+    def invalidate(self):
+        """Force the next read to recompute (in every worker when shared)"""
+        with self._lock:
+            self._value = None
+            self._generated_at = None
+            self._computed_at = 0.0
+            if self.shared is not None:
+                try:
+                    self.shared.delete(self._shared_key)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    print(f"[Cache:{self.name}] ERROR: shared invalidate failed: {e}")
+
+    def schedule(self, interval):
+        """A job will call refresh() every interval seconds: stop refreshing on reads"""
+        self._scheduled_max_age = max(self.ttl, interval) + self.stale_ttl
+
+    def adopt(self):
+        """Take the value the refreshing worker last published (scheduled caches)"""
+        fresh_for = self.ttl if self._scheduled_max_age is None else self._scheduled_max_age
+        return self._adopt_shared(fresh_for)
+
+    def refresh(self):
+        """
+        Recompute now, unless another worker just published a fresh value or
+        the version shows nothing changed since the last computation
+        """
+        if self._adopt_shared() or not self._holds_refresh_lease():
+            return
+        with self._lock:
+            if self._unchanged():
+                self.stats['unchanged'] += 1
+                self._computed_at = time.monotonic()
+                self._publish()
+                return
+            self._refresh()
+
+    def _adopt_shared(self, max_age=None):
+        """Take a fresh value another worker published; True if adopted"""
+        if self.shared is None:
+            return False
+        try:
+            entry = self.shared.get(self._shared_key)
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"[Cache:{self.name}] ERROR: shared read failed: {e}")
+            return False
+        if entry is None:
+            return False
+        value, generated_at, computed_wall = entry
+        age = max(0.0, time.time() - computed_wall)
+        if age >= (self.ttl if max_age is None else max_age):
+            return False
+        with self._lock:
+            self._value = value
+            self._generated_at = generated_at
+            self._computed_at = time.monotonic() - age
+        return True
+
+    def _unchanged(self):
+        """True when the version matches the one the current value was computed at"""
+        if self.version is None or self._generated_at is None:
+            return False
+        if time.monotonic() - self._recomputed_at >= self.stale_ttl:
+            return False
+        return self.version() == self._version
+
+    def _refresh(self):
+        # Read the token first: a change landing during compute() shows up next time
+        version = self.version() if self.version is not None else None
+        value = self.compute()
+        self._value = value
+        self._version = version
+        self._generated_at = datetime.now().isoformat()
+        self._computed_at = self._recomputed_at = time.monotonic()
+        self.stats['refreshes'] += 1
+        self._publish()
+
+    def _publish(self):
+        if self.shared is None:
+            return
+        try:
+            expires = self._scheduled_max_age or self.ttl + self.stale_ttl
+            self.shared.set(self._shared_key, (self._value, self._generated_at, time.time()), expires)
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"[Cache:{self.name}] ERROR: shared publish failed: {e}")
+
+    def _holds_refresh_lease(self):
+        # Across workers only one background refresh per TTL
+        if self.shared is None:
+            return True
+        try:
+            return self.shared.add(self._shared_key + ':lease', os.getpid(), self.ttl)
+        except Exception:
+            return True
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"[Cache:{self.name}] ERROR: background refresh failed: {e}")
+        finally:
+            self._refresh_lock.release()
+
+
+class VersionedCache:
+    """
+    Read-through cache of documents by id over a CacheBackend.
+    Keys carry a per-id version: invalidate() bumps it, so an entry stored by
+    a reader that raced a writer is simply never read again instead of
+    serving stale data until it expires.
+    """
+
+    def __init__(self, name, backend, load, ttl):
+        self.name = name
+        self.backend = backend
+        self.load = load
+        self.ttl = ttl
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'errors': 0}
+        CACHES.append(self)
+
+    def _version_key(self, item_id):
+        return f"v{CACHE_KEY_VERSION}:{self.name}:version:{item_id}"
+
+    def get(self, item_id):
+        """Cached document, loading (and caching) it on a miss; None if not found"""
+        try:
+            version = self.backend.counter(self._version_key(item_id))
+            key = f"v{CACHE_KEY_VERSION}:{self.name}:{item_id}:{version}"
+            cached = self.backend.get(key)
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"[Cache:{self.name}] ERROR: read failed: {e}")
+            return self.load(item_id)
+        if cached is not None:
+            self.stats['hits'] += 1
+            return cached
+
+        self.stats['misses'] += 1
+        value = self.load(item_id)
+        if value is not None:
+            try:
+                self.backend.set(key, value, self.ttl)
+                self.stats['refreshes'] += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"[Cache:{self.name}] ERROR: write failed: {e}")
+        return value
+
+    def invalidate(self, item_id):
+        """Call after changing the document"""
+        try:
+            self.backend.incr(self._version_key(item_id))
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"[Cache:{self.name}] ERROR: invalidate failed: {e}")
+
+
+def cache_stats():
+    """Counters and hit rate (fresh, stale and shared hits over all reads) of every cache"""
+    report = {}
+    for cache in CACHES:
+        stats = dict(cache.stats)
+        served = stats['hits'] + stats['stale_hits'] + stats.get('shared_hits', 0)
+        reads = served + stats['misses']
+        stats['hit_rate'] = round(served / reads, 4) if reads else None
+        report[cache.name] = stats
+    return report
@@ -0,0 +1,208 @@
+import os
+import pickle
+import sqlite3
+import stat
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import bson
+from config import CACHE_BACKEND, CACHE_SQLITE_PATH, CACHE_MAX_ENTRIES
+
+
+class CacheBackend(ABC):
+    """
+    Key/value store behind the application caches. Values are serialized, so
+    callers always get their own copy. Counters (incr/counter) are never
+    evicted; they hold key versions.
+    """
+
+    # True when all worker processes see the same entries
+    is_shared = False
+
+    @abstractmethod
+    def get(self, key):
+        ...
+
+    @abstractmethod
+    def set(self, key, value, ttl):
+        ...
+
+    @abstractmethod
+    def add(self, key, value, ttl):
+        """Set only if absent or expired; True when this call stored it (a lease)"""
+
+    @abstractmethod
+    def delete(self, key):
+        ...
+
+    @abstractmethod
+    def incr(self, key):
+        ...
+
+    @abstractmethod
+    def counter(self, key):
+        ...
+
+
+class LocalLRUBackend(CacheBackend):
+    """In-process LRU with per-entry expiry (one copy per worker)"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return pickle.loads(payload)
+
+    def set(self, key, value, ttl):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def add(self, key, value, ttl):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.time():
+                return False
+            self._entries[key] = (time.time() + ttl, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Cache shared by all worker processes on a host: one SQLite file in WAL
+    mode (readers never block the writer), one connection per thread.
+    Values are stored as BSON (never pickle, so a tampered file cannot run
+    code) in a file only the service user can read or write.
+    """
+
+    PURGE_EVERY = 500  # sets between expired-row purges
+    is_shared = True
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._sets = 0
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)')
+        conn.execute('CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+
+    def _conn(self):
+        # Per thread, and never reused across a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT value FROM cache WHERE key = ? AND expires_at >= ?', (key, time.time())
+        ).fetchone()
+        return _loads(row[0]) if row else None
+
+    def set(self, key, value, ttl):
+        payload = _dumps(value)
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, payload, time.time() + ttl)
+        )
+        self._sets += 1
+        if self._sets % self.PURGE_EVERY == 0:
+            conn.execute('DELETE FROM cache WHERE expires_at < ?', (time.time(),))
+
+    def add(self, key, value, ttl):
+        now = time.time()
+        cursor = self._conn().execute(
+            'INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at '
+            'WHERE cache.expires_at < ?',
+            (key, _dumps(value), now + ttl, now)
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def incr(self, key):
+        conn = self._conn()
+        conn.execute(
+            'INSERT INTO counters (key, value) VALUES (?, 1) '
+            'ON CONFLICT(key) DO UPDATE SET value = value + 1',
+            (key,)
+        )
+        return self.counter(key)
+
+    def counter(self, key):
+        row = self._conn().execute('SELECT value FROM counters WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+
+def _dumps(value):
+    # BSON documents are mappings: wrap the value
+    return bson.encode({'v': value})
+
+
+def _loads(payload):
+    return bson.decode(payload)['v']
+
+
+def _private_file(path):
+    """
+    Create path's directory (0700) and the file itself (0600) for the current
+    user; refuse a directory or file another user owns or can write to.
+    SQLite gives its -wal/-shm files the database file's permissions.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    os.close(os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0), 0o600))
+    for target in (directory, path):
+        info = os.lstat(target)
+        if stat.S_ISLNK(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022:
+            raise ValueError(f"CACHE_SQLITE_PATH: {target} must be owned by this user and not writable by others")
+    os.chmod(path, 0o600)
+
+
+def create_backend(name=CACHE_BACKEND):
+    if name == 'sqlite':
+        _private_file(CACHE_SQLITE_PATH)
+        return SQLiteBackend(CACHE_SQLITE_PATH)
+    if name == 'local':
+        return LocalLRUBackend(CACHE_MAX_ENTRIES)
+    raise ValueError(f"Unknown CACHE_BACKEND: {name}")
+
+
+# Backend shared by the quiz cache and the leaderboard snapshot
+cache_backend = create_backend()
@@ -0,0 +1,77 @@
+from pymongo.errors import DuplicateKeyError
+from config import db
+from utils.deadline import aggregate, find_one
+
+# Single metadata document holding global quiz/question counters
+COUNTERS_ID = 'quiz_counters'
+
+# Recounts tried when increments keep landing while one runs
+RECONCILE_ATTEMPTS = 3
+
+
+def increment_quiz_counters(quizzes=0, questions=0):
+    """Adjust the global quiz/question counters with $inc (best effort)"""
+    inc = {}
+    if quizzes:
+        inc['total_quizzes'] = quizzes
+    if questions:
+        inc['total_questions'] = questions
+    if not inc:
+        return
+    try:
+        db.metadata.update_one({'_id': COUNTERS_ID}, {'$inc': inc}, upsert=True)
+    except Exception as e:
+        # Counters drift is repaired by jobs/reconcile_counters.py
+        print(f"[Counters] ERROR: failed to update counters: {e}")
+
+
+def reconcile_quiz_counters():
+    """
+    Recompute the counters from the quizzes collection and store them. The
+    $set is guarded by the counter values read before the recount, so an $inc
+    from increment_quiz_counters landing meanwhile is never overwritten; the
+    recount is retried instead (and left to the next run if that keeps up).
+    """
+    pipeline = [
+        {
+            '$group': {
+                '_id': None,
+                'total_quizzes': {'$sum': 1},
+                'total_questions': {
+                    '$sum': {'$ifNull': ['$total_questions', {'$size': {'$ifNull': ['$questions', []]}}]}
+                }
+            }
+        }
+    ]
+    for _ in range(RECONCILE_ATTEMPTS):
+        before = db.metadata.find_one({'_id': COUNTERS_ID}, {'total_quizzes': 1, 'total_questions': 1}) or {}
+        totals = next(aggregate(db.quizzes, pipeline), None) or {}
+        counters = {
+            'total_quizzes': totals.get('total_quizzes', 0),
+            'total_questions': totals.get('total_questions', 0)
+        }
+        try:
+            # No match once an $inc changed the counters: the upsert then hits the _id
+            db.metadata.update_one(
+                {'_id': COUNTERS_ID, 'total_quizzes': before.get('total_quizzes'),
+                 'total_questions': before.get('total_questions')},
+                {'$set': counters},
+                upsert=True
+            )
+            return counters
+        except DuplicateKeyError:
+            continue
+    print("[Counters] Counters kept changing during the recount; left for the next run")
+    return counters
+
+
+def get_quiz_counters():
+    """Return the global counters with a single point read"""
+    doc = find_one(db.metadata, {'_id': COUNTERS_ID})
+    if doc is None:
+        # First use on an existing database: seed the document
+        return reconcile_quiz_counters()
+    return {
+        'total_quizzes': doc.get('total_quizzes', 0),
+        'total_questions': doc.get('total_questions', 0)
+    }
@@ -0,0 +1,99 @@
+import time
+from flask import request, g, jsonify, has_request_context
+from pymongo.errors import ExecutionTimeout
+from config import REQUEST_DEADLINE_MS, REQUEST_DEADLINE_MAX_MS
+from utils.read_preference import for_request
+
+# Clients may ask for a shorter budget per request (never a longer one)
+DEADLINE_HEADER = 'X-Request-Timeout-Ms'
+
+# Default budget per blueprint name (milliseconds); others use REQUEST_DEADLINE_MS
+ROUTE_DEADLINES_MS = {
+    'get_quiz': 5000,
+    'get_quiz_questions': 5000,
+    'login': 5000,
+    'dashboard': 8000,
+    'leaderboard': 8000,
+    'quiz_leaderboard': 8000,
+    'quiz_analytics': 8000,
+    'quiz_info': 8000,
+    'get_user': 8000,
+    'get_users': 8000,
+    'export': 300000,
+    'import_quizzes': 300000,
+}
+
+
+def start_deadline():
+    """before_request hook: fix this request's deadline (400 for a malformed header)"""
+    budget_ms = min(ROUTE_DEADLINES_MS.get(request.blueprint, REQUEST_DEADLINE_MS), REQUEST_DEADLINE_MAX_MS)
+    header = request.headers.get(DEADLINE_HEADER)
+    if header:
+        try:
+            requested_ms = int(header)
+        except ValueError:
+            requested_ms = 0
+        if requested_ms <= 0:
+            return jsonify({'status': False, 'error': f'{DEADLINE_HEADER} must be a positive integer'}), 400
+        budget_ms = min(budget_ms, requested_ms)
+    g.deadline = time.monotonic() + budget_ms / 1000.0
+
+
+def get_deadline():
+    """Monotonic deadline of the current request, or None outside a request (jobs, threads)"""
+    if not has_request_context():
+        return None
+    return g.get('deadline')
+
+
+def remaining_ms():
+    """Milliseconds left for the current request (None = unbounded)"""
+    deadline = get_deadline()
+    if deadline is None:
+        return None
+    remaining = int((deadline - time.monotonic()) * 1000)
+    if remaining <= 0:
+        raise ExecutionTimeout('Request deadline exceeded')
+    return remaining
+
+
+# --- Data-access helpers: same call shape as PyMongo, bounded by maxTimeMS
+# and routed with the request's read preference ---
+
+def find(collection, *args, **kwargs):
+    cursor = for_request(collection).find(*args, **kwargs)
+    budget = remaining_ms()
+    if budget is not None:
+        cursor = cursor.max_time_ms(budget)
+    return cursor
+
+
+def find_one(collection, *args, **kwargs):
+    budget = remaining_ms()
+    if budget is not None:
+        kwargs['max_time_ms'] = budget
+    return for_request(collection).find_one(*args, **kwargs)
+
+
+def aggregate(collection, pipeline, **kwargs):
+    budget = remaining_ms()
+    if budget is not None:
+        kwargs['maxTimeMS'] = budget
+    return for_request(collection).aggregate(pipeline, **kwargs)
+
+
+def count(collection, filter, **kwargs):
+    budget = remaining_ms()
+    if budget is not None:
+        kwargs['maxTimeMS'] = budget
+    return for_request(collection).count_documents(filter, **kwargs)
+
+
+def deadline_exceeded_response():
+    """504 envelope for queries that ran past the request deadline"""
+    return jsonify({'status': False, 'error': 'Request timed out'}), 504
+
+
+def init_deadlines(app):
+    """Start a deadline for every request of the app"""
+    app.before_request(start_deadline)
@@ -0,0 +1,89 @@
+from config import db, DISTRIBUTION_CACHE_TTL_SECONDS
+from utils.cache import VersionedCache
+from utils.cache_backends import cache_backend
+from utils.deadline import count, find
+
+# Percentiles reported for scores and times
+PERCENTILES = (10, 25, 50, 75, 90, 95, 99)
+
+# Histogram bins (?bins=): default and upper bound
+DEFAULT_BINS = 10
+MAX_BINS = 100
+
+# Cursor batch size when reading a quiz's results
+DISTRIBUTION_BATCH_SIZE = 5000
+
+
+def _summary(np, values):
+    """count, mean, stddev, min, max and percentiles of a 1-D array"""
+    if values.size == 0:
+        return {'count': 0, 'mean': None, 'stddev': None, 'min': None, 'max': None, 'percentiles': {}}
+    percentiles = np.percentile(values, PERCENTILES)
+    return {
+        'count': int(values.size),
+        'mean': round(float(values.mean()), 2),
+        'stddev': round(float(values.std()), 2),
+        'min': round(float(values.min()), 2),
+        'max': round(float(values.max()), 2),
+        'percentiles': {f'p{p}': round(float(v), 2) for p, v in zip(PERCENTILES, percentiles)}
+    }
+
+
+def _histogram(np, values, bins, value_range=None):
+    """Equal-width bins as [{from, to, count}] (the last bin includes its upper edge)"""
+    if values.size == 0:
+        return []
+    counts, edges = np.histogram(values, bins=bins, range=value_range)
+    return [
+        {'from': round(float(low), 2), 'to': round(float(high), 2), 'count': int(n)}
+        for low, high, n in zip(edges[:-1], edges[1:], counts)
+    ]
+
+
+def compute_distribution(quiz_id, bins=DEFAULT_BINS):
+    """
+    Score (percent correct) and time distributions over every attempt of a quiz.
+    Only correct_answers, total_questions and time_taken are read; the math is
+    vectorized with NumPy (imported here so app startup does not pay for it).
+    """
+    import numpy as np
+
+    cursor = find(
+        db.quiz_results,
+        {'quiz_id': quiz_id},
+        {'_id': 0, 'correct_answers': 1, 'total_questions': 1, 'time_taken': 1}
+    ).batch_size(DISTRIBUTION_BATCH_SIZE)
+    # One structured array filled straight from the cursor (no per-field lists)
+    rows = np.fromiter(
+        (
+            (result.get('correct_answers') or 0, result.get('total_questions') or 0, result.get('time_taken') or 0)
+            for result in cursor
+        ),
+        dtype=[('correct', np.float64), ('total', np.float64), ('time', np.float64)]
+    )
+    correct, total, times = rows['correct'], rows['total'], rows['time']
+    graded = total > 0
+    scores = correct[graded] / total[graded] * 100
+
+    return {
+        'attempts': int(total.size),
+        'score': dict(_summary(np, scores), histogram=_histogram(np, scores, bins, (0, 100))),
+        'time_taken': dict(_summary(np, times), histogram=_histogram(np, times, bins))
+    }
+
+
+def _load(item_id):
+    quiz_id, _revision, _results, bins = item_id.split(':')
+    return compute_distribution(quiz_id, int(bins))
+
+
+# Keyed by quiz revision and result count, so a new attempt or an edit of the
+# quiz produces a new key instead of serving a stale distribution
+distribution_cache = VersionedCache('distributions', cache_backend, _load, DISTRIBUTION_CACHE_TTL_SECONDS)
+
+
+def get_distribution(quiz, bins=DEFAULT_BINS):
+    """Cached distribution of a quiz document (one indexed count per call decides the key)"""
+    quiz_id = str(quiz['_id'])
+    results = count(db.quiz_results, {'quiz_id': quiz_id})
+    return distribution_cache.get(f"{quiz_id}:{quiz.get('revision', 0)}:{results}:{bins}")
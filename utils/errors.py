@@ -0,0 +1,38 @@
+from flask import jsonify, request
+from werkzeug.exceptions import HTTPException
+from utils.deadline import ExecutionTimeout, deadline_exceeded_response
+from utils.mongo import ConnectionFailure, database_unavailable_response
+
+
+def internal_error_response(e):
+    """500 envelope for any other failure of a route"""
+    print(f"[App] ERROR: {request.method} {request.path}: {e}")
+    return jsonify({'status': False, 'error': str(e)}), 500
+
+
+def http_error_response(e):
+    """Flask/werkzeug HTTP errors (400 bad JSON, 404, 405, 413, 415...) in the JSON envelope"""
+    response = jsonify({'status': False, 'error': e.description})
+    # Keep headers such as Allow (405) and Retry-After
+    for name, value in e.get_headers():
+        if name.lower() != 'content-type':
+            response.headers[name] = value
+    return response, e.code or 500
+
+
+def _handle_exception(e):
+    if isinstance(e, HTTPException):
+        return http_error_response(e)
+    return internal_error_response(e)
+
+
+def init_error_handlers(app):
+    """
+    Error envelopes for every route, registered once: past the request
+    deadline (504), MongoDB unreachable (503), HTTP errors raised by Flask
+    (their own status), anything else (500). Routes only answer the errors
+    they know better themselves (400, 404, 409...).
+    """
+    app.register_error_handler(ExecutionTimeout, lambda e: deadline_exceeded_response())
+    app.register_error_handler(ConnectionFailure, lambda e: database_unavailable_response())
+    app.register_error_handler(Exception, _handle_exception)
@@ -0,0 +1,46 @@
+from datetime import datetime
+from config import mongo, HEALTH_PING_MAX_AGE_SECONDS
+from utils.admission import admission
+from utils.cache import cache_stats
+from utils import idempotency
+from utils.leaderboard_stream import leaderboard_broadcaster
+from utils.progress import progress_buffer
+from utils.scheduler import scheduler
+
+
+def readiness():
+    """
+    Return (ready, payload) for the public readiness probe: status and the
+    database check only. Reads in-process state (the background ping result),
+    so there is no database round trip per probe.
+    """
+    if not mongo.monitoring:
+        # No background monitor (e.g. tests with WARM_UP off): ping on demand
+        mongo.ping()
+    ready = mongo.is_ready(HEALTH_PING_MAX_AGE_SECONDS)
+    return ready, {
+        'status': 'ready' if ready else 'not_ready',
+        'database': {'status': 'connected' if ready else 'disconnected'}
+    }
+
+
+def health_stats():
+    """
+    Detailed in-process state for operators (admin only): last ping and pool
+    gauges, admission, cache, stream, progress and idempotency counters, and
+    scheduler jobs with their last errors.
+    """
+    _, payload = readiness()
+    ping = dict(mongo.last_ping)
+    if ping['checked_at'] is not None:
+        ping['checked_at'] = datetime.fromtimestamp(ping['checked_at']).isoformat()
+    payload['database'].update(last_ping=ping, pool=mongo.pool_stats.snapshot())
+    payload.update({
+        'admission': admission.snapshot(),
+        'caches': cache_stats(),
+        'leaderboard_stream': leaderboard_broadcaster.snapshot(),
+        'progress': progress_buffer.snapshot(),
+        'idempotency': dict(idempotency.stats),
+        'scheduler': scheduler.snapshot()
+    })
+    return payload
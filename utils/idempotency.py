@@ -0,0 +1,84 @@
+import re
+from config import db, CACHE_KEY_VERSION, IDEMPOTENCY_CACHE_TTL_SECONDS
+from utils.cache_backends import cache_backend
+from utils.deadline import find_one
+from utils.results import RESULT_ANSWER_FIELDS, expand_result_questions
+
+# Clients send a unique key per attempt (header, or attempt_id in the body) and
+# reuse it on every retry of that attempt
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+_KEY_PATTERN = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+# Counters reported by /health/stats
+stats = {'replayed_from_cache': 0, 'replayed_from_db': 0, 'conflicts': 0}
+
+
+def idempotency_key(request, data):
+    """The attempt's key, or None when the client sent none (raises ValueError if malformed)"""
+    key = request.headers.get(IDEMPOTENCY_HEADER) or (data or {}).get('attempt_id')
+    if key is None or key == '':
+        return None
+    if not isinstance(key, str) or not _KEY_PATTERN.match(key):
+        raise ValueError(f'{IDEMPOTENCY_HEADER} must be 1-128 characters of letters, digits, ".", "_", ":" or "-"')
+    return key
+
+
+def _cache_key(user_id, key):
+    return f"v{CACHE_KEY_VERSION}:idempotency:{user_id}:{key}"
+
+
+def remember_response(user_id, key, quiz_id, payload):
+    """Keep the response of a stored submit for fast replays of its retries"""
+    try:
+        cache_backend.set(_cache_key(user_id, key), (quiz_id, payload), IDEMPOTENCY_CACHE_TTL_SECONDS)
+    except Exception as e:
+        print(f"[Idempotency] ERROR: failed to cache response: {e}")
+
+
+def replay_response(user_id, key):
+    """
+    (quiz_id, response payload) of an attempt already stored under key, or None.
+    Served from the response cache when possible, else rebuilt from quiz_results.
+    """
+    try:
+        cached = cache_backend.get(_cache_key(user_id, key))
+    except Exception as e:
+        print(f"[Idempotency] ERROR: response cache read failed: {e}")
+        cached = None
+    if cached is not None:
+        stats['replayed_from_cache'] += 1
+        return cached
+
+    fields = dict(RESULT_ANSWER_FIELDS, correct_answers=1, total_questions=1,
+                  total_answered_questions=1, time_taken=1)
+    result = find_one(db.quiz_results, {'user_id': user_id, 'idempotency_key': key}, fields)
+    if result is None:
+        return None
+    stats['replayed_from_db'] += 1
+    payload = submit_response(result, expand_result_questions(result))
+    remember_response(user_id, key, result['quiz_id'], payload)
+    return result['quiz_id'], payload
+
+
+def submit_response(result, graded_questions):
+    """Response body of POST /quiz/<quiz_id>/submit for a stored result"""
+    return {
+        'status': True,
+        'message': 'Quiz submitted successfully',
+        'result': {
+            'correct_answers': result['correct_answers'],
+            'total_questions': result['total_questions'],
+            'total_answered_questions': result.get('total_answered_questions', result['total_questions']),
+            'time_taken': result['time_taken']
+        },
+        'total_time_taken': result['time_taken'],
+        'questions': graded_questions
+    }
+
+
+def key_conflict(quiz_id, stored_quiz_id):
+    """True when a key is replayed against another quiz (a client bug, never a retry)"""
+    if stored_quiz_id != quiz_id:
+        stats['conflicts'] += 1
+        return True
+    return False
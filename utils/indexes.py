@@ -0,0 +1,75 @@
+from pymongo import ASCENDING, DESCENDING
+from config import db, PROGRESS_TTL_DAYS
+
+# Indexes required by the services, keyed by collection
+INDEXES = {
+    'quiz_results': [
+        # A quiz's results, best attempts first (seeding quiz_best_results)
+        ([('quiz_id', ASCENDING), ('correct_answers', DESCENDING), ('time_taken', ASCENDING)],
+         {'name': 'quiz_rank'}),
+        # A user's best attempt on a quiz
+        ([('quiz_id', ASCENDING), ('user_id', ASCENDING), ('correct_answers', DESCENDING), ('time_taken', ASCENDING)],
+         {'name': 'quiz_user_rank'}),
+        # One stored attempt per client Idempotency-Key (POST /quiz/<quiz_id>/submit)
+        ([('user_id', ASCENDING), ('idempotency_key', ASCENDING)],
+         {'name': 'user_idempotency_key', 'unique': True,
+          'partialFilterExpression': {'idempotency_key': {'$exists': True}}}),
+        # A user's attempts, newest first (GET /quiz_info/<user_id>)
+        ([('user_id', ASCENDING), ('submitted_at', DESCENDING)],
+         {'name': 'user_submitted_at'}),
+        # Date-range exports (GET /export/...?from=&to=)
+        ([('submitted_at', ASCENDING)],
+         {'name': 'submitted_at'}),
+    ],
+    'user_standings': [
+        # School-scoped rankings (GET /leaderboard?school=, GET /dashboard?school=)
+        ([('school', ASCENDING), ('average_score', DESCENDING), ('total_time_taken', ASCENDING), ('_id', ASCENDING)],
+         {'name': 'school_user_rank'}),
+        # Global rank of one user (GET /user/<user_id>)
+        ([('average_score', DESCENDING), ('total_time_taken', ASCENDING), ('_id', ASCENDING)],
+         {'name': 'user_rank'}),
+        # Newest standing update (change token of the snapshot jobs)
+        ([('updated_at', DESCENDING)], {'name': 'updated_at'}),
+    ],
+    'quiz_best_results': [
+        # Per-quiz standings: one best attempt per user (GET /quiz/<quiz_id>/leaderboard)
+        ([('quiz_id', ASCENDING), ('correct_answers', DESCENDING), ('time_taken', ASCENDING), ('user_id', ASCENDING)],
+         {'name': 'quiz_rank'}),
+    ],
+    'daily_standings': [
+        # Time-windowed leaderboards merge the buckets of a day range (GET /leaderboard?window=)
+        ([('day', ASCENDING), ('school', ASCENDING)],
+         {'name': 'day_school'}),
+    ],
+    'users': [
+        # Per-school user counts
+        ([('school', ASCENDING)], {'name': 'school'}),
+    ],
+    'quiz_questions': [
+        # Paged question storage: ordered pages per quiz (GET /quiz/<quiz_id>/questions)
+        ([('quiz_id', ASCENDING), ('position', ASCENDING)],
+         {'name': 'quiz_position', 'unique': True}),
+        ([('quiz_id', ASCENDING), ('question_id', ASCENDING)],
+         {'name': 'quiz_question', 'unique': True}),
+    ],
+    'question_stats': [
+        # One counter document per question (GET /quiz/<quiz_id>/analytics)
+        ([('quiz_id', ASCENDING), ('question_id', ASCENDING)],
+         {'name': 'quiz_question', 'unique': True}),
+    ],
+    'quiz_progress': [
+        # Autosaved attempts that were never submitted are dropped after a while
+        ([('updated_at', ASCENDING)],
+         {'name': 'progress_ttl', 'expireAfterSeconds': PROGRESS_TTL_DAYS * 86400}),
+    ],
+}
+
+
+def ensure_indexes():
+    """Create any missing indexes (create_index is a no-op when they already exist)"""
+    for collection, indexes in INDEXES.items():
+        for keys, options in indexes:
+            try:
+                db[collection].create_index(keys, **options)
+            except Exception as e:
+                print(f"[Indexes] ERROR: failed to create {collection}.{options.get('name')}: {e}")
@@ -0,0 +1,188 @@
+from datetime import date, datetime, timedelta
+from bson import ObjectId
+from config import (
+    db, ADMIN_USERNAME, LEADERBOARD_CACHE_TTL_SECONDS, LEADERBOARD_STALE_SECONDS,
+    LEADERBOARD_MAX_WINDOW_DAYS
+)
+from utils.cache import SnapshotCache
+from utils.cache_backends import cache_backend
+from utils.deadline import aggregate, find
+from utils.read_preference import for_analytics
+from utils.standings import RESULT_SCORE, day_bucket, snapshot_version, standings_seeded
+
+# Preset ?window= values and the number of days (ending today) each covers
+WINDOW_DAYS = {'today': 1, '7d': 7, '30d': 30}
+
+
+def compute_leaderboard():
+    """
+    Fully ranked leaderboard: average score desc, then total time asc.
+    Read from the pre-aggregated user_standings (one document per user); until
+    they are seeded from existing results, aggregated from quiz_results.
+    """
+    if standings_seeded():
+        standings = find(for_analytics(db.user_standings), {}, {
+            'total_quizzes_attempted': 1, 'total_correct': 1, 'total_questions': 1,
+            'total_time_taken': 1, 'average_score': 1
+        })
+        return rank_entries([dict(standing, user_id=standing.pop('_id')) for standing in standings])
+
+    pipeline = [
+        {
+            '$group': {
+                '_id': '$user_id',
+                'total_quizzes_attempted': {'$sum': 1},
+                'total_correct': {'$sum': '$correct_answers'},
+                'total_questions': {'$sum': '$total_questions'},
+                'total_time_taken': {'$sum': '$time_taken'},
+                'average_score': {'$avg': RESULT_SCORE}
+            }
+        },
+        {
+            '$project': {
+                'user_id': '$_id',
+                'total_quizzes_attempted': 1,
+                'total_correct': 1,
+                'total_questions': 1,
+                'total_time_taken': 1,
+                'average_score': {'$multiply': ['$average_score', 100]}
+            }
+        }
+    ]
+
+    return rank_entries(list(aggregate(for_analytics(db.quiz_results), pipeline)))
+
+
+def rank_entries(aggregated_results):
+    """
+    Leaderboard entries from per-user totals ({user_id, total_questions,
+    total_time_taken, total_correct, average_score}), ranked.
+    """
+    # Load only the users that appear in the results
+    user_ids = [result['user_id'] for result in aggregated_results]
+    object_ids = [ObjectId(uid) for uid in user_ids if ObjectId.is_valid(str(uid))]
+    all_users_dict = {}
+    for user in find(for_analytics(db.users), {'_id': {'$in': object_ids}}, {'name': 1, 'email': 1, 'phone': 1}):
+        all_users_dict[str(user['_id'])] = user
+
+    entries = []
+    for result in aggregated_results:
+        uid = str(result['user_id'])
+        if uid in all_users_dict:
+            user = all_users_dict[uid]
+            name = user.get('name', 'Unknown')
+            email = user.get('email', '')
+            phone = user.get('phone', '')
+        else:
+            # User not found in users collection (e.g., admin user)
+            is_admin = uid.lower() == 'admin'
+            name = 'Admin' if is_admin else 'Unknown User'
+            email = ADMIN_USERNAME if is_admin else ''
+            phone = ''
+        entries.append({
+            'user_id': uid,
+            'name': name,
+            'attempted_questions': result.get('total_questions', 0),
+            'time_taken': round(result.get('total_time_taken', 0), 2),
+            'email': email,
+            'phone': phone,
+            'total_correct': result.get('total_correct', 0),
+            'total_questions': result.get('total_questions', 0),
+            'average_score': round(result.get('average_score') or 0.0, 2)
+        })
+
+    # Sort: higher average score first, then lower time_taken, then user id
+    # (GET /export/leaderboard orders the same rounded values the same way)
+    entries.sort(key=lambda x: (-x['average_score'], x['time_taken'], x['user_id']))
+
+    # Assign rank and drop average_score (only used for sorting)
+    for index, entry in enumerate(entries, start=1):
+        entry['rank'] = index
+        entry.pop('average_score', None)
+
+    return entries
+
+
+def window_range(window, date_from=None, date_to=None):
+    """
+    [start, end) day range for ?window=today|7d|30d|custom (custom takes
+    from/to as YYYY-MM-DD, both inclusive). Raises ValueError on bad input.
+    """
+    today = day_bucket(datetime.now())
+    if window in WINDOW_DAYS:
+        return today - timedelta(days=WINDOW_DAYS[window] - 1), today + timedelta(days=1)
+    if window != 'custom':
+        raise ValueError('window must be one of today, 7d, 30d, custom')
+    if not date_from:
+        raise ValueError('window=custom requires from (YYYY-MM-DD)')
+    try:
+        start = day_bucket(date.fromisoformat(date_from))
+        end = day_bucket(date.fromisoformat(date_to)) if date_to else today
+    except ValueError:
+        raise ValueError('from/to must be dates (YYYY-MM-DD)')
+    if end < start:
+        raise ValueError('from must not be after to')
+    if (end - start).days + 1 > LEADERBOARD_MAX_WINDOW_DAYS:
+        raise ValueError(f'custom window can cover at most {LEADERBOARD_MAX_WINDOW_DAYS} days')
+    return start, end + timedelta(days=1)
+
+
+def compute_window_leaderboard(start, end, school=None):
+    """Ranked leaderboard over submissions in [start, end), merged from daily buckets"""
+    match = {'day': {'$gte': start, '$lt': end}}
+    if school:
+        match['school'] = school
+    pipeline = [
+        {'$match': match},
+        {
+            '$group': {
+                '_id': '$user_id',
+                'total_quizzes_attempted': {'$sum': '$total_quizzes_attempted'},
+                'total_correct': {'$sum': '$total_correct'},
+                'total_questions': {'$sum': '$total_questions'},
+                'total_time_taken': {'$sum': '$total_time_taken'},
+                'score_sum': {'$sum': '$score_sum'}
+            }
+        },
+        {
+            '$project': {
+                'user_id': '$_id',
+                'total_quizzes_attempted': 1,
+                'total_correct': 1,
+                'total_questions': 1,
+                'total_time_taken': 1,
+                'average_score': {
+                    '$multiply': [{'$divide': ['$score_sum', '$total_quizzes_attempted']}, 100]
+                }
+            }
+        }
+    ]
+    return rank_entries(list(aggregate(for_analytics(db.daily_standings), pipeline)))
+
+
+def _preset_window_snapshot(window):
+    return SnapshotCache(
+        f'leaderboard_{window}',
+        lambda: compute_window_leaderboard(*window_range(window)),
+        ttl=LEADERBOARD_CACHE_TTL_SECONDS,
+        stale_ttl=LEADERBOARD_STALE_SECONDS,
+        shared=cache_backend if cache_backend.is_shared else None,
+        # Windows also move at midnight
+        version=lambda: (snapshot_version(), day_bucket(datetime.now()))
+    )
+
+
+# Preset windows over all schools are polled like the all-time board: cache them
+window_snapshots = {window: _preset_window_snapshot(window) for window in WINDOW_DAYS}
+
+
+# Shared by /leaderboard and /dashboard so concurrent polls cost one aggregation
+leaderboard_snapshot = SnapshotCache(
+    'leaderboard',
+    compute_leaderboard,
+    ttl=LEADERBOARD_CACHE_TTL_SECONDS,
+    stale_ttl=LEADERBOARD_STALE_SECONDS,
+    # Workers share one computation per TTL when the backend is shared
+    shared=cache_backend if cache_backend.is_shared else None,
+    version=snapshot_version
+)
@@ -0,0 +1,123 @@
+import json
+import queue
+import threading
+import time
+from config import (
+    LEADERBOARD_STREAM_INTERVAL_SECONDS, LEADERBOARD_STREAM_IDLE_REFRESH_SECONDS,
+    LEADERBOARD_STREAM_MAX_SUBSCRIBERS
+)
+from utils.leaderboard import leaderboard_snapshot
+
+
+class LeaderboardBroadcaster:
+    """
+    Per-process fan-out of leaderboard updates to SSE subscribers.
+
+    submit_quiz calls notify(); a single ticker thread refreshes the shared
+    leaderboard snapshot at most once per interval when something changed and
+    hands the same list to every subscriber, so N viewers cost one computation
+    per tick. Submissions handled by other worker processes are picked up by
+    an idle read of the snapshot every idle_refresh seconds while anyone is
+    subscribed; it only recomputes when the snapshot is due anyway, and a
+    snapshot already published is not sent again.
+    Each subscriber holds only the latest ranking (a slow client skips
+    intermediate ticks instead of buffering them).
+    """
+
+    def __init__(self, interval, idle_refresh, max_subscribers):
+        self.interval = interval
+        self.idle_refresh = idle_refresh
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._ticker = None
+        self.stats = {'ticks': 0, 'published': 0, 'unchanged': 0, 'errors': 0}
+
+    def subscribe(self):
+        """New subscriber queue, or None when the process is at capacity"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscriber = queue.Queue(maxsize=1)
+            self._subscribers.add(subscriber)
+            if self._ticker is None:
+                self._ticker = threading.Thread(target=self._run, name='leaderboard-stream', daemon=True)
+                self._ticker.start()
+            return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def notify(self):
+        """Mark the leaderboard as changed; the next tick publishes it"""
+        self._dirty.set()
+
+    def snapshot(self):
+        with self._lock:
+            subscribers = len(self._subscribers)
+        return dict(self.stats, subscribers=subscribers)
+
+    def _run(self):
+        published_at = None
+        while True:
+            dirty = self._dirty.wait(self.idle_refresh)
+            self._dirty.clear()
+            with self._lock:
+                subscribers = list(self._subscribers)
+            if not subscribers:
+                # Nobody listening; a new subscriber starts from the current snapshot
+                continue
+            self.stats['ticks'] += 1
+            try:
+                if dirty:
+                    # Replaces the snapshot in place (or adopts the one another
+                    # worker just published); readers never see it missing
+                    leaderboard_snapshot.refresh()
+                entries, generated_at = leaderboard_snapshot.get()
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"[Leaderboard Stream] ERROR: refresh failed: {e}")
+            else:
+                if generated_at == published_at:
+                    self.stats['unchanged'] += 1
+                else:
+                    for subscriber in subscribers:
+                        _offer(subscriber, (entries, generated_at))
+                    published_at = generated_at
+                    self.stats['published'] += 1
+            # Coalesce: submits during the interval are published together
+            time.sleep(self.interval)
+
+
+def _offer(subscriber, item):
+    """Replace whatever the subscriber has not consumed yet with item"""
+    try:
+        subscriber.get_nowait()
+    except queue.Empty:
+        pass
+    try:
+        subscriber.put_nowait(item)
+    except queue.Full:
+        pass
+
+
+def diff_top(old, new):
+    """(changed entries, removed user_ids) turning ranking old into new"""
+    old_by_user = {entry['user_id']: entry for entry in old}
+    new_users = {entry['user_id'] for entry in new}
+    changed = [entry for entry in new if old_by_user.get(entry['user_id']) != entry]
+    removed = [user_id for user_id in old_by_user if user_id not in new_users]
+    return changed, removed
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+leaderboard_broadcaster = LeaderboardBroadcaster(
+    LEADERBOARD_STREAM_INTERVAL_SECONDS,
+    LEADERBOARD_STREAM_IDLE_REFRESH_SECONDS,
+    LEADERBOARD_STREAM_MAX_SUBSCRIBERS
+)
@@ -0,0 +1,181 @@
+import threading
+import time
+from flask import jsonify
+from pymongo import MongoClient
+from pymongo.errors import ConnectionFailure
+from pymongo.monitoring import ConnectionPoolListener
+
+
+class PoolStats(ConnectionPoolListener):
+    """Connection pool gauges (summed over all server pools), fed by PyMongo events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {
+            'created': 0, 'closed': 0,
+            'check_out_started': 0, 'checked_out': 0, 'check_out_failed': 0, 'checked_in': 0,
+            'pool_cleared': 0
+        }
+
+    def _inc(self, key):
+        with self._lock:
+            self._counts[key] += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            'open_connections': counts['created'] - counts['closed'],
+            'checked_out': counts['checked_out'] - counts['checked_in'],
+            'wait_queue': counts['check_out_started'] - counts['checked_out'] - counts['check_out_failed'],
+            'check_out_failed': counts['check_out_failed'],
+            'pool_cleared': counts['pool_cleared']
+        }
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._inc('pool_cleared')
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._inc('created')
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._inc('closed')
+
+    def connection_check_out_started(self, event):
+        self._inc('check_out_started')
+
+    def connection_check_out_failed(self, event):
+        self._inc('check_out_failed')
+
+    def connection_checked_out(self, event):
+        self._inc('checked_out')
+
+    def connection_checked_in(self, event):
+        self._inc('checked_in')
+
+
+class MongoConnection:
+    """
+    Lazily created, shared MongoClient.
+
+    Nothing touches the network at import: the client is built on first use
+    and PyMongo's own monitors rediscover the servers after an outage, so a
+    failed connection is never cached - the next request simply tries again.
+    """
+
+    def __init__(self, uri, db_name, **client_options):
+        self.uri = uri
+        self.db_name = db_name
+        self.client_options = client_options
+        self.pool_stats = PoolStats()
+        self._client = None
+        self._lock = threading.Lock()
+        self._monitor = None
+        # Result of the most recent background ping
+        self.last_ping = {'ok': False, 'checked_at': None, 'latency_ms': None, 'error': 'not checked yet'}
+        self.db = LazyDatabase(self)
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    try:
+                        self._client = MongoClient(
+                            self.uri, event_listeners=[self.pool_stats], **self.client_options
+                        )
+                    except Exception as e:
+                        # e.g. SRV lookup failed: retry on the next access
+                        raise ConnectionFailure(f"Could not create MongoDB client: {e}")
+        return self._client
+
+    @property
+    def database(self):
+        return self.client[self.db_name]
+
+    def ping(self):
+        """One round trip to the server; True when it answered"""
+        started = time.monotonic()
+        try:
+            self.client.admin.command('ping')
+            self.last_ping = {
+                'ok': True,
+                'checked_at': time.time(),
+                'latency_ms': round((time.monotonic() - started) * 1000, 1),
+                'error': None
+            }
+            return True
+        except Exception as e:
+            # Only the error type: probes are public, the message names hosts
+            self.last_ping = {'ok': False, 'checked_at': time.time(), 'latency_ms': None, 'error': type(e).__name__}
+            print(f"[Mongo] Ping failed: {e}")
+            return False
+
+    @property
+    def monitoring(self):
+        return self._monitor is not None
+
+    def is_ready(self, max_age):
+        """True when the last background ping succeeded within max_age seconds (no I/O)"""
+        ping = self.last_ping
+        return ping['ok'] and ping['checked_at'] is not None and time.time() - ping['checked_at'] <= max_age
+
+    def start_monitor(self, interval, on_connect=None, max_backoff=30):
+        """
+        Connect and keep pinging in a background thread, so startup never waits
+        on the network and health probes read a cached result. Until the first
+        success pings retry with backoff; the first successful ping also fills
+        the pool up to minPoolSize, and on_connect (e.g. index creation) runs once.
+        """
+        if self._monitor is not None:
+            return
+
+        def _run():
+            backoff = 1
+            connected = False
+            while True:
+                if self.ping():
+                    if not connected:
+                        connected = True
+                        print("Connected to MongoDB successfully!")
+                        if on_connect is not None:
+                            on_connect()
+                    time.sleep(interval)
+                elif connected:
+                    time.sleep(interval)
+                else:
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, max_backoff)
+
+        self._monitor = threading.Thread(target=_run, name='mongo-monitor', daemon=True)
+        self._monitor.start()
+
+
+class LazyDatabase:
+    """Stand-in for pymongo Database that resolves the client on attribute access"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection.database, name)
+
+    def __getitem__(self, name):
+        return self._connection.database[name]
+
+
+def database_unavailable_response():
+    """503 envelope for requests that could not reach MongoDB"""
+    return jsonify({'status': False, 'error': 'Database connection failed'}), 503
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from bson import ObjectId
+from config import db, ADMIN_USERNAME, PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL_SECONDS
+from utils.cache import CACHES
+from utils.deadline import find_one
+
+PROFILE_FIELDS = {'name': 1, 'email': 1, 'phone': 1, 'school': 1, 'role': 1, 'profile_version': 1}
+
+ADMIN_PROFILE = {
+    'user_id': 'admin',
+    'name': 'Administrator',
+    'email': ADMIN_USERNAME,
+    'phone': '',
+    'school': '',
+    'role': 'admin',
+    'profile_version': 1
+}
+
+
+class ProfileCache:
+    """
+    LRU of user profiles keyed by user_id with a TTL.
+    An entry older than the profile version carried by a token is refetched,
+    so a profile change is picked up as soon as a new token is used; the TTL
+    bounds staleness for other processes. Writers that change a profile must
+    $inc profile_version and call invalidate().
+    """
+
+    def __init__(self, name, max_size, ttl):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'errors': 0, 'evictions': 0}
+        CACHES.append(self)
+
+    def get(self, user_id, min_version=0):
+        """Profile dict for user_id, or None when the user does not exist"""
+        user_id = str(user_id)
+        if user_id == 'admin':
+            return ADMIN_PROFILE
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                loaded_at, profile = entry
+                fresh = time.monotonic() - loaded_at < self.ttl
+                if fresh and (profile is None or profile['profile_version'] >= min_version):
+                    self._entries.move_to_end(user_id)
+                    self.stats['hits'] += 1
+                    return profile
+            self.stats['misses'] += 1
+
+        profile = self._load(user_id)
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), profile)
+            self._entries.move_to_end(user_id)
+            self.stats['refreshes'] += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+        return profile
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def _load(self, user_id):
+        if not ObjectId.is_valid(user_id):
+            return None
+        user = find_one(db.users, {'_id': ObjectId(user_id)}, PROFILE_FIELDS)
+        if not user:
+            return None
+        return {
+            'user_id': user_id,
+            'name': user.get('name', ''),
+            'email': user.get('email', ''),
+            'phone': user.get('phone', ''),
+            'school': user.get('school', ''),
+            'role': user.get('role', 'user'),
+            'profile_version': user.get('profile_version', 1)
+        }
+
+
+profile_cache = ProfileCache('profiles', PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL_SECONDS)
+
+
+def get_profile(user_id, min_version=0):
+    return profile_cache.get(user_id, min_version)
+
+
+def invalidate_profile(user_id):
+    """Call after changing a user's profile (together with $inc profile_version)"""
+    profile_cache.invalidate(user_id)
+
+
+def current_profile(claims):
+    """
+    Profile for the authenticated user: taken from full tokens directly,
+    otherwise from the cache (honouring the token's profile version).
+    """
+    if 'name' in claims:
+        return claims
+    profile = get_profile(claims.get('user_id'), claims.get('pv', 0))
+    if profile is None:
+        return {'user_id': claims.get('user_id'), 'role': claims.get('role')}
+    return dict(profile, role=claims.get('role', profile['role']))
@@ -0,0 +1,186 @@
+import atexit
+import threading
+import time
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from config import db, PROGRESS_FLUSH_INTERVAL_SECONDS, PROGRESS_MAX_BUFFERED_ATTEMPTS, PROGRESS_WRITE_BEHIND
+from utils.deadline import find_one
+
+
+def _progress_id(quiz_id, user_id):
+    return f"{quiz_id}:{user_id}"
+
+
+class ProgressBuffer:
+    """
+    Write-behind buffer for in-progress quiz answers (quiz_progress collection).
+
+    record() only touches memory; a flusher thread writes every dirty attempt
+    every flush interval as one unordered bulk write, with one $set per
+    changed question, so any number of autosaves between flushes cost a
+    single update per attempt. Reads merge the buffered answers over the
+    stored document. At most one flush interval of autosaves is lost if the
+    process dies; the final submit is always written synchronously.
+
+    Entries belong to one attempt: a submit leaves a tombstone (submitted_at,
+    no answers) and every write is guarded by the time its entry was started,
+    so answers buffered before a submit can never be written into the next
+    attempt. With write_behind off (several workers) every autosave is written
+    through, so a submit on any worker reads all of the attempt's answers.
+    """
+
+    def __init__(self, interval, max_attempts, write_behind=True):
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.write_behind = write_behind
+        self._pending = {}    # progress id -> {'quiz_id', 'user_id', 'answers', 'started_at', 'updated_at'}
+        self._inflight = {}   # being written by the current flush
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        self.stats = {
+            'recorded': 0, 'flushes': 0, 'flushed_attempts': 0, 'write_through': 0, 'stale_dropped': 0, 'errors': 0
+        }
+
+    def record(self, quiz_id, user_id, answers):
+        """Buffer answers ({question_id: {answer, answered, time_taken}}) for one attempt"""
+        key = _progress_id(quiz_id, user_id)
+        now = datetime.now()
+        if self.write_behind:
+            with self._lock:
+                entry = self._pending.get(key)
+                if entry is None and len(self._pending) < self.max_attempts:
+                    entry = self._pending[key] = {'quiz_id': quiz_id, 'user_id': user_id, 'answers': {}, 'started_at': now}
+                if entry is not None:
+                    entry['answers'].update(answers)
+                    entry['updated_at'] = now
+                    self.stats['recorded'] += 1
+                    self._start_flusher()
+                    return
+        # Write-behind off or buffer full: write this autosave straight through
+        self.stats['write_through'] += 1
+        db.quiz_progress.update_one(**_update(key, quiz_id, user_id, answers, now, now))
+
+    def load(self, quiz_id, user_id):
+        """Saved answers for the attempt (stored document + anything not yet flushed)"""
+        key = _progress_id(quiz_id, user_id)
+        stored = find_one(db.quiz_progress, {'_id': key}, {'answers': 1, 'updated_at': 1}) or {}
+        answers = dict(stored.get('answers') or {})
+        updated_at = stored.get('updated_at')
+        with self._lock:
+            for source in (self._inflight, self._pending):
+                entry = source.get(key)
+                if entry is not None:
+                    answers.update(entry['answers'])
+                    updated_at = entry['updated_at']
+        return answers, updated_at
+
+    def discard(self, quiz_id, user_id, submitted_at):
+        """
+        End the attempt after its submit was stored: its answers are dropped and
+        the tombstone makes writes of entries started earlier (e.g. still
+        buffered by another worker) no-ops.
+        """
+        key = _progress_id(quiz_id, user_id)
+        with self._lock:
+            self._pending.pop(key, None)
+        # Wait for an in-flight flush so it cannot overwrite the tombstone
+        with self._flush_lock:
+            db.quiz_progress.update_one(
+                {'_id': key},
+                {
+                    '$set': {'answers': {}, 'submitted_at': submitted_at, 'updated_at': submitted_at},
+                    '$setOnInsert': {'quiz_id': quiz_id, 'user_id': user_id}
+                },
+                upsert=True
+            )
+
+    def flush(self):
+        """Write every buffered attempt in one bulk write"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                self._inflight, self._pending = self._pending, {}
+            batch = self._inflight
+            keys = list(batch)
+            failed, stale = keys, []
+            try:
+                ops = [
+                    UpdateOne(**_update(
+                        key, entry['quiz_id'], entry['user_id'], entry['answers'], entry['updated_at'], entry['started_at']
+                    ))
+                    for key, entry in batch.items()
+                ]
+                try:
+                    db.quiz_progress.bulk_write(ops, ordered=False)
+                    failed = []
+                except BulkWriteError as e:
+                    # A duplicate key means the attempt was submitted after the
+                    # entry was started: those answers are stale, not retried
+                    errors = e.details.get('writeErrors', [])
+                    stale = [keys[error['index']] for error in errors if error.get('code') == 11000]
+                    failed = [keys[error['index']] for error in errors if error.get('code') != 11000]
+                    self.stats['stale_dropped'] += len(stale)
+                    if failed:
+                        raise
+                self.stats['flushes'] += 1
+                self.stats['flushed_attempts'] += len(ops) - len(stale)
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"[Progress] ERROR: flush of {len(failed)} attempts failed, will retry: {e}")
+                # Put the failed entries back under anything recorded meanwhile
+                with self._lock:
+                    for key in failed:
+                        entry = batch[key]
+                        newer = self._pending.get(key)
+                        if newer is not None:
+                            entry['answers'].update(newer['answers'])
+                            entry['updated_at'] = newer['updated_at']
+                        self._pending[key] = entry
+            finally:
+                with self._lock:
+                    self._inflight = {}
+
+    def snapshot(self):
+        with self._lock:
+            buffered = len(self._pending)
+        return dict(self.stats, write_behind=self.write_behind, buffered_attempts=buffered)
+
+    def _start_flusher(self):
+        # Called with self._lock held
+        if self._flusher is not None:
+            return
+
+        def _run():
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"[Progress] ERROR: {e}")
+
+        self._flusher = threading.Thread(target=_run, name='progress-flusher', daemon=True)
+        self._flusher.start()
+
+
+def _update(key, quiz_id, user_id, answers, updated_at, started_at):
+    """
+    Upsert of an attempt's answers, skipped if the attempt was submitted after
+    started_at: the filter then misses the tombstone and the upsert fails with
+    a duplicate key instead of writing stale answers.
+    """
+    fields = {f'answers.{question_id}': answer for question_id, answer in answers.items()}
+    fields['updated_at'] = updated_at
+    return {
+        'filter': {'_id': key, 'submitted_at': {'$not': {'$gte': started_at}}},
+        'update': {'$set': fields, '$setOnInsert': {'quiz_id': quiz_id, 'user_id': user_id}},
+        'upsert': True
+    }
+
+
+progress_buffer = ProgressBuffer(PROGRESS_FLUSH_INTERVAL_SECONDS, PROGRESS_MAX_BUFFERED_ATTEMPTS, PROGRESS_WRITE_BEHIND)
+
+# Best effort: write what is buffered on a clean shutdown
+atexit.register(lambda: progress_buffer.flush())
@@ -0,0 +1,88 @@
+from pymongo import UpdateOne, ReplaceOne
+from config import db
+from utils.questions import iter_quiz_questions
+from utils.results import RESULT_ANSWER_FIELDS, expand_result_questions
+
+
+def option_index(options, answer):
+    """Index of the option matching answer (case-insensitive, like scoring), or -1"""
+    normalized = str(answer).strip().lower()
+    for idx, option in enumerate(options):
+        if str(option).strip().lower() == normalized:
+            return idx
+    return -1
+
+
+def _stat_increments(options, user_answer, is_correct):
+    inc = {'attempts': 1, 'correct': 1 if is_correct else 0}
+    if user_answer:
+        inc['answered'] = 1
+        idx = option_index(options, user_answer)
+        if idx >= 0:
+            inc[f'option_counts.{idx}'] = 1
+        else:
+            inc['other_answers'] = 1
+    return inc
+
+
+def record_question_stats(quiz_id, graded_questions):
+    """
+    $inc per-question counters for one graded submission (one bulk round trip).
+    graded_questions: [{question_id, options, user_answer, is_correct}]
+    """
+    if not graded_questions:
+        return
+    ops = []
+    for question in graded_questions:
+        question_id = question.get('question_id')
+        if not question_id:
+            continue
+        inc = _stat_increments(question.get('options', []), question.get('user_answer', ''), question.get('is_correct', False))
+        ops.append(UpdateOne({'quiz_id': quiz_id, 'question_id': question_id}, {'$inc': inc}, upsert=True))
+    if not ops:
+        return
+    try:
+        db.question_stats.bulk_write(ops, ordered=False)
+    except Exception as e:
+        # History can be rebuilt with jobs/backfill_question_stats.py
+        print(f"[Question Stats] ERROR: failed to record stats for quiz {quiz_id}: {e}")
+
+
+def rebuild_question_stats(quiz):
+    """Recompute the counters of one quiz from its stored results (idempotent)"""
+    quiz_id = str(quiz['_id'])
+    options_by_question = {q.get('question_id'): q.get('options', []) for q in iter_quiz_questions(quiz, ['question_id', 'options'])}
+
+    stats = {}
+    for result in db.quiz_results.find({'quiz_id': quiz_id}, RESULT_ANSWER_FIELDS):
+        try:
+            result_questions = expand_result_questions(result)
+        except LookupError as e:
+            print(f"[Question Stats] {str(e)}")
+            continue
+        for question in result_questions:
+            question_id = question.get('question_id')
+            if not question_id:
+                continue
+            options = options_by_question.get(question_id, question.get('options', []))
+            doc = stats.setdefault(question_id, {
+                'quiz_id': quiz_id,
+                'question_id': question_id,
+                'attempts': 0,
+                'correct': 0,
+                'answered': 0,
+                'other_answers': 0,
+                'option_counts': {}
+            })
+            for field, value in _stat_increments(options, question.get('user_answer', ''), question.get('is_correct', False)).items():
+                if field.startswith('option_counts.'):
+                    key = field.split('.', 1)[1]
+                    doc['option_counts'][key] = doc['option_counts'].get(key, 0) + value
+                else:
+                    doc[field] += value
+
+    ops = [ReplaceOne({'quiz_id': quiz_id, 'question_id': question_id}, doc, upsert=True)
+           for question_id, doc in stats.items()]
+    if ops:
+        db.question_stats.bulk_write(ops, ordered=False)
+    return len(ops)
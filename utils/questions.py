@@ -0,0 +1,563 @@
+from bson import ObjectId
+from pymongo import ReturnDocument
+from config import db, PAGED_QUESTIONS_THRESHOLD
+from utils.deadline import count, find, find_one
+
+# Editable question fields (question_id is immutable).
+# Every change to a quiz's questions also bumps its 'revision' counter,
+# which compact quiz_results reference (see utils/results.py).
+QUESTION_FIELDS = ('question', 'options', 'correct_answer')
+
+# Storage modes: questions embedded in the quiz document (default) or kept in
+# the quiz_questions collection keyed by (quiz_id, position)
+STORAGE_EMBEDDED = 'embedded'
+STORAGE_PAGED = 'paged'
+
+# Cursor batch size when streaming paged questions
+QUESTION_BATCH_SIZE = 500
+
+# Tries of a revision-guarded question patch before reporting a conflict
+PATCH_ATTEMPTS = 3
+
+
+def is_paged(quiz):
+    """Whether the quiz keeps its questions in the quiz_questions collection"""
+    return quiz.get('question_storage') == STORAGE_PAGED
+
+
+def questions_key(quiz):
+    """
+    quiz_id value of a paged quiz's live set of quiz_questions documents.
+    Edits write a new set under a staging key and switch questions_key together
+    with the revision (see _stage_paged_questions), so readers of a revision
+    only ever see that revision's questions.
+    """
+    return quiz.get('questions_key') or str(quiz['_id'])
+
+
+def choose_storage(requested, question_count):
+    """Storage mode for a new quiz: explicit request, else size threshold"""
+    if requested in (STORAGE_EMBEDDED, STORAGE_PAGED):
+        return requested
+    if PAGED_QUESTIONS_THRESHOLD and question_count > PAGED_QUESTIONS_THRESHOLD:
+        return STORAGE_PAGED
+    return STORAGE_EMBEDDED
+
+
+def insert_paged_questions(quiz_id, questions, start_position=0):
+    """Store questions as quiz_questions documents at consecutive positions"""
+    docs = []
+    for position, question in enumerate(questions, start=start_position):
+        doc = dict(question)
+        doc['quiz_id'] = str(quiz_id)
+        doc['position'] = position
+        docs.append(doc)
+    if docs:
+        db.quiz_questions.insert_many(docs, ordered=False)
+
+
+def iter_quiz_questions(quiz, fields=None):
+    """
+    Yield a quiz's questions in order for either storage mode.
+    Paged quizzes are streamed from a server-side cursor in batches.
+    """
+    if not is_paged(quiz):
+        yield from quiz.get('questions', [])
+        return
+    projection = {'_id': 0}
+    if fields:
+        projection = {field: 1 for field in fields}
+        projection['_id'] = 0
+    cursor = find(db.quiz_questions, {'quiz_id': questions_key(quiz)}, projection)
+    yield from cursor.sort('position', 1).batch_size(QUESTION_BATCH_SIZE)
+
+
+def question_lookup(quiz, question_ids):
+    """question_id -> question for the given ids (either storage mode)"""
+    if not is_paged(quiz):
+        return {q.get('question_id'): q for q in quiz.get('questions', []) if q.get('question_id')}
+    cursor = find(db.quiz_questions, 
+        {'quiz_id': questions_key(quiz), 'question_id': {'$in': list(question_ids)}},
+        {'_id': 0}
+    )
+    return {q['question_id']: q for q in cursor}
+
+
+def get_questions_page(quiz_id, cursor=None, limit=50):
+    """
+    One page of a quiz's questions (without correct_answer).
+    Returns None if the quiz does not exist, else (quiz, questions, next_cursor).
+    The cursor is opaque to clients: the last position for paged storage,
+    the array offset for embedded storage.
+    """
+    quiz = find_one(db.quizzes, 
+        {'_id': ObjectId(quiz_id)},
+        {'title': 1, 'total_questions': 1, 'question_storage': 1, 'questions_key': 1,
+         'questions': {'$slice': [cursor or 0, limit + 1]}}
+    )
+    if not quiz:
+        return None
+
+    if is_paged(quiz):
+        questions, next_cursor = get_paged_questions(quiz, cursor, limit)
+    else:
+        page = quiz.get('questions', [])
+        next_cursor = (cursor or 0) + limit if len(page) > limit else None
+        questions = [public_question(question) for question in page[:limit]]
+
+    quiz.pop('questions', None)
+    return quiz, questions, next_cursor
+
+
+def get_paged_questions(quiz, cursor=None, limit=50):
+    """Index-bounded page of a paged quiz's questions: (questions, next_cursor)"""
+    query = {'quiz_id': questions_key(quiz)}
+    if cursor is not None:
+        query['position'] = {'$gt': cursor}
+    page = list(
+        find(db.quiz_questions, query, {'_id': 0, 'correct_answer': 0, 'quiz_id': 0})
+        .sort('position', 1)
+        .limit(limit + 1)
+    )
+    next_cursor = page[limit - 1]['position'] if len(page) > limit else None
+    return [public_question(question) for question in page[:limit]], next_cursor
+
+
+def build_question(question_data):
+    """Stored question document; question_id is kept if provided, otherwise generated"""
+    return {
+        'question_id': question_data.get('question_id') or str(ObjectId()),
+        'question': question_data['question'],
+        'options': question_data['options'],
+        'correct_answer': question_data['correct_answer']
+    }
+
+
+def public_question(question):
+    """Question as returned to clients (without correct_answer)"""
+    return {
+        'question_id': question['question_id'],
+        'question': question['question'],
+        'options': question['options']
+    }
+
+
+def push_questions(quiz_id, new_questions, set_fields=None, projection=None):
+    """
+    Append questions atomically with $push/$each in one round trip.
+    Rejects question_ids already present in the quiz. Returns the updated
+    quiz (projected) or None when the quiz is missing or an id already exists.
+    """
+    update = {
+        '$push': {'questions': {'$each': new_questions}},
+        '$inc': {'total_questions': len(new_questions), 'revision': 1}
+    }
+    if set_fields:
+        update['$set'] = set_fields
+    quiz = db.quizzes.find_one_and_update(
+        {
+            '_id': ObjectId(quiz_id),
+            'question_storage': {'$ne': STORAGE_PAGED},
+            'questions.question_id': {'$nin': [q['question_id'] for q in new_questions]}
+        },
+        update,
+        projection=projection,
+        return_document=ReturnDocument.AFTER
+    )
+    if quiz is None and _is_paged_quiz(quiz_id):
+        return _push_paged_questions(quiz_id, new_questions, set_fields, projection)
+    return quiz
+
+
+def pull_questions(quiz_id, question_ids, set_fields=None, projection=None):
+    """
+    Remove questions atomically with $pull. Only applies when every id exists
+    and at least one question would remain. Returns the quiz as it was
+    before the update (projected) or None when the guard failed.
+    """
+    # $pull removes each question once, so counts are sized by distinct ids
+    question_ids = list(dict.fromkeys(question_ids))
+    update = {
+        '$pull': {'questions': {'question_id': {'$in': question_ids}}},
+        '$inc': {'total_questions': -len(question_ids), 'revision': 1}
+    }
+    if set_fields:
+        update['$set'] = set_fields
+    quiz = db.quizzes.find_one_and_update(
+        {
+            '_id': ObjectId(quiz_id),
+            'questions.question_id': {'$all': question_ids},
+            # questions.<n> exists => more than n questions, so one remains
+            f'questions.{len(question_ids)}': {'$exists': True}
+        },
+        update,
+        projection=projection,
+        return_document=ReturnDocument.BEFORE
+    )
+    if quiz is None and _is_paged_quiz(quiz_id):
+        return _pull_paged_questions(quiz_id, question_ids, set_fields, projection)
+    return quiz
+
+
+class QuestionPatchError(Exception):
+    """A question patch that cannot apply; status_code is the HTTP status to report"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _plan_patch(questions, remove_ids, updates, new_questions):
+    """
+    Apply remove/update/add to the given current questions in memory.
+    Returns (kept questions with updates applied, updated questions by id);
+    raises QuestionPatchError when any part of the patch cannot apply.
+    """
+    by_id = {q.get('question_id'): q for q in questions}
+    missing = [qid for qid in list(remove_ids) + [u['question_id'] for u in updates] if qid not in by_id]
+    if missing:
+        raise QuestionPatchError(f'Question(s) not found in quiz: {", ".join(dict.fromkeys(missing))}', 404)
+
+    updated = {}
+    for question_update in updates:
+        question = dict(by_id[question_update['question_id']])
+        question.update({field: question_update[field] for field in QUESTION_FIELDS if field in question_update})
+        if question.get('correct_answer') not in question.get('options', []):
+            raise QuestionPatchError(f"Question {question['question_id']}: correct_answer must match one of the options")
+        updated[question['question_id']] = question
+
+    removed = set(remove_ids)
+    kept = [updated.get(q.get('question_id'), q) for q in questions if q.get('question_id') not in removed]
+    kept_ids = {q.get('question_id') for q in kept}
+    taken = [q['question_id'] for q in new_questions if q['question_id'] in kept_ids]
+    if taken:
+        raise QuestionPatchError(f'A question with the provided question_id already exists in the quiz: {", ".join(taken)}', 409)
+    return kept, updated
+
+
+def _answer_conditions(updates):
+    """
+    Filter conditions keeping correct_answer within options for updates that
+    change only one of them (updates changing both are checked by validation)
+    """
+    conditions = []
+    for question_update in updates:
+        question_id = question_update['question_id']
+        if 'options' in question_update and 'correct_answer' not in question_update:
+            conditions.append({'questions': {'$elemMatch': {
+                'question_id': question_id,
+                'correct_answer': {'$in': question_update['options']}
+            }}})
+        elif 'correct_answer' in question_update and 'options' not in question_update:
+            conditions.append({'questions': {'$elemMatch': {
+                'question_id': question_id,
+                'options': question_update['correct_answer']
+            }}})
+    return conditions
+
+
+def _delta_update(remove_ids, updates, new_questions, set_fields):
+    """
+    (update, array_filters) applying the patch in place. A patch of one kind is
+    a plain $pull, positional $set on questions.$[qN] or $push/$each; a mixed
+    patch touches 'questions' more than once, which a plain update rejects as
+    conflicting paths, so it becomes one pipeline update doing the same
+    server-side (filter, merge the edited fields, append).
+    """
+    if sum(1 for part in (remove_ids, updates, new_questions) if part) == 1:
+        set_doc = dict(set_fields or {})
+        inc = {'revision': 1}
+        update = {}
+        array_filters = None
+        if remove_ids:
+            update['$pull'] = {'questions': {'question_id': {'$in': remove_ids}}}
+            inc['total_questions'] = -len(remove_ids)
+        elif new_questions:
+            update['$push'] = {'questions': {'$each': new_questions}}
+            inc['total_questions'] = len(new_questions)
+        else:
+            array_filters = []
+            for n, question_update in enumerate(updates):
+                for field in QUESTION_FIELDS:
+                    if field in question_update:
+                        set_doc[f'questions.$[q{n}].{field}'] = question_update[field]
+                array_filters.append({f'q{n}.question_id': question_update['question_id']})
+        update['$inc'] = inc
+        if set_doc:
+            update['$set'] = set_doc
+        return update, array_filters
+
+    questions = '$questions'
+    if remove_ids:
+        questions = {'$filter': {
+            'input': questions,
+            'as': 'q',
+            'cond': {'$not': [{'$in': ['$$q.question_id', {'$literal': remove_ids}]}]}
+        }}
+    if updates:
+        questions = {'$map': {
+            'input': questions,
+            'as': 'q',
+            'in': {'$switch': {
+                'branches': [
+                    {
+                        'case': {'$eq': ['$$q.question_id', {'$literal': question_update['question_id']}]},
+                        'then': {'$mergeObjects': ['$$q', {'$literal': {
+                            field: question_update[field] for field in QUESTION_FIELDS if field in question_update
+                        }}]}
+                    }
+                    for question_update in updates
+                ],
+                'default': '$$q'
+            }}
+        }}
+    if new_questions:
+        questions = {'$concatArrays': [questions, {'$literal': new_questions}]}
+    set_doc = {field: {'$literal': value} for field, value in (set_fields or {}).items()}
+    set_doc['questions'] = questions
+    set_doc['revision'] = {'$add': [{'$ifNull': ['$revision', 0]}, 1]}
+    return [{'$set': set_doc}, {'$set': {'total_questions': {'$size': '$questions'}}}], None
+
+
+def _delta_patch(quiz_id, remove_ids, updates, new_questions, set_fields, projection):
+    """
+    Embedded quizzes: apply the patch as one targeted update whose filter checks
+    every precondition (ids to remove/update exist, new ids are free, each
+    correct_answer stays within its options, a question remains). Nothing is
+    read first, so concurrent edits to other questions merge instead of
+    conflicting. Returns the updated quiz (projected) or None when the guard failed.
+    """
+    removed = set(remove_ids)
+    target_ids = list(remove_ids) + [u['question_id'] for u in updates]
+    new_ids = [q['question_id'] for q in new_questions if q['question_id'] not in removed]
+    id_guard = {}
+    if target_ids:
+        id_guard['$all'] = target_ids
+    if new_ids:
+        id_guard['$nin'] = new_ids
+
+    query = {'_id': ObjectId(quiz_id), 'question_storage': {'$ne': STORAGE_PAGED}}
+    if id_guard:
+        query['questions.question_id'] = id_guard
+    if remove_ids and not new_questions:
+        # questions.<n> exists => more than n questions, so one remains
+        query[f'questions.{len(remove_ids)}'] = {'$exists': True}
+    conditions = _answer_conditions(updates)
+    if conditions:
+        query['$and'] = conditions
+
+    update, array_filters = _delta_update(remove_ids, updates, new_questions, set_fields)
+    return db.quizzes.find_one_and_update(
+        query,
+        update,
+        projection=projection,
+        array_filters=array_filters,
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def reset_option_stats(quiz_id, question_ids):
+    """
+    Clear option_counts of questions whose options changed: they are keyed by
+    option index, so they no longer match the new options. Attempt and
+    correctness counters are kept.
+    """
+    if question_ids:
+        db.question_stats.update_many(
+            {'quiz_id': str(quiz_id), 'question_id': {'$in': list(question_ids)}},
+            {'$unset': {'option_counts': ''}}
+        )
+
+
+def apply_question_patch(quiz_id, remove_ids, updates, new_questions, set_fields=None, projection=None):
+    """
+    Remove, update and add questions as one edit that applies completely or not
+    at all. Embedded quizzes take a single targeted update guarded by the
+    patch's own preconditions (see _delta_patch). When that guard fails, or for
+    paged quizzes, the patch is checked against the current questions, which
+    reports what cannot apply, and written under the quiz revision it was
+    checked against (retried when a concurrent edit wins). At least one
+    question must remain. Questions whose options change restart their
+    option_counts. Returns the updated quiz (projected); raises
+    QuestionPatchError.
+    """
+    remove_ids = list(dict.fromkeys(remove_ids))
+    updated_quiz = _delta_patch(quiz_id, remove_ids, updates, new_questions, set_fields, projection)
+    attempts = 0
+    while updated_quiz is None:
+        if attempts == PATCH_ATTEMPTS:
+            raise QuestionPatchError('Quiz was modified concurrently, please retry', 409)
+        attempts += 1
+        updated_quiz = _rewrite_patch(quiz_id, remove_ids, updates, new_questions, set_fields, projection)
+
+    reset_option_stats(quiz_id, [u['question_id'] for u in updates if 'options' in u])
+    return updated_quiz
+
+
+def _rewrite_patch(quiz_id, remove_ids, updates, new_questions, set_fields, projection):
+    """
+    Fallback of apply_question_patch: read the current questions, plan the patch
+    in memory and write it under the revision it was checked against.
+    Returns None when another edit changed the revision first.
+    """
+    quiz = find_one(db.quizzes, {'_id': ObjectId(quiz_id)},
+                    dict.fromkeys(('questions',) + PAGED_STATE_FIELDS, 1))
+    if quiz is None:
+        raise QuestionPatchError('Quiz not found', 404)
+    if is_paged(quiz):
+        return _patch_paged_questions(quiz, remove_ids, updates, new_questions, set_fields, projection)
+
+    kept, _ = _plan_patch(quiz.get('questions', []), remove_ids, updates, new_questions)
+    questions = kept + new_questions
+    if not questions:
+        raise QuestionPatchError('Cannot remove every question. Quiz must have at least one question.')
+    set_doc = dict(set_fields or {}, questions=questions, total_questions=len(questions))
+    return db.quizzes.find_one_and_update(
+        {'_id': quiz['_id'], 'revision': quiz.get('revision')},
+        {'$set': set_doc, '$inc': {'revision': 1}},
+        projection=projection,
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def find_missing_question_ids(quiz_id, question_ids):
+    """
+    Diagnose a failed guarded update with a narrow read.
+    Returns None if the quiz does not exist, else (total_questions, missing_ids).
+    """
+    quiz = find_one(db.quizzes, 
+        {'_id': ObjectId(quiz_id)},
+        {'total_questions': 1, 'question_storage': 1, 'questions_key': 1, 'questions.question_id': 1}
+    )
+    if not quiz:
+        return None
+    if is_paged(quiz):
+        existing = {q['question_id'] for q in find(db.quiz_questions, 
+            {'quiz_id': questions_key(quiz), 'question_id': {'$in': question_ids}}, {'question_id': 1})}
+    else:
+        existing = {q.get('question_id') for q in quiz.get('questions', [])}
+    missing = [question_id for question_id in question_ids if question_id not in existing]
+    return quiz.get('total_questions', len(existing)), missing
+
+
+# --- Paged storage variants (only reached when the embedded guard fails) ---
+
+# Quiz fields an edit of a paged quiz reads and updates
+PAGED_STATE_FIELDS = (
+    'question_storage', 'total_questions', 'revision', 'next_position',
+    'questions_key', 'retired_questions_key'
+)
+
+
+def _is_paged_quiz(quiz_id):
+    return count(db.quizzes, {'_id': ObjectId(quiz_id), 'question_storage': STORAGE_PAGED}, limit=1) > 0
+
+
+def _paged_projection(projection):
+    """Quiz projection without question array operators (not meaningful for paged quizzes)"""
+    if not projection:
+        return None
+    return {field: value for field, value in projection.items() if not field.startswith('questions')} or None
+
+
+def _load_paged_quiz(quiz_id, projection=None):
+    """The paged quiz with the requested fields plus its edit state, or None"""
+    quiz_projection = _paged_projection(projection)
+    if quiz_projection and all(quiz_projection.values()):
+        quiz_projection.update(dict.fromkeys(PAGED_STATE_FIELDS, 1))
+    else:
+        quiz_projection = None
+    return find_one(db.quizzes, {'_id': ObjectId(quiz_id), 'question_storage': STORAGE_PAGED}, quiz_projection)
+
+
+def _stage_paged_questions(quiz, remove_ids, updated, new_questions, set_fields, projection):
+    """
+    Write a paged quiz's edited questions as a new quiz_questions set under a
+    staging key (unchanged questions are copied server-side), then switch the
+    quiz to it and bump the revision in one update guarded by the revision the
+    edit was checked against. A submit therefore grades either the old or the
+    new questions in full, under the matching revision. The set replaced here
+    is kept until the next edit for readers still streaming it. Returns the
+    updated quiz (projected) or None, dropping the staged set, when another
+    edit won.
+    """
+    quiz_id = str(quiz['_id'])
+    live_key = questions_key(quiz)
+    if quiz.get('retired_questions_key'):
+        db.quiz_questions.delete_many({'quiz_id': quiz['retired_questions_key']})
+
+    staged_key = f'{quiz_id}:{ObjectId()}'
+    db.quiz_questions.aggregate([
+        {'$match': {'quiz_id': live_key, 'question_id': {'$nin': list(remove_ids) + list(updated)}}},
+        {'$project': {'_id': 0}},
+        {'$set': {'quiz_id': staged_key}},
+        {'$merge': {'into': 'quiz_questions', 'whenMatched': 'fail'}}
+    ])
+    if updated:
+        db.quiz_questions.insert_many([dict(question, quiz_id=staged_key) for question in updated.values()], ordered=False)
+    next_position = quiz.get('next_position', 0)
+    insert_paged_questions(staged_key, new_questions, start_position=next_position)
+
+    set_doc = dict(set_fields or {}, questions_key=staged_key, retired_questions_key=live_key)
+    claimed = db.quizzes.find_one_and_update(
+        {'_id': quiz['_id'], 'revision': quiz.get('revision')},
+        {
+            '$set': set_doc,
+            '$inc': {
+                'revision': 1,
+                'total_questions': len(new_questions) - len(remove_ids),
+                'next_position': len(new_questions)
+            }
+        },
+        projection=_paged_projection(projection),
+        return_document=ReturnDocument.AFTER
+    )
+    if claimed is None:
+        db.quiz_questions.delete_many({'quiz_id': staged_key})
+        return None
+    claimed['question_storage'] = STORAGE_PAGED
+    return claimed
+
+
+def _push_paged_questions(quiz_id, new_questions, set_fields, projection):
+    quiz = _load_paged_quiz(quiz_id, projection)
+    if quiz is None:
+        return None
+    new_ids = [q['question_id'] for q in new_questions]
+    if count(db.quiz_questions, {'quiz_id': questions_key(quiz), 'question_id': {'$in': new_ids}}, limit=1):
+        return None
+    return _stage_paged_questions(quiz, [], {}, new_questions, set_fields, projection)
+
+
+def _pull_paged_questions(quiz_id, question_ids, set_fields, projection):
+    quiz = _load_paged_quiz(quiz_id, projection)
+    # Same guard as the embedded path: at least one question must remain
+    if quiz is None or quiz.get('total_questions', 0) <= len(question_ids):
+        return None
+    removed = list(find(db.quiz_questions,
+                        {'quiz_id': questions_key(quiz), 'question_id': {'$in': question_ids}}, {'_id': 0}))
+    if len(removed) != len(question_ids):
+        return None
+    if _stage_paged_questions(quiz, question_ids, {}, [], set_fields, projection) is None:
+        return None
+    # Like $pull with ReturnDocument.BEFORE: the quiz as it was, with the removed questions
+    quiz['questions'] = removed
+    return quiz
+
+
+def _patch_paged_questions(quiz, remove_ids, updates, new_questions, set_fields, projection):
+    """
+    Paged variant of apply_question_patch: the affected questions are read and
+    checked, then the edit is written as a staged question set and switched in
+    with the revision (see _stage_paged_questions). Returns None when another
+    edit claimed the revision first.
+    """
+    affected_ids = list(dict.fromkeys(
+        list(remove_ids) + [u['question_id'] for u in updates] + [q['question_id'] for q in new_questions]
+    ))
+    affected = list(find(db.quiz_questions,
+                         {'quiz_id': questions_key(quiz), 'question_id': {'$in': affected_ids}}, {'_id': 0}))
+    _, updated = _plan_patch(affected, remove_ids, updates, new_questions)
+    if quiz.get('total_questions', 0) - len(remove_ids) + len(new_questions) < 1:
+        raise QuestionPatchError('Cannot remove every question. Quiz must have at least one question.')
+    return _stage_paged_questions(quiz, remove_ids, updated, new_questions, set_fields, projection)
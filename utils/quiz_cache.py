@@ -0,0 +1,42 @@
+from bson import ObjectId
+from config import db, QUIZ_CACHE_TTL_SECONDS
+from utils.cache import VersionedCache
+from utils.cache_backends import cache_backend
+from utils.deadline import find_one
+
+
+def _load_quiz(quiz_id):
+    return find_one(db.quizzes, {'_id': ObjectId(quiz_id)})
+
+
+# Full quiz documents (answer key included - never return them as-is)
+quiz_cache = VersionedCache('quizzes', cache_backend, _load_quiz, QUIZ_CACHE_TTL_SECONDS)
+
+
+def get_cached_quiz(quiz_id):
+    """Quiz document by id from the cache (loaded on a miss); None if it does not exist"""
+    return quiz_cache.get(str(quiz_id))
+
+
+def invalidate_quiz(quiz_id):
+    """Call after any write to the quiz document"""
+    quiz_cache.invalidate(str(quiz_id))
+
+
+def get_current_quiz(quiz_id):
+    """
+    Cached quiz checked against its stored revision with one projected read,
+    for paths that must not act on a stale copy (serving and grading
+    questions). With the local backend invalidate_quiz() only reaches the
+    worker that made the edit, so an edit made elsewhere shows up here as a
+    revision mismatch and is reloaded.
+    None if the quiz does not exist (any more).
+    """
+    quiz = get_cached_quiz(quiz_id)
+    if quiz is None:
+        return None
+    stored = find_one(db.quizzes, {'_id': ObjectId(quiz_id)}, {'revision': 1})
+    if stored is None or stored.get('revision') != quiz.get('revision'):
+        invalidate_quiz(quiz_id)
+        quiz = get_cached_quiz(quiz_id) if stored is not None else None
+    return quiz
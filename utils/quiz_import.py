@@ -0,0 +1,214 @@
+import io
+import json
+import zipfile
+from datetime import datetime
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from config import db
+from utils.counters import increment_quiz_counters
+from utils.questions import STORAGE_PAGED, choose_storage
+from utils.validation import quiz_errors
+
+# Quizzes per insert_many round trip
+IMPORT_BATCH_SIZE = 500
+
+# Invalid rows reported in detail (the rest are only counted)
+MAX_REPORTED_ERRORS = 1000
+
+# Quiz fields read from an import row; anything else (e.g. the quiz_id and
+# created_* fields written by GET /export/quizzes) is ignored
+IMPORT_FIELDS = ('title', 'questions', 'storage')
+
+
+class ImportTooLarge(Exception):
+    """The upload, or what a zip member decompresses to, exceeds the import limit"""
+
+
+class _BoundedRaw(io.RawIOBase):
+    """Counts the bytes read from stream and raises ImportTooLarge past limit"""
+
+    def __init__(self, stream, limit):
+        self._stream = stream
+        self.limit = limit
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        self.bytes_read += len(data)
+        if self.bytes_read > self.limit:
+            raise ImportTooLarge(f'Import exceeds {self.limit} bytes')
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def bounded(stream, limit):
+    """Buffered view of stream that stops the import after limit bytes (no Content-Length needed)"""
+    return io.BufferedReader(_BoundedRaw(stream, limit))
+
+
+def iter_ndjson(stream):
+    """(row label, parsed object or ValueError) for each non-blank line"""
+    for line_number, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8'), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield f'line {line_number}', json.loads(line)
+        except ValueError as e:
+            yield f'line {line_number}', ValueError(f'invalid JSON: {e}')
+
+
+def iter_zip(file, max_bytes):
+    """
+    Rows from a zip archive: each .json member holds one quiz object or an
+    array of them, each .ndjson member one quiz per line. The members may
+    decompress to at most max_bytes in total: checked against their declared
+    sizes before reading anything, and against the bytes actually inflated.
+    """
+    with zipfile.ZipFile(file) as archive:
+        members = [member for member in archive.infolist() if not member.is_dir()]
+        if sum(member.file_size for member in members) > max_bytes:
+            raise ImportTooLarge(f'Import decompresses to more than {max_bytes} bytes')
+        remaining = max_bytes
+        for member in members:
+            name = member.filename
+            with archive.open(member) as inflated:
+                raw = _BoundedRaw(inflated, remaining)
+                stream = io.BufferedReader(raw)
+                if name.endswith('.ndjson'):
+                    for label, row in iter_ndjson(stream):
+                        yield f'{name} {label}', row
+                elif name.endswith('.json'):
+                    try:
+                        content = json.load(stream)
+                    except ValueError as e:
+                        content = ValueError(f'invalid JSON: {e}')
+                    if isinstance(content, list):
+                        for index, row in enumerate(content):
+                            yield f'{name}[{index}]', row
+                    else:
+                        yield name, content
+            remaining -= raw.bytes_read
+
+
+def build_quiz(row, created_by, created_at):
+    """(quiz document with a preassigned _id, paged question documents) for a valid row"""
+    quiz_id = ObjectId()
+    questions = [
+        {
+            'question_id': question.get('question_id') or str(ObjectId()),
+            'question': question['question'],
+            'options': question['options'],
+            'correct_answer': question['correct_answer']
+        }
+        for question in row['questions']
+    ]
+    quiz = {
+        '_id': quiz_id,
+        'title': row['title'].strip(),
+        'questions': questions,
+        'created_by': created_by,
+        'created_at': created_at,
+        'total_questions': len(questions),
+        'revision': 1,
+        'best_results_seeded': True
+    }
+    paged_questions = []
+    if choose_storage(row.get('storage'), len(questions)) == STORAGE_PAGED:
+        quiz['questions'] = []
+        quiz['question_storage'] = STORAGE_PAGED
+        quiz['next_position'] = len(questions)
+        paged_questions = [
+            dict(question, quiz_id=str(quiz_id), position=position)
+            for position, question in enumerate(questions)
+        ]
+    return quiz, paged_questions
+
+
+class QuizImport:
+    """
+    One streaming import: validate every row as it is read, buffer valid
+    quizzes and write them IMPORT_BATCH_SIZE at a time with insert_many
+    (paged questions likewise), so memory stays bounded by one batch.
+    """
+
+    def __init__(self, created_by, dry_run=False):
+        self.created_by = created_by
+        self.created_at = datetime.now().isoformat()
+        self.dry_run = dry_run
+        self.rows = 0
+        self.valid = 0
+        self.quiz_ids = []
+        self.failed = 0
+        self.errors = []
+        self._quizzes = []
+        self._paged_questions = []
+
+    def add(self, label, row):
+        self.rows += 1
+        errors = [str(row)] if isinstance(row, ValueError) else quiz_errors(row, keep_question_ids=True)
+        if errors:
+            self.failed += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                title = row.get('title') if isinstance(row, dict) else None
+                self.errors.append({'row': label, 'title': title, 'errors': errors})
+            return
+        quiz, paged_questions = build_quiz({field: row.get(field) for field in IMPORT_FIELDS}, self.created_by, self.created_at)
+        self.valid += 1
+        self._quizzes.append(quiz)
+        self._paged_questions.extend(paged_questions)
+        if len(self._quizzes) >= IMPORT_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered quizzes. Only quizzes that were actually inserted are
+        listed in quiz_ids (and get their paged questions and counters). When
+        the paged questions cannot be written, their quizzes are deleted again,
+        like create_quiz does. The write error is re-raised after that bookkeeping.
+        """
+        quizzes, paged_questions = self._quizzes, self._paged_questions
+        self._quizzes, self._paged_questions = [], []
+        if not quizzes or self.dry_run:
+            return
+        error = None
+        try:
+            db.quizzes.insert_many(quizzes, ordered=False)
+        except BulkWriteError as e:
+            failed = {write_error['index'] for write_error in e.details.get('writeErrors', [])}
+            quizzes = [quiz for index, quiz in enumerate(quizzes) if index not in failed]
+            error = e
+        written = {str(quiz['_id']) for quiz in quizzes}
+        paged_questions = [question for question in paged_questions if question['quiz_id'] in written]
+        if paged_questions:
+            try:
+                db.quiz_questions.insert_many(paged_questions, ordered=False)
+            except Exception as e:
+                # Do not leave paged quizzes without (all of) their questions behind
+                paged_ids = list({question['quiz_id'] for question in paged_questions})
+                db.quizzes.delete_many({'_id': {'$in': [ObjectId(quiz_id) for quiz_id in paged_ids]}})
+                db.quiz_questions.delete_many({'quiz_id': {'$in': paged_ids}})
+                quizzes = [quiz for quiz in quizzes if str(quiz['_id']) not in paged_ids]
+                error = error or e
+        self.quiz_ids.extend(str(quiz['_id']) for quiz in quizzes)
+        if quizzes:
+            increment_quiz_counters(
+                quizzes=len(quizzes),
+                questions=sum(quiz['total_questions'] for quiz in quizzes)
+            )
+        if error is not None:
+            raise error
+
+    def summary(self):
+        return {
+            'rows': self.rows,
+            'imported': len(self.quiz_ids),
+            'valid': self.valid,
+            'failed': self.failed,
+            'dry_run': self.dry_run,
+            'quiz_ids': self.quiz_ids,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors)
+        }
@@ -0,0 +1,64 @@
+from flask import request, g, has_request_context
+from pymongo.read_preferences import (
+    Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest
+)
+from config import ANALYTICS_READ_PREFERENCE, ANALYTICS_MAX_STALENESS_SECONDS
+
+# Blueprints whose reads tolerate bounded staleness and may go to secondaries.
+# submit_quiz and the quiz CRUD routes are not listed, so they stay on the primary.
+# quiz_info stays there too: users read their own attempts right after
+# submitting, and their answer keys (quiz_revisions) may be just archived.
+ANALYTICS_BLUEPRINTS = {
+    'leaderboard',
+    'dashboard',
+    'get_users',
+    'quiz_leaderboard',
+    'quiz_analytics',
+    'export',
+}
+
+_MODES = {
+    'primary': Primary,
+    'primarypreferred': PrimaryPreferred,
+    'secondary': Secondary,
+    'secondarypreferred': SecondaryPreferred,
+    'nearest': Nearest,
+}
+
+
+def _build(mode, max_staleness):
+    mode_class = _MODES.get(mode.lower())
+    if mode_class is None:
+        raise ValueError(f"Unknown read preference: {mode}")
+    if mode_class is Primary:
+        return Primary()
+    return mode_class(max_staleness=max_staleness if max_staleness > 0 else -1)
+
+
+analytics_read_preference = _build(ANALYTICS_READ_PREFERENCE, ANALYTICS_MAX_STALENESS_SECONDS)
+
+
+def select_read_preference():
+    """before_request hook: pick the read preference for this blueprint"""
+    if request.blueprint in ANALYTICS_BLUEPRINTS:
+        g.read_preference = analytics_read_preference
+
+
+def for_analytics(collection):
+    """The collection with the analytics read preference (also outside requests)"""
+    return collection.with_options(read_preference=analytics_read_preference)
+
+
+def for_request(collection):
+    """The collection with the current request's read preference, if any"""
+    if not has_request_context():
+        return collection
+    read_preference = g.get('read_preference')
+    if read_preference is None:
+        return collection
+    return collection.with_options(read_preference=read_preference)
+
+
+def init_read_preferences(app):
+    """Route analytic blueprints' reads according to ANALYTICS_READ_PREFERENCE"""
+    app.before_request(select_read_preference)
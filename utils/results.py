@@ -0,0 +1,258 @@
+import hashlib
+import json
+from datetime import datetime
+from functools import lru_cache
+from bson import Binary, ObjectId
+from pymongo import UpdateOne
+from config import db
+from utils.deadline import find, find_one
+from utils.questions import iter_quiz_questions
+
+# Compact quiz_results format: answers are option indices packed one byte per
+# question and correctness is a bitmap, both relative to an archived answer
+# key (quiz_revisions) instead of repeating options/correct_answer per attempt.
+# Keys are archived under a hash of their content ('answer_key' on the result),
+# so a result always decodes against exactly the key it was graded with.
+COMPACT_FORMAT = 'compact-v1'
+
+# Reserved answer bytes (option indices use 0..MAX_OPTION_INDEX)
+NO_ANSWER = 255
+OTHER_ANSWER = 254
+MAX_OPTION_INDEX = 253
+
+# Projection with everything expand_result_questions needs
+RESULT_ANSWER_FIELDS = {
+    'quiz_id': 1, 'questions': 1, 'result_format': 1, 'quiz_revision': 1, 'answer_key': 1,
+    'answers': 1, 'correct_bitmap': 1, 'other_answers': 1
+}
+
+# Answer keys longer than this are archived as one quiz_revisions document per
+# page of questions ({_id: 'quiz_id:digest:page', quiz_id, revision, digest,
+# page, ...the page's slice}), so a paged quiz never hits the 16MB document limit
+ANSWER_KEY_PAGE_SIZE = 1000
+
+# (quiz_id, digest) pairs already archived by this process
+_archived_keys = set()
+
+
+def _answer_key_id(quiz_id, key_ref, page=None):
+    """key_ref: the key's digest, or the revision for results archived before digests"""
+    if page is None:
+        return f'{quiz_id}:{key_ref}'
+    # Zero-padded so _id order is page order
+    return f'{quiz_id}:{key_ref}:{page:06d}'
+
+
+def build_answer_key(questions):
+    """Answer key fields from graded/stored questions (question_id, options, correct_answer)"""
+    return {
+        'question_ids': [q.get('question_id') for q in questions],
+        'options': [list(q.get('options', [])) for q in questions],
+        'correct_answers': [q.get('correct_answer', '') for q in questions]
+    }
+
+
+def answer_key_digest(answer_key):
+    """Content hash of an answer key"""
+    return hashlib.sha1(json.dumps(answer_key, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def legacy_revision(answer_key):
+    """Stable revision label for an answer key that predates quiz revisions"""
+    return f'legacy-{answer_key_digest(answer_key)[:12]}'
+
+
+def archive_answer_key(quiz_id, revision, answer_key):
+    """
+    Store an immutable answer key under its content digest (once per process,
+    paged when long) and return the digest. Two writers of the same _id write
+    the same content, so whichever insert lands first is correct.
+    """
+    digest = answer_key_digest(answer_key)
+    if (quiz_id, digest) in _archived_keys:
+        return digest
+    size = len(answer_key['question_ids'])
+    if size <= ANSWER_KEY_PAGE_SIZE:
+        doc = dict(answer_key)
+        doc.update(quiz_id=quiz_id, revision=revision, digest=digest)
+        db.quiz_revisions.update_one(
+            {'_id': _answer_key_id(quiz_id, digest)},
+            {'$setOnInsert': doc},
+            upsert=True
+        )
+    else:
+        ops = []
+        for page, start in enumerate(range(0, size, ANSWER_KEY_PAGE_SIZE)):
+            doc = {field: values[start:start + ANSWER_KEY_PAGE_SIZE] for field, values in answer_key.items()}
+            doc.update(quiz_id=quiz_id, revision=revision, digest=digest, page=page)
+            ops.append(UpdateOne({'_id': _answer_key_id(quiz_id, digest, page)}, {'$setOnInsert': doc}, upsert=True))
+        db.quiz_revisions.bulk_write(ops, ordered=False)
+    _archived_keys.add((quiz_id, digest))
+    return digest
+
+
+@lru_cache(maxsize=512)
+def get_answer_key(quiz_id, key_ref):
+    """
+    Archived answer key by digest (or by revision for results compacted before
+    digests); content-addressed, so cached without expiry
+    """
+    key = find_one(db.quiz_revisions, {'_id': _answer_key_id(quiz_id, key_ref)})
+    if key is None:
+        # Paged archive: the page _ids sort between 'quiz_id:ref:' and
+        # 'quiz_id:ref;' (';' follows ':'), read in one indexed range
+        prefix = _answer_key_id(quiz_id, key_ref)
+        pages = list(find(db.quiz_revisions, {'_id': {'$gt': prefix + ':', '$lt': prefix + ';'}}).sort('_id', 1))
+        if pages:
+            key = {'quiz_id': quiz_id, 'revision': pages[0].get('revision', key_ref)}
+            for field in ('question_ids', 'options', 'correct_answers'):
+                key[field] = [value for page in pages for value in page.get(field, [])]
+    if key is None:
+        # Not cached: lru_cache does not store raised exceptions
+        raise LookupError(f'No answer key {key_ref} for quiz {quiz_id}')
+    return key
+
+
+def can_compact(questions):
+    """Compact encoding needs every option index to fit in one byte"""
+    return all(len(q.get('options', [])) <= MAX_OPTION_INDEX + 1 for q in questions)
+
+
+def encode_answers(graded_questions):
+    """
+    Pack graded questions into compact fields.
+    graded_questions: [{question_id, options, correct_answer, user_answer, is_correct}] in answer-key order
+    """
+    answers = bytearray()
+    bitmap = bytearray((len(graded_questions) + 7) // 8)
+    other_answers = {}
+    for position, question in enumerate(graded_questions):
+        user_answer = question.get('user_answer', '')
+        options = question.get('options', [])
+        if not user_answer:
+            answers.append(NO_ANSWER)
+        elif user_answer in options:
+            answers.append(options.index(user_answer))
+        else:
+            # Free text or different casing: keep it verbatim
+            answers.append(OTHER_ANSWER)
+            other_answers[str(position)] = user_answer
+        if question.get('is_correct'):
+            bitmap[position // 8] |= 1 << (position % 8)
+
+    fields = {
+        'result_format': COMPACT_FORMAT,
+        'answers': Binary(bytes(answers)),
+        'correct_bitmap': Binary(bytes(bitmap))
+    }
+    if other_answers:
+        fields['other_answers'] = other_answers
+    return fields
+
+
+def compact_result_fields(quiz_id, revision, graded_questions):
+    """Archive the answer key if needed and return the compact result fields"""
+    digest = archive_answer_key(quiz_id, revision, build_answer_key(graded_questions))
+    fields = encode_answers(graded_questions)
+    fields['quiz_revision'] = revision
+    fields['answer_key'] = digest
+    return fields
+
+
+def current_answer_key(quiz_id, cache):
+    """(revision, answer key) of the quiz as it is now, or (None, None) if deleted"""
+    if quiz_id not in cache:
+        quiz = db.quizzes.find_one({'_id': ObjectId(quiz_id)}) if ObjectId.is_valid(quiz_id) else None
+        if quiz is None:
+            cache[quiz_id] = (None, None)
+        else:
+            questions = list(iter_quiz_questions(quiz, ['question_id', 'options', 'correct_answer']))
+            cache[quiz_id] = (quiz.get('revision', 0), build_answer_key(questions))
+    return cache[quiz_id]
+
+
+def compact_results(batch_size=500):
+    """
+    Convert legacy quiz_results documents (full per-question copies) to the
+    compact encoding. A result whose stored questions match the quiz's current
+    questions references the current revision; otherwise its own answer key is
+    archived under a legacy revision. Already compacted documents are skipped.
+    Returns (converted, skipped).
+    """
+    quiz_keys = {}
+    ops = []
+    converted = skipped = 0
+
+    cursor = db.quiz_results.find(
+        {'result_format': {'$ne': COMPACT_FORMAT}, 'questions': {'$exists': True}},
+        {'quiz_id': 1, 'questions': 1}
+    ).batch_size(batch_size)
+
+    for result in cursor:
+        questions = result.get('questions', [])
+        quiz_id = (result.get('quiz_id') or '').rstrip(',')
+        if not quiz_id or not questions or not can_compact(questions):
+            skipped += 1
+            continue
+
+        answer_key = build_answer_key(questions)
+        revision, current_key = current_answer_key(quiz_id, quiz_keys)
+        if current_key != answer_key:
+            revision = legacy_revision(answer_key)
+        digest = archive_answer_key(quiz_id, revision, answer_key)
+
+        fields = encode_answers(questions)
+        fields['quiz_revision'] = revision
+        fields['answer_key'] = digest
+        fields['quiz_id'] = quiz_id
+        ops.append(UpdateOne({'_id': result['_id']}, {'$set': fields, '$unset': {'questions': ''}}))
+        converted += 1
+
+        if len(ops) >= batch_size:
+            db.quiz_results.bulk_write(ops, ordered=False)
+            ops = []
+            print(f"[Compact Results] converted {converted} documents...")
+
+    if ops:
+        db.quiz_results.bulk_write(ops, ordered=False)
+    return converted, skipped
+
+
+def format_timestamp(value):
+    """ISO string for a stored timestamp (native date, or a legacy ISO string)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value or ''
+
+
+def expand_result_questions(result):
+    """
+    Per-question rows {question_id, options, correct_answer, user_answer, is_correct}
+    for both legacy and compact quiz_results documents.
+    """
+    if result.get('result_format') != COMPACT_FORMAT:
+        return result.get('questions', [])
+
+    key = get_answer_key(result['quiz_id'], result.get('answer_key') or result['quiz_revision'])
+    answers = bytes(result.get('answers', b''))
+    bitmap = bytes(result.get('correct_bitmap', b''))
+    other_answers = result.get('other_answers', {})
+
+    questions = []
+    for position, question_id in enumerate(key['question_ids']):
+        options = key['options'][position]
+        answer = answers[position] if position < len(answers) else NO_ANSWER
+        if answer == NO_ANSWER:
+            user_answer = ''
+        elif answer == OTHER_ANSWER:
+            user_answer = other_answers.get(str(position), '')
+        else:
+            user_answer = options[answer]
+        questions.append({
+            'question_id': question_id,
+            'options': options,
+            'correct_answer': key['correct_answers'][position],
+            'user_answer': user_answer,
+            'is_correct': bool(position // 8 < len(bitmap) and bitmap[position // 8] & (1 << (position % 8)))
+        })
+    return questions
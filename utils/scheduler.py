@@ -0,0 +1,170 @@
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+from config import db, SCHEDULER_MAX_WORKERS
+
+# Leader leases outlive the interval so a healthy leader keeps its jobs
+LEASE_FACTOR = 1.5
+
+
+class Scheduler:
+    """
+    In-process periodic jobs on a small thread pool.
+
+    - A dispatcher thread submits each due job to the pool; a job never
+      overlaps itself, and a slow job only delays its own next run.
+    - leader=True jobs run in one worker process at a time: the worker
+      holding the job's lease in scheduler_locks (renewed on every run,
+      taken over once it expires). Other jobs run in every process, e.g.
+      adopting the snapshots the leader published.
+    - Durations and last-run status per job are kept for /health/stats.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._dispatcher = None
+
+    def add_job(self, name, func, interval, leader=False):
+        """Run func every interval seconds (interval <= 0 disables the job)"""
+        if interval <= 0:
+            return
+        self._jobs[name] = {
+            'func': func,
+            'interval': interval,
+            'leader': leader,
+            'next_run': 0.0,
+            'running': False,
+            'stats': {
+                'runs': 0, 'failures': 0, 'skipped_not_leader': 0,
+                'last_status': None, 'last_started_at': None, 'last_duration_ms': None, 'last_error': None
+            }
+        }
+
+    @property
+    def running(self):
+        return self._dispatcher is not None
+
+    def start(self):
+        if self._dispatcher is not None or not self._jobs:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scheduler')
+        self._dispatcher = threading.Thread(target=self._dispatch, name='scheduler', daemon=True)
+        self._dispatcher.start()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'running': self.running,
+                'owner': self.owner,
+                'jobs': {
+                    name: dict(job['stats'], interval=job['interval'], leader=job['leader'], in_progress=job['running'])
+                    for name, job in self._jobs.items()
+                }
+            }
+
+    def _dispatch(self):
+        while True:
+            now = time.monotonic()
+            next_due = now + 1.0
+            for name, job in self._jobs.items():
+                with self._lock:
+                    if job['running']:
+                        continue
+                    if now >= job['next_run']:
+                        job['running'] = True
+                        job['next_run'] = now + job['interval']
+                        self._executor.submit(self._run, name)
+                next_due = min(next_due, job['next_run'])
+            time.sleep(max(0.05, next_due - time.monotonic()))
+
+    def _run(self, name):
+        job = self._jobs[name]
+        stats = job['stats']
+        started = time.monotonic()
+        try:
+            if job['leader'] and not self._acquire_lease(name, job['interval'] * LEASE_FACTOR):
+                stats['skipped_not_leader'] += 1
+                stats['last_status'] = 'skipped'
+                return
+            stats['last_started_at'] = datetime.now().isoformat()
+            job['func']()
+            stats['runs'] += 1
+            stats['last_status'] = 'ok'
+            stats['last_error'] = None
+        except Exception as e:
+            stats['failures'] += 1
+            stats['last_status'] = 'error'
+            stats['last_error'] = f"{type(e).__name__}: {e}"
+            print(f"[Scheduler] ERROR: job {name} failed: {e}")
+        finally:
+            if stats['last_status'] != 'skipped':
+                stats['last_duration_ms'] = round((time.monotonic() - started) * 1000, 1)
+            with self._lock:
+                job['running'] = False
+
+    def _acquire_lease(self, name, ttl):
+        """True when this process holds (or just took over) the job's lease"""
+        # UTC, so workers on hosts in different timezones agree on expiry
+        now = datetime.now(timezone.utc)
+        try:
+            db.scheduler_locks.find_one_and_update(
+                {'_id': name, '$or': [{'owner': self.owner}, {'expires_at': {'$lte': now}}]},
+                {'$set': {'owner': self.owner, 'expires_at': now + timedelta(seconds=ttl), 'renewed_at': now}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # Held by another worker and not expired
+            return False
+
+
+scheduler = Scheduler(SCHEDULER_MAX_WORKERS)
+
+
+def init_scheduler():
+    """Register the background jobs and start the scheduler (once per process)"""
+    if scheduler.running:
+        return scheduler
+    from config import (
+        SCHEDULE_SNAPSHOTS_SECONDS, SCHEDULE_RECONCILE_COUNTERS_SECONDS, SCHEDULE_COMPACT_RESULTS_SECONDS
+    )
+    from utils.cache_backends import cache_backend
+    from utils.counters import reconcile_quiz_counters
+    from utils.leaderboard import leaderboard_snapshot, window_snapshots
+    from utils.results import compact_results
+    from utils.standings import school_summary_snapshot, seed_quiz_bests, seed_standings, user_count_snapshot
+
+    # Precomputed read models: requests only read these snapshots. With a
+    # shared backend one worker computes them under the lease and publishes
+    # them there, and every worker adopts the published values; a per-worker
+    # backend has nowhere to publish, so each worker refreshes its own copy.
+    snapshots = [leaderboard_snapshot, school_summary_snapshot, user_count_snapshot] + list(window_snapshots.values())
+    for snapshot in snapshots:
+        if SCHEDULE_SNAPSHOTS_SECONDS > 0:
+            snapshot.schedule(SCHEDULE_SNAPSHOTS_SECONDS)
+        scheduler.add_job(
+            f'snapshot:{snapshot.name}', snapshot.refresh, SCHEDULE_SNAPSHOTS_SECONDS, leader=cache_backend.is_shared
+        )
+    if cache_backend.is_shared:
+        scheduler.add_job(
+            'adopt_snapshots', lambda: [snapshot.adopt() for snapshot in snapshots], SCHEDULE_SNAPSHOTS_SECONDS
+        )
+
+    # Cluster-wide maintenance: one worker at a time. seed_standings and
+    # seed_quiz_bests fill the read models from existing results once per
+    # database, then are a single read.
+    scheduler.add_job('seed_standings', seed_standings, SCHEDULE_SNAPSHOTS_SECONDS, leader=True)
+    scheduler.add_job('seed_quiz_bests', seed_quiz_bests, SCHEDULE_SNAPSHOTS_SECONDS, leader=True)
+    scheduler.add_job('reconcile_counters', reconcile_quiz_counters, SCHEDULE_RECONCILE_COUNTERS_SECONDS, leader=True)
+    scheduler.add_job('compact_results', compact_results, SCHEDULE_COMPACT_RESULTS_SECONDS, leader=True)
+
+    scheduler.start()
+    return scheduler
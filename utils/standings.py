@@ -0,0 +1,659 @@
+import time
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, InsertOne, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from config import db, ADMIN_USERNAME, LEADERBOARD_CACHE_TTL_SECONDS, LEADERBOARD_STALE_SECONDS
+from utils.cache import SnapshotCache
+from utils.cache_backends import cache_backend
+from utils.deadline import aggregate, count, find, find_one
+from utils.indexes import INDEXES
+from utils.read_preference import for_analytics
+
+# user_standings holds one pre-aggregated document per user:
+# {_id: user_id, school, total_quizzes_attempted, total_correct, total_questions,
+#  total_time_taken, score_sum, average_score, updated_at}
+# average_score is the mean per-attempt percentage, like the global leaderboard.
+#
+# daily_standings holds the same totals per user and day (server-local date of
+# submitted_at), so time windows are answered by merging a few buckets:
+# {_id: 'YYYY-MM-DD:user_id', day, user_id, school, total_quizzes_attempted,
+#  total_correct, total_questions, total_time_taken, score_sum}
+#
+# Both are kept up to date by every submit. Results stored before they existed
+# are folded in once by seed_standings (a scheduler job), which records
+# standings_seeded_at in the metadata collection.
+STANDINGS_META_ID = 'standings'
+STANDINGS_SEED_CLAIM_SECONDS = 600
+# user_id last, like rank_entries, so both read paths break ties the same way
+STANDING_SORT = [('average_score', DESCENDING), ('total_time_taken', ASCENDING), ('_id', ASCENDING)]
+# Score share of one quiz_results document in an aggregation; 0 for a result
+# without questions, like _standing_update (a bare $divide fails the pipeline)
+RESULT_SCORE = {
+    '$cond': [{'$gt': ['$total_questions', 0]}, {'$divide': ['$correct_answers', '$total_questions']}, 0]
+}
+
+# A rebuild runs while submits continue. It pauses the submit-time updates for
+# results with _id in [paused_from, resume_from) (ObjectId bounds kept in the
+# metadata document), rebuilds both collections from the results before
+# paused_from into new collections that replace the live ones, then replays
+# the paused range, so every result is counted exactly once. Workers re-read
+# the bounds every STANDINGS_PAUSE_POLL_SECONDS. Each bound is set that far
+# plus STANDINGS_CLOCK_MARGIN_SECONDS in the future, so every worker knows it
+# before any result it applies to is created.
+STANDINGS_PAUSE_POLL_SECONDS = 1.0
+STANDINGS_CLOCK_MARGIN_SECONDS = 5.0
+
+# Last bounds read by this process: {'checked_at', 'window': (paused_from, resume_from) or None}
+_pause = {'checked_at': 0.0, 'window': None}
+
+# quiz_best_results holds each user's best attempt per quiz (most correct
+# answers, then least time), so a per-quiz leaderboard page is one indexed read:
+# {_id: 'quiz_id:user_id', quiz_id, user_id, username, correct_answers,
+#  total_questions, time_taken, submitted_at, attempts}
+# Quizzes answered before it existed are filled from quiz_results by the
+# seed_quiz_bests job (QUIZ_BEST_SEED_BATCH quizzes per run), after which the
+# quiz carries best_results_seeded; new quizzes are created with it.
+QUIZ_BEST_SEED_BATCH = 50
+QUIZ_BEST_SORT = [('correct_answers', DESCENDING), ('time_taken', ASCENDING), ('user_id', ASCENDING)]
+
+
+def normalize_school(school):
+    return str(school or '').strip()
+
+
+def _running_total(field, value):
+    return {'$add': [{'$ifNull': [f'${field}', 0]}, value]}
+
+
+def day_bucket(moment):
+    """Midnight starting the day of moment (the daily_standings bucket key)"""
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def _daily_update(user_id, school, correct_answers, total_questions, time_taken, submitted_at):
+    """(filter, update) folding one graded submission into the user's bucket for its day"""
+    day = day_bucket(submitted_at)
+    return {'_id': f"{day:%Y-%m-%d}:{user_id}"}, {
+        '$inc': {
+            'total_quizzes_attempted': 1,
+            'total_correct': correct_answers,
+            'total_questions': total_questions,
+            'total_time_taken': time_taken,
+            'score_sum': correct_answers / total_questions if total_questions else 0
+        },
+        '$set': {'school': normalize_school(school)},
+        '$setOnInsert': {'day': day, 'user_id': str(user_id)}
+    }
+
+
+def _standing_update(user_id, school, correct_answers, total_questions, time_taken):
+    """(filter, pipeline) folding one graded submission into the user's standing"""
+    score = correct_answers / total_questions if total_questions else 0
+    return {'_id': str(user_id)}, [
+        {'$set': {
+            'school': {'$literal': normalize_school(school)},
+            'total_quizzes_attempted': _running_total('total_quizzes_attempted', 1),
+            'total_correct': _running_total('total_correct', correct_answers),
+            'total_questions': _running_total('total_questions', total_questions),
+            'total_time_taken': _running_total('total_time_taken', time_taken),
+            'score_sum': _running_total('score_sum', score),
+            'updated_at': {'$literal': datetime.now()}
+        }},
+        {'$set': {
+            'average_score': {'$multiply': [{'$divide': ['$score_sum', '$total_quizzes_attempted']}, 100]}
+        }}
+    ]
+
+
+def _pause_window():
+    """(paused_from, resume_from) of a running rebuild or None, re-read every poll interval"""
+    now = time.monotonic()
+    if now - _pause['checked_at'] >= STANDINGS_PAUSE_POLL_SECONDS:
+        try:
+            meta = find_one(db.metadata, {'_id': STANDINGS_META_ID}, {'paused_from': 1, 'resume_from': 1})
+        except Exception as e:
+            # Keep the last known bounds
+            print(f"[Standings] ERROR: failed to read the rebuild window: {e}")
+        else:
+            paused_from = (meta or {}).get('paused_from')
+            _pause['window'] = (paused_from, meta.get('resume_from')) if paused_from else None
+            _pause['checked_at'] = now
+    return _pause['window']
+
+
+def _paused(result_id):
+    """Whether a rebuild will replay this result (its submit must not apply it)"""
+    window = _pause_window()
+    if window is None or not isinstance(result_id, ObjectId):
+        return False
+    paused_from, resume_from = window
+    return result_id >= paused_from and (resume_from is None or result_id < resume_from)
+
+
+def record_standing(user_id, school, correct_answers, total_questions, time_taken, submitted_at, result_id=None):
+    """
+    Fold one graded submission into the user's standing (one atomic pipeline
+    update) and into the user's bucket for the day of submitted_at.
+    Skipped while a rebuild has paused the result's _id (it replays it).
+    """
+    if _paused(result_id):
+        return
+    try:
+        db.daily_standings.update_one(
+            *_daily_update(user_id, school, correct_answers, total_questions, time_taken, submitted_at),
+            upsert=True
+        )
+    except Exception as e:
+        # Buckets can be rebuilt with jobs/rebuild_user_standings.py
+        print(f"[Standings] ERROR: failed to record daily standing for user {user_id}: {e}")
+    try:
+        db.user_standings.update_one(
+            *_standing_update(user_id, school, correct_answers, total_questions, time_taken),
+            upsert=True
+        )
+    except Exception as e:
+        # Standings can be rebuilt with jobs/rebuild_user_standings.py
+        print(f"[Standings] ERROR: failed to record standing for user {user_id}: {e}")
+
+
+def _keep_best(attempt):
+    """Pipeline stage keeping the better of the stored attempt and this one"""
+    better = {'$or': [
+        {'$eq': [{'$ifNull': ['$correct_answers', None]}, None]},
+        {'$gt': [attempt['correct_answers'], '$correct_answers']},
+        {'$and': [
+            {'$eq': [attempt['correct_answers'], '$correct_answers']},
+            {'$lt': [attempt['time_taken'], '$time_taken']}
+        ]}
+    ]}
+    return {'$set': {
+        field: {'$cond': [better, {'$literal': value}, f'${field}']} for field, value in attempt.items()
+    }}
+
+
+def _best_update(quiz_id, user_id, attempt, attempts):
+    """(filter, pipeline) folding attempt into the user's best result on the quiz"""
+    return {'_id': f"{quiz_id}:{user_id}"}, [
+        {'$set': {
+            'quiz_id': {'$literal': quiz_id},
+            'user_id': {'$literal': str(user_id)},
+            'attempts': attempts
+        }},
+        _keep_best(attempt)
+    ]
+
+
+def record_quiz_best(quiz_id, user_id, username, correct_answers, total_questions, time_taken, submitted_at):
+    """Count the attempt and keep it if it is the user's best on the quiz (one atomic update)"""
+    attempt = {
+        'username': username,
+        'correct_answers': correct_answers,
+        'total_questions': total_questions,
+        'time_taken': time_taken,
+        'submitted_at': submitted_at
+    }
+    try:
+        db.quiz_best_results.update_one(
+            *_best_update(quiz_id, user_id, attempt, _running_total('attempts', 1)), upsert=True
+        )
+    except Exception as e:
+        # Reseeded from quiz_results with seed_quiz_best(quiz_id, reset=True)
+        print(f"[Standings] ERROR: failed to record best result of user {user_id} on quiz {quiz_id}: {e}")
+
+
+def seed_quiz_best(quiz_id, reset=False):
+    """
+    Fill quiz_best_results for one quiz from quiz_results (one scan of the
+    quiz's results). Merged with what submits recorded meanwhile; reset=True
+    replaces the quiz's rows instead (run it while submissions are paused).
+    Returns the number of users.
+    """
+    pipeline = [
+        {'$match': {'quiz_id': quiz_id}},
+        {'$sort': {'correct_answers': -1, 'time_taken': 1}},
+        {
+            '$group': {
+                '_id': '$user_id',
+                'username': {'$first': '$username'},
+                'correct_answers': {'$first': '$correct_answers'},
+                'total_questions': {'$first': '$total_questions'},
+                'time_taken': {'$first': '$time_taken'},
+                'submitted_at': {'$first': '$submitted_at'},
+                'attempts': {'$sum': 1}
+            }
+        }
+    ]
+    if reset:
+        db.quiz_best_results.delete_many({'quiz_id': quiz_id})
+    ops = []
+    for best in db.quiz_results.aggregate(pipeline, allowDiskUse=True):
+        user_id = best.pop('_id')
+        attempts = best.pop('attempts')
+        ops.append(UpdateOne(
+            *_best_update(quiz_id, user_id, best, {'$max': [{'$ifNull': ['$attempts', 0]}, attempts]}),
+            upsert=True
+        ))
+    if ops:
+        db.quiz_best_results.bulk_write(ops, ordered=False)
+    if ObjectId.is_valid(quiz_id):
+        db.quizzes.update_one({'_id': ObjectId(quiz_id)}, {'$set': {'best_results_seeded': True}})
+    return len(ops)
+
+
+def seed_quiz_bests(limit=QUIZ_BEST_SEED_BATCH):
+    """
+    Scheduler job: seed quiz_best_results for up to limit quizzes that predate
+    it. Reads the primary, so a lagging secondary never makes a seeded quiz
+    look unseeded again. Once none is left the metadata records it and later
+    runs are one point read. Returns the number of quizzes seeded.
+    """
+    meta = db.metadata.find_one({'_id': STANDINGS_META_ID}, {'quiz_bests_seeded_at': 1})
+    if meta and meta.get('quiz_bests_seeded_at'):
+        return 0
+    pending = [str(quiz['_id']) for quiz in db.quizzes.find({'best_results_seeded': {'$ne': True}}, {'_id': 1}).limit(limit)]
+    for quiz_id in pending:
+        seed_quiz_best(quiz_id)
+    if len(pending) < limit:
+        db.metadata.update_one(
+            {'_id': STANDINGS_META_ID}, {'$set': {'quiz_bests_seeded_at': datetime.now()}}, upsert=True
+        )
+    return len(pending)
+
+
+def quiz_leaderboard(quiz_id, skip=0, limit=10):
+    """One page of a quiz's best attempts and the number of ranked users (quiz_rank index)"""
+    query = {'quiz_id': quiz_id}
+    total_items = count(db.quiz_best_results, query)
+    bests = list(find(db.quiz_best_results, query).sort(QUIZ_BEST_SORT).skip(skip).limit(limit))
+    return bests, total_items
+
+
+def quiz_rank(quiz_id, user_id):
+    """(rank, best attempt) of the user on the quiz, ordered like quiz_leaderboard; None if never attempted"""
+    best = find_one(db.quiz_best_results, {'_id': f"{quiz_id}:{user_id}"})
+    if best is None:
+        return None
+    correct, time_taken, user_id = best.get('correct_answers'), best.get('time_taken'), best.get('user_id')
+    ahead = count(db.quiz_best_results, {
+        'quiz_id': quiz_id,
+        '$or': [
+            {'correct_answers': {'$gt': correct}},
+            {'correct_answers': correct, 'time_taken': {'$lt': time_taken}},
+            {'correct_answers': correct, 'time_taken': time_taken, 'user_id': {'$lt': user_id}}
+        ]
+    })
+    return ahead + 1, best
+
+
+def user_rank(user_id):
+    """Global rank of the user in STANDING_SORT order, like /leaderboard; None without a standing"""
+    standing = find_one(db.user_standings, {'_id': str(user_id)}, {'average_score': 1, 'total_time_taken': 1})
+    if standing is None:
+        return None
+    score, time_taken = standing.get('average_score'), standing.get('total_time_taken')
+    ahead = count(db.user_standings, {
+        '$or': [
+            {'average_score': {'$gt': score}},
+            {'average_score': score, 'total_time_taken': {'$lt': time_taken}},
+            {'average_score': score, 'total_time_taken': time_taken, '_id': {'$lt': standing['_id']}}
+        ]
+    })
+    return ahead + 1
+
+
+def submitted_datetime(value):
+    """submitted_at as a datetime (legacy results hold an ISO string); None if unparseable"""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _user_schools(user_ids):
+    object_ids = [ObjectId(uid) for uid in user_ids if ObjectId.is_valid(uid)]
+    return {
+        str(user['_id']): normalize_school(user.get('school'))
+        for user in db.users.find({'_id': {'$in': object_ids}}, {'school': 1})
+    }
+
+
+def _replace_collection(name, docs, batch_size=1000):
+    """
+    Write docs into a new collection with name's indexes and rename it over
+    name in one step, so readers never see a partly rebuilt collection
+    """
+    staging = db[f'{name}_rebuild']
+    staging.drop()
+    ops = []
+    written = 0
+    for doc in docs:
+        ops.append(InsertOne(doc))
+        if len(ops) >= batch_size:
+            staging.bulk_write(ops, ordered=False)
+            written += len(ops)
+            ops = []
+    if ops:
+        staging.bulk_write(ops, ordered=False)
+        written += len(ops)
+    if not written:
+        db[name].delete_many({})
+        return 0
+    for keys, options in INDEXES.get(name, []):
+        staging.create_index(keys, **options)
+    staging.rename(name, dropTarget=True)
+    return written
+
+
+def rebuild_standings(before=None):
+    """
+    Recompute every standing from quiz_results (those with _id before the given
+    ObjectId, if any) and users, replacing the collection; returns the count
+    """
+    pipeline = [
+        {
+            '$group': {
+                '_id': '$user_id',
+                'total_quizzes_attempted': {'$sum': 1},
+                'total_correct': {'$sum': '$correct_answers'},
+                'total_questions': {'$sum': '$total_questions'},
+                'total_time_taken': {'$sum': '$time_taken'},
+                'score_sum': {'$sum': RESULT_SCORE}
+            }
+        }
+    ]
+    if before is not None:
+        pipeline.insert(0, {'$match': {'_id': {'$lt': before}}})
+    totals = list(db.quiz_results.aggregate(pipeline, allowDiskUse=True))
+    schools = _user_schools([str(t['_id']) for t in totals])
+
+    now = datetime.now()
+
+    def docs():
+        for total in totals:
+            user_id = str(total.pop('_id'))
+            total['_id'] = user_id
+            total['school'] = schools.get(user_id, '')
+            total['average_score'] = total['score_sum'] / total['total_quizzes_attempted'] * 100
+            total['updated_at'] = now
+            yield total
+
+    return _replace_collection('user_standings', docs())
+
+
+def rebuild_daily_standings(batch_size=1000, before=None):
+    """
+    Recompute every daily bucket from quiz_results (those with _id before the
+    given ObjectId, if any), replacing the collection; returns the count.
+    Legacy ISO-string submitted_at values are parsed; unparseable ones are
+    reported and left out (jobs/migrate_submitted_at.py lists them).
+    """
+    query = {'_id': {'$lt': before}} if before is not None else {}
+    buckets = {}
+    unparseable = 0
+    for result in db.quiz_results.find(
+        query,
+        {'user_id': 1, 'correct_answers': 1, 'total_questions': 1, 'time_taken': 1, 'submitted_at': 1}
+    ).batch_size(batch_size):
+        submitted_at = submitted_datetime(result.get('submitted_at'))
+        if submitted_at is None:
+            unparseable += 1
+            continue
+        total_questions = result.get('total_questions', 0)
+        correct_answers = result.get('correct_answers', 0)
+        key = (day_bucket(submitted_at), str(result.get('user_id')))
+        bucket = buckets.setdefault(key, {
+            'total_quizzes_attempted': 0, 'total_correct': 0, 'total_questions': 0,
+            'total_time_taken': 0, 'score_sum': 0
+        })
+        bucket['total_quizzes_attempted'] += 1
+        bucket['total_correct'] += correct_answers
+        bucket['total_questions'] += total_questions
+        bucket['total_time_taken'] += result.get('time_taken', 0)
+        bucket['score_sum'] += correct_answers / total_questions if total_questions else 0
+    if unparseable:
+        print(f"[Standings] {unparseable} results with an unparseable submitted_at left out of daily_standings")
+
+    schools = _user_schools({user_id for _, user_id in buckets})
+    docs = (
+        dict(totals, _id=f"{day:%Y-%m-%d}:{user_id}", day=day, user_id=user_id, school=schools.get(user_id, ''))
+        for (day, user_id), totals in buckets.items()
+    )
+    return _replace_collection('daily_standings', docs, batch_size)
+
+
+def replay_standings(paused_from, resume_from, batch_size=1000):
+    """Fold the results with _id in [paused_from, resume_from) into both collections; returns the count"""
+    results = list(db.quiz_results.find(
+        {'_id': {'$gte': paused_from, '$lt': resume_from}},
+        {'user_id': 1, 'correct_answers': 1, 'total_questions': 1, 'time_taken': 1, 'submitted_at': 1}
+    ).batch_size(batch_size))
+    schools = _user_schools({str(result.get('user_id')) for result in results})
+
+    daily_ops, standing_ops = [], []
+    for result in results:
+        user_id = str(result.get('user_id'))
+        totals = (result.get('correct_answers', 0), result.get('total_questions', 0), result.get('time_taken', 0))
+        standing_ops.append(UpdateOne(*_standing_update(user_id, schools.get(user_id, ''), *totals), upsert=True))
+        submitted_at = submitted_datetime(result.get('submitted_at'))
+        if submitted_at is not None:
+            daily_ops.append(UpdateOne(
+                *_daily_update(user_id, schools.get(user_id, ''), *totals, submitted_at), upsert=True
+            ))
+    for collection, ops in ((db.daily_standings, daily_ops), (db.user_standings, standing_ops)):
+        for start in range(0, len(ops), batch_size):
+            collection.bulk_write(ops[start:start + batch_size], ordered=False)
+    return len(results)
+
+
+def standings_seeded():
+    """Whether the standings cover every stored result (seed_standings has run)"""
+    return find_one(db.metadata, {'_id': STANDINGS_META_ID, 'standings_seeded_at': {'$exists': True}}, {'_id': 1}) is not None
+
+
+def snapshot_version():
+    """
+    Cheap change token for the leaderboard and dashboard snapshots: the newest
+    standing update (every submit, after its daily bucket) and the newest user.
+    Two indexed reads; snapshot jobs skip recomputing while it is unchanged.
+    """
+    standing = find_one(for_analytics(db.user_standings), {}, {'updated_at': 1}, sort=[('updated_at', DESCENDING)])
+    user = find_one(for_analytics(db.users), {}, {'_id': 1}, sort=[('_id', DESCENDING)])
+    return standing and standing.get('updated_at'), user and user['_id']
+
+
+def _pause_bound():
+    """ObjectId bound every worker will have read before results reach it"""
+    return ObjectId.from_datetime(
+        datetime.now(timezone.utc) + timedelta(seconds=STANDINGS_PAUSE_POLL_SECONDS + STANDINGS_CLOCK_MARGIN_SECONDS)
+    )
+
+
+def _wait_past(bound):
+    """Sleep until results created before bound have been stored"""
+    delay = (bound.generation_time - datetime.now(timezone.utc)).total_seconds() + STANDINGS_CLOCK_MARGIN_SECONDS
+    if delay > 0:
+        time.sleep(delay)
+
+
+def rebuild_all_standings(batch_size=1000):
+    """
+    Rebuild user_standings and daily_standings from quiz_results while submits
+    keep running (see STANDINGS_PAUSE_POLL_SECONDS). Takes about four times
+    the poll interval plus clock margin longer than the rebuild itself.
+    Returns (standings, daily buckets, replayed results).
+    """
+    paused_from = _pause_bound()
+    db.metadata.update_one(
+        {'_id': STANDINGS_META_ID},
+        {'$set': {'paused_from': paused_from}, '$unset': {'resume_from': ''}},
+        upsert=True
+    )
+    _wait_past(paused_from)
+    total = buckets = 0
+    try:
+        total = rebuild_standings(before=paused_from)
+        buckets = rebuild_daily_standings(batch_size, before=paused_from)
+    finally:
+        # Replayed even when the rebuild failed: the paused results were applied nowhere
+        resume_from = _pause_bound()
+        db.metadata.update_one({'_id': STANDINGS_META_ID}, {'$set': {'resume_from': resume_from}})
+        _wait_past(resume_from)
+        replayed = replay_standings(paused_from, resume_from, batch_size)
+        db.metadata.update_one({'_id': STANDINGS_META_ID}, {'$unset': {'paused_from': '', 'resume_from': ''}})
+    return total, buckets, replayed
+
+
+def seed_standings():
+    """
+    Build user_standings and daily_standings from quiz_results once per
+    database, so an existing database gets its standings without running
+    jobs/rebuild_user_standings.py by hand. Returns False when already seeded.
+    """
+    if standings_seeded():
+        return False
+    # Claim the seed so a worker taking over the job lease mid-rebuild waits
+    now = datetime.now()
+    try:
+        db.metadata.find_one_and_update(
+            {'_id': STANDINGS_META_ID, 'standings_seeded_at': {'$exists': False},
+             'seeding_until': {'$not': {'$gt': now}}},
+            {'$set': {'seeding_until': now + timedelta(seconds=STANDINGS_SEED_CLAIM_SECONDS)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    total, buckets, replayed = rebuild_all_standings()
+    mark_standings_seeded()
+    print(f"[Standings] Seeded {total} standings and {buckets} daily buckets from quiz_results "
+          f"({replayed} submitted during the rebuild replayed)")
+    return True
+
+
+def mark_standings_seeded():
+    """Record that the standings cover every stored result (seed_standings skips from then on)"""
+    db.metadata.update_one(
+        {'_id': STANDINGS_META_ID},
+        {'$set': {'standings_seeded_at': datetime.now()}, '$unset': {'seeding_until': ''}},
+        upsert=True
+    )
+
+
+def _entry(standing, user, rank):
+    uid = standing['_id']
+    if user is None:
+        is_admin = uid.lower() == 'admin'
+        user = {'name': 'Admin' if is_admin else 'Unknown User', 'email': ADMIN_USERNAME if is_admin else ''}
+    return {
+        'user_id': uid,
+        'name': user.get('name', 'Unknown'),
+        'attempted_questions': standing.get('total_questions', 0),
+        'time_taken': round(standing.get('total_time_taken', 0), 2),
+        'email': user.get('email', ''),
+        'phone': user.get('phone', ''),
+        'total_correct': standing.get('total_correct', 0),
+        'total_questions': standing.get('total_questions', 0),
+        'rank': rank
+    }
+
+
+def school_leaderboard(school, skip=0, limit=10):
+    """
+    One page of a school's ranking and the school's ranked user count.
+    Served by the school_user_rank index: cost grows with the school, not the user base.
+    """
+    query = {'school': school}
+    total_items = count(db.user_standings, query)
+    standings = list(find(db.user_standings, query).sort(STANDING_SORT).skip(skip).limit(limit))
+
+    object_ids = [ObjectId(s['_id']) for s in standings if ObjectId.is_valid(s['_id'])]
+    users = {
+        str(user['_id']): user
+        for user in find(db.users, {'_id': {'$in': object_ids}}, {'name': 1, 'email': 1, 'phone': 1})
+    }
+    entries = [_entry(standing, users.get(standing['_id']), skip + index)
+               for index, standing in enumerate(standings, start=1)]
+    return entries, total_items
+
+
+def school_totals(school):
+    """Dashboard counters for one school (users, attendees, attempted questions, average score)"""
+    totals = next(aggregate(db.user_standings, [
+        {'$match': {'school': school}},
+        {'$group': {
+            '_id': None,
+            'users_attended': {'$sum': 1},
+            'total_attempted_questions': {'$sum': '$total_questions'},
+            'average_score': {'$avg': '$average_score'}
+        }}
+    ]), None) or {}
+    return {
+        'total_users': count(db.users, {'school': school}),
+        'users_attended': totals.get('users_attended', 0),
+        'total_attempted_questions': totals.get('total_attempted_questions', 0),
+        'average_score': round(totals.get('average_score') or 0.0, 2)
+    }
+
+
+def compute_school_summaries():
+    """Per-school users, attendees, attempted questions and average score, by school name"""
+    summaries = {}
+    for row in aggregate(for_analytics(db.users), [
+        {'$match': {'school': {'$nin': ['', None]}}},
+        {'$group': {'_id': '$school', 'total_users': {'$sum': 1}}}
+    ]):
+        summary = summaries.setdefault(normalize_school(row['_id']), {'total_users': 0})
+        summary['total_users'] += row['total_users']
+
+    for row in aggregate(for_analytics(db.user_standings), [
+        {'$match': {'school': {'$ne': ''}}},
+        {'$group': {
+            '_id': '$school',
+            'users_attended': {'$sum': 1},
+            'total_attempted_questions': {'$sum': '$total_questions'},
+            'average_score': {'$avg': '$average_score'}
+        }}
+    ]):
+        summaries.setdefault(row['_id'], {'total_users': 0}).update({
+            'users_attended': row['users_attended'],
+            'total_attempted_questions': row['total_attempted_questions'],
+            'average_score': round(row.get('average_score') or 0.0, 2)
+        })
+
+    return [
+        {
+            'school': school,
+            'total_users': summary.get('total_users', 0),
+            'users_attended': summary.get('users_attended', 0),
+            'total_attempted_questions': summary.get('total_attempted_questions', 0),
+            'average_score': summary.get('average_score', 0.0)
+        }
+        for school, summary in sorted(summaries.items())
+    ]
+
+
+def count_users():
+    return count(for_analytics(db.users), {})
+
+
+# Dashboard user total (same TTLs as the leaderboard)
+user_count_snapshot = SnapshotCache(
+    'user_count',
+    count_users,
+    ttl=LEADERBOARD_CACHE_TTL_SECONDS,
+    stale_ttl=LEADERBOARD_STALE_SECONDS,
+    shared=cache_backend if cache_backend.is_shared else None,
+    version=snapshot_version
+)
+
+# Per-school rows of the global dashboard (same TTLs as the leaderboard)
+school_summary_snapshot = SnapshotCache(
+    'school_summary',
+    compute_school_summaries,
+    ttl=LEADERBOARD_CACHE_TTL_SECONDS,
+    stale_ttl=LEADERBOARD_STALE_SECONDS,
+    shared=cache_backend if cache_backend.is_shared else None,
+    version=snapshot_version
+)
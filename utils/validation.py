@@ -0,0 +1,204 @@
+from flask import jsonify
+from utils.questions import QUESTION_FIELDS, STORAGE_EMBEDDED, STORAGE_PAGED
+
+# Request body shapes, checked before any database access. Each shape is a
+# Schema built once at import: an ordered tuple of (predicate, message) rules.
+# Validators collect every failing rule, so a client sees all of its mistakes
+# in one 400 response instead of fixing them one round trip at a time.
+
+# Errors listed in a 400 response (the rest are only counted)
+MAX_VALIDATION_ERRORS = 100
+
+
+class Schema:
+    """Rules of one JSON object shape; message templates get {label}"""
+
+    __slots__ = ('rules',)
+
+    def __init__(self, *rules):
+        self.rules = rules
+
+    def errors(self, value, label):
+        if not isinstance(value, dict):
+            return [f'{label} must be an object']
+        return [message.format(label=label) for check, message in self.rules if not check(value)]
+
+
+def _text(value):
+    return isinstance(value, str) and value.strip() != ''
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _options(value):
+    return isinstance(value, list) and len(value) >= 2
+
+
+def _answer_in_options(item):
+    # Only checked once the options themselves are valid (reported separately)
+    return not _options(item.get('options')) or item.get('correct_answer') in item['options']
+
+
+def valid_question_id(question_id):
+    """Also usable as a field name (quiz_progress.answers is keyed by it)"""
+    return isinstance(question_id, str) and question_id != '' and '.' not in question_id and not question_id.startswith('$')
+
+
+def _optional(field, check):
+    return lambda item: field not in item or check(item[field])
+
+
+QUESTION = Schema(
+    (lambda q: _text(q.get('question')), '{label} must have question field'),
+    (lambda q: _options(q.get('options')), '{label} must have at least 2 options'),
+    (_answer_in_options, '{label} must have a correct_answer that matches one of the options'),
+    (_optional('question_id', lambda v: v is None or valid_question_id(v)), '{label} has an invalid question_id'),
+)
+
+QUESTION_UPDATE = Schema(
+    (lambda u: valid_question_id(u.get('question_id')), '{label} must have question_id'),
+    (lambda u: any(field in u for field in QUESTION_FIELDS), '{label} must change question, options or correct_answer'),
+    (_optional('question', _text), '{label} question cannot be empty'),
+    (_optional('options', _options), '{label} must have at least 2 options'),
+    (lambda u: 'options' not in u or 'correct_answer' not in u or _answer_in_options(u),
+     '{label} must have a correct_answer that matches one of the options'),
+)
+
+ANSWER = Schema(
+    (lambda a: valid_question_id(a.get('question_id')), '{label}: invalid question_id'),
+    (_optional('answer', lambda v: v is None or isinstance(v, str) or _number(v)), '{label}: answer must be a string or number'),
+    (_optional('answered', lambda v: isinstance(v, bool)), '{label}: answered must be true or false'),
+    (_optional('time_taken', lambda v: _number(v) and v >= 0), '{label}: time_taken must be a non-negative number'),
+)
+
+QUIZ = Schema(
+    (lambda q: _text(q.get('title')), 'title is required'),
+    (lambda q: q.get('storage') in (None, STORAGE_EMBEDDED, STORAGE_PAGED), 'storage must be embedded or paged'),
+    (lambda q: isinstance(q.get('questions'), list) and len(q['questions']) > 0, 'questions must be a non-empty array'),
+)
+
+QUIZ_UPDATE = Schema(
+    (lambda q: 'title' in q or 'questions' in q, 'No fields provided for update'),
+    (_optional('title', _text), 'title cannot be empty'),
+    (_optional('questions', lambda v: isinstance(v, list) and len(v) > 0), 'questions must be a non-empty array'),
+)
+
+QUESTION_PATCH = Schema(
+    (_optional('remove', lambda v: isinstance(v, list) and all(valid_question_id(qid) for qid in v)),
+     'remove must be an array of question IDs'),
+    (_optional('update', lambda v: isinstance(v, list)), 'update must be an array'),
+    (_optional('add', lambda v: isinstance(v, list)), 'add must be an array'),
+    (lambda p: any(p.get(field) for field in ('remove', 'update', 'add')), 'Provide at least one of add, update or remove'),
+)
+
+
+def _each(items, schema, label):
+    errors = []
+    for idx, item in enumerate(items):
+        errors.extend(schema.errors(item, f'{label} {idx + 1}'))
+    return errors
+
+
+def _repeated_ids(items, message):
+    seen = set()
+    repeated = []
+    for item in items:
+        question_id = item.get('question_id') if isinstance(item, dict) else None
+        if not question_id:
+            continue
+        if question_id in seen and question_id not in repeated:
+            repeated.append(question_id)
+        seen.add(question_id)
+    return [message.format(question_id=question_id) for question_id in repeated]
+
+
+def _list(data, field):
+    value = data.get(field)
+    return value if isinstance(value, list) else []
+
+
+def quiz_errors(data, keep_question_ids=False):
+    """POST /quiz and each quiz of an import (keep_question_ids: given ids are stored)"""
+    errors = QUIZ.errors(data, 'Quiz')
+    if not isinstance(data, dict):
+        return errors
+    questions = _list(data, 'questions')
+    errors.extend(_each(questions, QUESTION, 'Question'))
+    if keep_question_ids:
+        errors.extend(_repeated_ids(questions, 'question_id {question_id} is used more than once'))
+    return errors
+
+
+def quiz_update_errors(data):
+    """PUT /quiz/<quiz_id>: title and/or questions to append"""
+    errors = QUIZ_UPDATE.errors(data, 'Request body')
+    if not isinstance(data, dict):
+        return errors
+    questions = _list(data, 'questions')
+    errors.extend(_each(questions, QUESTION, 'Question'))
+    errors.extend(_repeated_ids(questions, 'question_id {question_id} is used more than once'))
+    return errors
+
+
+def question_patch_errors(data):
+    """PATCH /quiz/<quiz_id>/questions: remove, update and add lists"""
+    errors = QUESTION_PATCH.errors(data, 'Request body')
+    if not isinstance(data, dict):
+        return errors
+    removed = _list(data, 'remove')
+    # Repeats are only checked once every id is valid (type errors reported above)
+    if all(valid_question_id(qid) for qid in removed) and len(set(removed)) != len(removed):
+        errors.append('Each question can only be removed once per request')
+    updates = _list(data, 'update')
+    errors.extend(_each(updates, QUESTION_UPDATE, 'Update'))
+    errors.extend(_repeated_ids(updates, 'Each question can only be updated once per request ({question_id})'))
+    both = [u['question_id'] for u in updates
+            if isinstance(u, dict) and valid_question_id(u.get('question_id')) and u['question_id'] in removed]
+    if both:
+        errors.append(f'A question cannot be both updated and removed ({", ".join(both)})')
+    errors.extend(_each(_list(data, 'add'), QUESTION, 'Question'))
+    return errors
+
+
+def answer_errors(data, required=True, max_items=None):
+    """
+    Submit and progress bodies: {questions: [{question_id, answer?, answered?, time_taken?}]}.
+    Submits may omit questions (required=False) when autosaved progress supplies them.
+    """
+    if data is None and not required:
+        return []
+    if not isinstance(data, dict):
+        return ['Request body must be a JSON object']
+    questions = data.get('questions')
+    if questions is None and not required:
+        return []
+    if not isinstance(questions, list) or (required and not questions):
+        return ['Questions must be provided as a non-empty array' if required else 'Questions must be provided as an array']
+    if max_items is not None and len(questions) > max_items:
+        return [f'At most {max_items} questions per request']
+    return _each(questions, ANSWER, 'Question')
+
+
+def json_body(request, required=True):
+    """(parsed JSON body or None, errors); a body that is sent must be a JSON object"""
+    data = request.get_json(silent=True)
+    if data is None:
+        if required or request.get_data(cache=True):
+            return None, ['Request body must be a JSON object']
+        return None, []
+    if not isinstance(data, dict):
+        return None, ['Request body must be a JSON object']
+    return data, []
+
+
+def validation_error_response(errors):
+    """400 envelope listing every validation error (error: the first, for older clients)"""
+    listed = errors[:MAX_VALIDATION_ERRORS]
+    return jsonify({
+        'status': False,
+        'error': errors[0] if len(errors) == 1 else f'{errors[0]} (and {len(errors) - 1} more errors)',
+        'errors': listed,
+        'errors_truncated': len(errors) > len(listed)
+    }), 400